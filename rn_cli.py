@@ -0,0 +1,251 @@
+import sys, os, json, csv, argparse, re
+from typing import Optional
+
+from rn_engine import set_lang, render_rn, render_flow, records_from_project, _when_to_text, _acao_dict_to_text
+from rn_project import PROJECT_DIR_EXT, COMPACT_EXT, load_project
+from rn_schema import ProjectError, check_project, validate_spec
+
+PROJECT_EXTS = (".rnproj", ".json", COMPACT_EXT)
+SPEC_EXTS = (".csv",)
+DEFAULT_FLOW = "Fluxo Padrão"
+
+# Colunas aceitas no CSV de regras (uma RN por linha). "conds" e "acoes" são listas JSON
+# no mesmo formato de LinhaCondicao.to_dict / LinhaAcao.to_dict.
+CSV_GATILHO_COLS = ("obj", "tarefa", "campo", "resposta", "tarefa_done", "evento")
+
+
+class InputError(Exception):
+    pass
+
+
+def _iter_inputs(paths):
+    """(arquivo, subpasta relativa à pasta varrida): a subpasta é repetida no --out-dir."""
+    for p in paths:
+        if os.path.isdir(p) and not p.rstrip("/\\").lower().endswith(PROJECT_DIR_EXT):
+            for root, dirs, files in os.walk(p):
+                rel = os.path.relpath(root, p)
+                rel = "" if rel == os.curdir else rel
+                # Projetos em pasta são uma entrada só; não desce neles
+                for name in sorted(d for d in dirs if d.lower().endswith(PROJECT_DIR_EXT)):
+                    yield os.path.join(root, name), rel
+                dirs[:] = [d for d in dirs if not d.lower().endswith(PROJECT_DIR_EXT)]
+                for name in sorted(files):
+                    if name.lower().endswith(PROJECT_EXTS + SPEC_EXTS):
+                        yield os.path.join(root, name), rel
+        else:
+            yield p, ""
+
+
+def _specs_to_flows(specs, start_idx: int) -> dict:
+    flows: dict[str, list[str]] = {}
+    for n, spec in enumerate(specs, start=1):
+        if not isinstance(spec, dict):
+            raise InputError(f"regra inválida (esperado objeto): {spec!r}")
+        errors = validate_spec(spec)
+        if not errors:
+            # Campos obrigatórios de cada tipo: o que a renderização deixaria de fora é erro, não texto sumido
+            if not _when_to_text(spec.get("gatilho") or {}):
+                errors.append("gatilho: incompleto")
+            errors += [f"acoes[{i}]: incompleta" for i, a in enumerate(spec["acoes"]) if not _acao_dict_to_text(a)]
+        if errors:
+            raise InputError(f"regra {n}: " + "; ".join(errors[:5]))
+        name = (spec.get("fluxo") or DEFAULT_FLOW).strip() or DEFAULT_FLOW
+        rns = flows.setdefault(name, [])
+        rns.append(render_rn(start_idx + len(rns), spec))
+    return flows
+
+
+def _load_json(path: str, start_idx: Optional[int], lang: Optional[str] = None):
+    try:
+        # Pasta, .rnpz ou JSON: load_project reconhece pelo conteúdo
+        data = load_project(path)
+    except (OSError, UnicodeDecodeError, ValueError, KeyError) as e:
+        raise InputError(str(e))
+
+    if isinstance(data, list):
+        return _specs_to_flows(data, start_idx if start_idx is not None else 1)
+    if not isinstance(data, dict):
+        raise InputError("conteúdo JSON não reconhecido")
+
+    # O idioma da linha de comando vale sobre o do arquivo; definido antes de qualquer renderização
+    set_lang(lang or data.get("lang") or "pt")
+
+    if isinstance(data.get("rules"), list):
+        idx = start_idx if start_idx is not None else int(data.get("start_idx", 1))
+        return _specs_to_flows(data["rules"], idx)
+
+    # Projeto .rnproj (versão 5 ou legado com "rns"): migrado e validado antes de renderizar,
+    # com a mesma renderização do RNBuilder
+    if not isinstance(data.get("flows"), dict) and not isinstance(data.get("rns"), list):
+        raise InputError("nenhum fluxo ou regra encontrado")
+    try:
+        data = check_project(data)
+    except ProjectError as e:
+        raise InputError(str(e))
+    start = start_idx if start_idx is not None else (data.get("header") or {}).get("start_idx", 1)
+    return {k: render_flow(v, start) for k, v in records_from_project(data).items()}
+
+
+def _load_csv(path: str, start_idx: Optional[int]):
+    try:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            rows = list(csv.DictReader(f, dialect=dialect))
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        raise InputError(str(e))
+
+    specs = []
+    for n, row in enumerate(rows, start=2):
+        row = {(k or "").strip().lower(): (v or "") for k, v in row.items()}
+        try:
+            conds = json.loads(row["conds"]) if row.get("conds", "").strip() else []
+            acoes = json.loads(row["acoes"]) if row.get("acoes", "").strip() else []
+        except json.JSONDecodeError as e:
+            raise InputError(f"linha {n}: {e}")
+        gatilho = {k: row.get(k, "") for k in CSV_GATILHO_COLS}
+        if row.get("gatilho"):
+            gatilho["tipo"] = row["gatilho"]
+        specs.append({
+            "fluxo": row.get("fluxo", ""),
+            "gatilho": gatilho,
+            "conds": conds,
+            "conj": row.get("conj") or "E",
+            "acoes": acoes,
+        })
+    return _specs_to_flows(specs, start_idx if start_idx is not None else 1)
+
+
+def _safe_name(s: str) -> str:
+    return re.sub(r'[<>:"/\\|?*\x00-\x1f]+', "_", s).strip(" .") or "fluxo"
+
+
+def _output_paths(path: str, flows: dict, out_dir: Optional[str], rel_dir: str = "") -> dict:
+    stem = os.path.splitext(os.path.basename(path.rstrip("/\\")))[0]
+    base_dir = os.path.join(out_dir, rel_dir) if out_dir else os.path.dirname(os.path.abspath(path))
+    if len(flows) == 1:
+        name = next(iter(flows))
+        return {name: os.path.join(base_dir, f"{stem}.txt")}
+    return {name: os.path.join(base_dir, f"{stem}__{_safe_name(name)}.txt") for name in flows}
+
+
+def render_file(path: str, out_dir: Optional[str] = None, lang: Optional[str] = None,
+                start_idx: Optional[int] = None, rel_dir: str = "", taken: Optional[set] = None) -> list:
+    """Gera os .txt de uma entrada. `taken` guarda as saídas já geradas na execução: duas
+    entradas que dariam no mesmo arquivo (ex.: a.rnproj e a.json na mesma pasta) viram erro."""
+    set_lang(lang or "pt")
+    if path.lower().endswith(SPEC_EXTS):
+        flows = _load_csv(path, start_idx)
+    else:
+        flows = _load_json(path, start_idx, lang)
+
+    outputs = _output_paths(path, flows, out_dir, rel_dir)
+    if taken is not None:
+        clash = [p for p in outputs.values() if os.path.normcase(os.path.abspath(p)) in taken]
+        if clash:
+            raise InputError(f"saída já gerada por outra entrada: {clash[0]}")
+        taken.update(os.path.normcase(os.path.abspath(p)) for p in outputs.values())
+    if rel_dir and out_dir:
+        os.makedirs(os.path.join(out_dir, rel_dir), exist_ok=True)
+
+    written = []
+    for name, out_path in outputs.items():
+        txt = "\n\n".join(flows[name]).strip()
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(txt)
+        written.append(out_path)
+    return written
+
+
+def validate_file(path: str) -> list:
+    """Erros de um arquivo de entrada (lista vazia = válido). Projetos passam pela migração e pela
+    validação completas; regras em JSON/CSV são lidas e renderizadas como no modo em lote."""
+    try:
+        if path.lower().endswith(SPEC_EXTS):
+            _load_csv(path, None)
+            return []
+        data = load_project(path)
+        if isinstance(data, dict) and not isinstance(data.get("rules"), list):
+            check_project(data)
+        else:
+            _load_json(path, None)
+    except ProjectError as e:
+        return e.errors
+    except (InputError, OSError, UnicodeDecodeError, ValueError, KeyError) as e:
+        return [str(e)]
+    return []
+
+
+def _validate_all(inputs: list, jobs: int, quiet: bool) -> int:
+    if jobs > 1 and len(inputs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = zip(inputs, pool.map(validate_file, inputs, chunksize=16))
+            return _report_validation(results, len(inputs), quiet)
+    return _report_validation(((p, validate_file(p)) for p in inputs), len(inputs), quiet)
+
+
+def _report_validation(results, total: int, quiet: bool) -> int:
+    failed = 0
+    for path, errors in results:
+        if errors:
+            failed += 1
+            for err in errors:
+                print(f"{path}: {err}", file=sys.stderr)
+        elif not quiet:
+            print(f"{path}: ok")
+    if failed:
+        print(f"{failed} de {total} arquivo(s) inválido(s).", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="rn_cli",
+        description="Gera os .txt de RNs a partir de projetos .rnproj ou de regras em JSON/CSV, sem abrir janela.",
+    )
+    parser.add_argument("paths", nargs="+", help="arquivos .rnproj/.rnpz/.json/.csv, projetos em pasta (.rnprojd) ou diretórios")
+    parser.add_argument("-o", "--out-dir", help="diretório de saída (padrão: ao lado de cada arquivo)")
+    parser.add_argument("--lang", choices=["pt", "es"], help="idioma das regras (padrão: o do projeto)")
+    parser.add_argument("--start-idx", type=int, help="numeração inicial das RNs (padrão: a do projeto ou 1)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="não lista os arquivos gerados")
+    parser.add_argument("--validate", action="store_true", help="só valida as entradas (migração + esquema), sem gerar arquivos")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="processos em paralelo na validação (padrão: 1)")
+    args = parser.parse_args(argv)
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    inputs = list(_iter_inputs(args.paths))
+    if not inputs:
+        print("Nenhum arquivo de entrada encontrado.", file=sys.stderr)
+        return 2
+    if args.validate:
+        return _validate_all([p for p, _rel in inputs], max(1, args.jobs), args.quiet)
+
+    failed = 0
+    taken: set = set()
+    for path, rel_dir in inputs:
+        try:
+            written = render_file(path, args.out_dir, args.lang, args.start_idx, rel_dir, taken)
+        except (InputError, OSError, ValueError) as e:
+            failed += 1
+            print(f"{path}: {e}", file=sys.stderr)
+            continue
+        if not args.quiet:
+            for out_path in written:
+                print(out_path)
+
+    if failed:
+        print(f"{failed} de {len(inputs)} arquivo(s) com erro.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
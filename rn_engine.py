@@ -0,0 +1,381 @@
+import re
+from typing import Optional
+
+CUR_L, CUR_R = "“", "”"
+
+RESP_DEFAULTS = ["Escritório Externo", "Jurídico Interno", "Solicitante"]
+RESP_TEXT_FREE = "Texto livre…"
+SLA_TIPOS   = ["Dias úteis (fixo)", "Dias corridos (fixo)", "D- (antes do Marco)", "D+ (Apos o Marco)"]
+GATILHOS    = [
+    "Sempre que inserido novo OBJETO",
+    "Em TAREFA se CAMPO for RESPOSTA",
+    "Concluída TAREFA",
+    "Após EVENTO",
+]
+OPERADORES  = ["for", "for respondido como"]
+ACOES       = [
+    "Acionar Tarefa", "Atualizar Status", "Acionar Fluxo", "Retornar a Tarefa",
+    "Encerrar Fluxo (Parcial)", "Encerrar Fluxo (Total)", "Texto Livre",
+]
+
+_LANG = "pt"
+
+TR = {
+    "pt": {
+        "when_new_object": "Sempre que inserido novo {obj}",
+        "when_task_field_answer": "Na conclusão da tarefa {task}, se o campo {field} for respondido com {answer}",
+        "when_task_done": "Concluída a tarefa {task}",
+        "when_after_event": "Após {event}",
+        "action_task": "é acionada a tarefa {task}",
+        "action_resp": ", de responsabilidade do {resp}",
+        "action_flow": "deverá ser acionado o fluxo de {flow}",
+        "action_status": "o status é atualizado para {status}",
+        "action_return": "o fluxo retornará a fase {task}{restart}",
+        "restart_on": ", reiniciando seu SLA",
+        "restart_off": "",
+        "closing_partial": "o fluxo é encerrado parcialmente",
+        "closing_total": "o fluxo é encerrado totalmente",
+        "unit_working_singular": "dia útil",
+        "unit_working_plural": "dias úteis",
+        "unit_calendar_singular": "dia corrido",
+        "unit_calendar_plural": "dias corridos",
+        "holidays_suffix": ", e considerando feriados",
+        "sla_fixed_working": "com SLA de {n} {unit}, contados a partir de hoje{hol}",
+        "sla_fixed_calendar": "com SLA de {n} {unit}, contados a partir de hoje",
+        "sla_d_minus": "com SLA D-{n} em relação ao campo de data {marco}{hol}",
+        "sla_d_plus": "com SLA de {n} {unit} após a {marco}{hol}",
+        "and": " e ",
+        "or": " ou ",
+        "preview_placeholder": "Use os campos ao lado para montar a RN. Os textos serão exibidos aqui.",
+        "mem_hint": "Cole itens (um por linha) e clique em Importar para adicioná-los.",
+        "mem_saved_label": "Itens salvos",
+        "mem_import_label": "Importar vários itens",
+        "mem_none": "Nenhum item salvo ainda",
+        "mem_one": "1 item salvo",
+        "mem_many": "{n} itens salvos",
+        "mem_new_placeholder": "Novo item...",
+        "mem_add_button": "Adicionar",
+        "mem_resp_label": "Responsáveis padrão",
+        "mem_resp_import_label": "Importar responsáveis padrão",
+        "mem_resp_hint": "Cole responsáveis (um por linha) e clique em Importar para adicioná-los.",
+        "mem_resp_new_placeholder": "Novo responsável...",
+        "mem_resp_add_button": "Adicionar responsável",
+        "mem_resp_none": "Nenhum responsável salvo ainda",
+        "mem_resp_one": "1 responsável salvo",
+        "mem_resp_many": "{n} responsáveis salvos",
+    },
+    "es": {
+        "when_new_object": "Siempre que se inserte un nuevo {obj}",
+        "when_task_field_answer": "En la conclusión de la tarea {task}, si el campo {field} se responde con {answer}",
+        "when_task_done": "Concluida la tarea {task}",
+        "when_after_event": "Después de {event}",
+        "action_task": "se activa la tarea {task}",
+        "action_resp": ", a cargo de {resp}",
+        "action_flow": "deberá activarse el flujo de {flow}",
+        "action_status": "el estado se actualiza a {status}",
+        "action_return": "el flujo volverá a la fase {task}{restart}",
+        "restart_on": ", reiniciando su SLA",
+        "restart_off": "",
+        "closing_partial": "el flujo se cierra parcialmente",
+        "closing_total": "el flujo se cierra totalmente",
+        "unit_working_singular": "día hábil",
+        "unit_working_plural": "días hábiles",
+        "unit_calendar_singular": "día corrido",
+        "unit_calendar_plural": "días corridos",
+        "holidays_suffix": ", y considerando feriados",
+        "sla_fixed_working": "con SLA de {n} {unit}, contados a partir de hoy{hol}",
+        "sla_fixed_calendar": "con SLA de {n} {unit}, contados a partir de hoy",
+        "sla_d_minus": "con SLA D-{n} con respecto al campo de fecha {marco}{hol}",
+        "sla_d_plus": "con SLA de {n} {unit} después de {marco}{hol}",
+        "and": " y ",
+        "or": " o ",
+        "preview_placeholder": "Utiliza los campos de la izquierda para construir la RN. El texto aparecerá aquí.",
+        "mem_hint": "Pega los ítems (uno por línea) y haz clic en Importar para agregarlos.",
+        "mem_saved_label": "Ítems guardados",
+        "mem_import_label": "Importar varios ítems",
+        "mem_none": "Ningún ítem guardado todavía",
+        "mem_one": "1 ítem guardado",
+        "mem_many": "{n} ítems guardados",
+        "mem_new_placeholder": "Nuevo ítem...",
+        "mem_add_button": "Agregar",
+        "mem_resp_label": "Responsables predeterminados",
+        "mem_resp_import_label": "Importar responsables predeterminados",
+        "mem_resp_hint": "Pega responsables (uno por línea) y haz clic en Importar para agregarlos.",
+        "mem_resp_new_placeholder": "Nuevo responsable...",
+        "mem_resp_add_button": "Agregar responsable",
+        "mem_resp_none": "Ningún responsable guardado todavía",
+        "mem_resp_one": "1 responsable guardado",
+        "mem_resp_many": "{n} responsables guardados",
+    },
+}
+
+OPS_ES = {
+    "for": "es",
+    "for respondido como": "fue respondido con",
+}
+
+def set_lang(lang: str):
+    global _LANG
+    _LANG = "es" if str(lang).lower().startswith("es") else "pt"
+
+def get_lang() -> str:
+    return _LANG
+
+def _t(key: str) -> str:
+    pack = TR.get(get_lang(), TR["pt"])
+    return pack.get(key, TR["pt"].get(key, key))
+
+def _plural_unit(kind: str, n: int) -> str:
+    if kind == "working":
+        return _t("unit_working_singular") if n == 1 else _t("unit_working_plural")
+    else:
+        return _t("unit_calendar_singular") if n == 1 else _t("unit_calendar_plural")
+
+def _render_sla(tipo: str, dias: int, marco: str, feriados: bool) -> str:
+    try:
+        dias = int(dias)
+    except (ValueError, TypeError):
+        dias = 0
+        
+    hol = _t("holidays_suffix") if feriados else ""
+    if tipo.startswith("Dias úteis"):
+        unit = _plural_unit("working", dias)
+        return _t("sla_fixed_working").format(n=dias, unit=unit, hol=hol)
+    if tipo.startswith("Dias corridos"):
+        unit = _plural_unit("calendar", dias)
+        return _t("sla_fixed_calendar").format(n=dias, unit=unit)
+    if tipo.startswith("D- "):
+        return _t("sla_d_minus").format(n=dias, marco=f"{CUR_L}{marco}{CUR_R}", hol=hol)
+    if tipo.startswith("D+ "):
+        unit = _plural_unit("working", dias)
+        return _t("sla_d_plus").format(n=dias, unit=unit, marco=f"{CUR_L}{marco}{CUR_R}", hol=hol)
+    return ""
+
+def _join_conditions(conds, conj_flag: str) -> str:
+    if not conds:
+        return ""
+    connector = _t("and") if conj_flag == "E" else _t("or")
+    return connector.join(conds)
+
+def _cond_to_text(campo: str, op: str, valor: str) -> str:
+    lang = get_lang()
+    cq = f"{CUR_L}{campo}{CUR_R}" if campo else ""
+
+    if lang == "es":
+        verbo = OPS_ES.get(op, op)
+        return f"el campo {cq} {verbo} {CUR_L}{valor}{CUR_R}"
+    
+    return f"o campo {cq} {op} {CUR_L}{valor}{CUR_R}"
+
+def _acao_tarefa_texto(tarefa: str, responsavel: str, sla_txt: str) -> str:
+    base = _t("action_task").format(task=f"{CUR_L}{tarefa}{CUR_R}")
+    if responsavel:
+        base += _t("action_resp").format(resp=responsavel)
+    if sla_txt:
+        base += f", {sla_txt}"
+    return base
+
+def _acao_status_texto(status: str) -> str:
+    return _t("action_status").format(status=f"{CUR_L}{status}{CUR_R}")
+
+def _acao_fluxo_texto(fluxo: str) -> str:
+    return _t("action_flow").format(flow=f"{CUR_L}{fluxo}{CUR_R}")
+
+def _acao_retornar_texto(tarefa: str, reiniciar: bool) -> str:
+    restart = _t("restart_on") if reiniciar else _t("restart_off")
+    return _t("action_return").format(task=f"{CUR_L}{tarefa}{CUR_R}", restart=restart)
+
+def _acao_encerramento(parcial: bool) -> str:
+    return _t("closing_partial") if parcial else _t("closing_total")
+
+def _compose_rn(idx: int, when: str, cond: str, acoes: str) -> str:
+    linha = f"RN{idx}: {when}"
+    if cond:
+        link = "e " if (" se " in when or " Se " in when) else "se "
+        linha += f", {link}{cond}"
+    linha += f", {acoes}." if acoes else "."
+    return linha
+
+# --- Renderização a partir de dados estruturados (mesmos dicts de to_dict) ---
+
+def _when_to_text(g: dict) -> str:
+    t = g.get("tipo", GATILHOS[1])
+
+    if t == GATILHOS[0]:
+        obj = (g.get("obj") or "").strip()
+        if not obj:
+            return ""
+        return _t("when_new_object").format(obj=f"{CUR_L}{obj}{CUR_R}")
+
+    if t == GATILHOS[1]:
+        task = (g.get("tarefa") or "").strip()
+        field = (g.get("campo") or "").strip()
+        answer = (g.get("resposta") or "").strip()
+        if not (task and field and answer):
+            return ""
+        return _t("when_task_field_answer").format(
+            task=f"{CUR_L}{task}{CUR_R}",
+            field=f"{CUR_L}{field}{CUR_R}",
+            answer=f"{CUR_L}{answer}{CUR_R}"
+        )
+
+    if t == GATILHOS[2]:
+        done = (g.get("tarefa_done") or "").strip()
+        if not done:
+            return ""
+        return _t("when_task_done").format(task=f"{CUR_L}{done}{CUR_R}")
+
+    event = (g.get("evento") or "").strip()
+    if not event:
+        return ""
+    return _t("when_after_event").format(event=f"{CUR_L}{event}{CUR_R}")
+
+def _cond_dict_to_text(d: dict) -> str:
+    c = (d.get("campo") or "").strip()
+    o = d.get("op", OPERADORES[0])
+    v = (d.get("valor") or "").strip()
+    if not c or not v:
+        return ""
+    return _cond_to_text(c, o, v)
+
+def _acao_dict_to_text(d: dict) -> str:
+    t = d.get("tipo", "Acionar Tarefa")
+    if t == "Acionar Tarefa":
+        tarefa = (d.get("tarefa") or "").strip()
+        if not tarefa:
+            return ""
+        resp = d.get("resp", "")
+        if resp == RESP_TEXT_FREE:
+            resp = (d.get("resp_livre") or "").strip()
+        sla = _render_sla(d.get("sla_tipo", SLA_TIPOS[0]), d.get("sla_dias", d.get("dias", 2)),
+                          (d.get("sla_marco") or "").strip(), bool(d.get("sla_fer", True)))
+        return _acao_tarefa_texto(tarefa, resp, sla)
+    if t == "Atualizar Status":
+        st = (d.get("status") or "").strip()
+        return _acao_status_texto(st) if st else ""
+    if t == "Acionar Fluxo":
+        fx = (d.get("fluxo") or "").strip()
+        return _acao_fluxo_texto(fx) if fx else ""
+    if t == "Retornar a Tarefa":
+        return _acao_retornar_texto((d.get("ret_tarefa") or "").strip(), bool(d.get("ret_restart", True)))
+
+    if t == "Encerrar Fluxo (Parcial)":
+        return _acao_encerramento(parcial=True)
+    if t == "Encerrar Fluxo (Total)":
+        return _acao_encerramento(parcial=False)
+
+    return (d.get("texto") or "").strip()
+
+def _acoes_join(parts) -> str:
+    parts = [p for p in parts if p]
+    if not parts:
+        return ""
+    return "; e ".join(parts)
+
+def _compose_preview(when: str, cond: str, acoes: str) -> str:
+    preview = when or ""
+    if cond:
+        link = " e " if (" se " in when or " Se " in when) else ", se "
+        preview += (link if preview else "") + cond
+    if acoes:
+        preview += (", " if preview else "") + acoes
+    return preview + "." if preview else ""
+
+def render_rn(idx: int, spec: dict) -> str:
+    """Monta a RN completa a partir de {"gatilho", "conds", "conj", "acoes"}."""
+    when = _when_to_text(spec.get("gatilho") or {})
+    conds = [_cond_dict_to_text(c) for c in spec.get("conds") or []]
+    cond = _join_conditions([c for c in conds if c], spec.get("conj", "E"))
+    acoes = _acoes_join(_acao_dict_to_text(a) for a in spec.get("acoes") or [])
+    return _compose_rn(idx, when, cond, acoes)
+
+def render_rns(specs, start_idx: int = 1, lang: Optional[str] = None) -> list:
+    if lang is not None:
+        set_lang(lang)
+    return [render_rn(start_idx + i, spec) for i, spec in enumerate(specs)]
+
+
+# --- RN estruturada (gatilho, condições, conjunção, ações) com texto em cache ---
+
+_RN_PREFIX = re.compile(r"^\s*RN\d+:\s*")
+
+class RNRecord:
+    __slots__ = ("gatilho", "conds", "conj", "acoes", "texto", "numerada", "_cache")
+
+    def __init__(self, gatilho=None, conds=None, conj="E", acoes=None, texto=None, numerada=True):
+        self.gatilho = gatilho or {}
+        self.conds = list(conds or [])
+        self.conj = conj or "E"
+        self.acoes = list(acoes or [])
+        self.texto = texto          # texto livre (RN legada ou editada à mão), sem o prefixo "RNn:"
+        self.numerada = numerada
+        self._cache = None          # (idx, lang, texto renderizado)
+
+    @classmethod
+    def from_text(cls, text: str) -> "RNRecord":
+        text = (text or "").strip()
+        m = _RN_PREFIX.match(text)
+        if m:
+            return cls(texto=text[m.end():])
+        return cls(texto=text, numerada=False)
+
+    @classmethod
+    def from_dict(cls, d) -> "RNRecord":
+        if isinstance(d, str):
+            return cls.from_text(d)
+        return cls(
+            gatilho=d.get("gatilho"),
+            conds=d.get("conds"),
+            conj=d.get("conj", "E"),
+            acoes=d.get("acoes"),
+            texto=d.get("texto"),
+            numerada=bool(d.get("numerada", True)),
+        )
+
+    def to_dict(self) -> dict:
+        d = {}
+        if self.gatilho or self.acoes:
+            d.update(gatilho=self.gatilho, conds=self.conds, conj=self.conj, acoes=self.acoes)
+        if self.texto is not None:
+            d["texto"] = self.texto
+            if not self.numerada:
+                d["numerada"] = False
+        return d
+
+    def set_text(self, text: str):
+        other = RNRecord.from_text(text)
+        self.texto, self.numerada = other.texto, other.numerada
+        self._cache = None
+
+    def render(self, idx: int) -> str:
+        lang = get_lang()
+        cache = self._cache
+        if cache is not None and cache[0] == idx and cache[1] == lang:
+            return cache[2]
+        if self.texto is not None:
+            text = f"RN{idx}: {self.texto}" if self.numerada else self.texto
+        else:
+            text = render_rn(idx, {"gatilho": self.gatilho, "conds": self.conds, "conj": self.conj, "acoes": self.acoes})
+        self._cache = (idx, lang, text)
+        return text
+
+def render_flow(records, start_idx: int = 1) -> list:
+    return [r.render(start_idx + i) for i, r in enumerate(records)]
+
+def records_from_project(proj: dict) -> dict:
+    """Fluxos do projeto como RNRecord; usa "flow_records" quando bate com "flows"."""
+    flows_data = proj.get("flows")
+    if not (isinstance(flows_data, dict) and flows_data):
+        legacy = proj.get("rns", [])
+        flows_data = {"Fluxo Padrão": list(legacy) if isinstance(legacy, list) else []}
+    stored = proj.get("flow_records")
+    if not isinstance(stored, dict):
+        stored = {}
+    flows = {}
+    for name, texts in flows_data.items():
+        recs = stored.get(name)
+        if isinstance(recs, list) and len(recs) == len(texts):
+            flows[name] = [RNRecord.from_dict(r) for r in recs]
+        else:
+            flows[name] = [RNRecord.from_text(t) for t in texts]
+    return flows
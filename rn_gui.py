@@ -0,0 +1,3842 @@
+import sys, traceback, os, weakref, time
+from itertools import islice
+from typing import Optional
+import tkinter as tk
+from tkinter import messagebox, filedialog
+import customtkinter as ctk
+
+from rn_engine import (
+    CUR_L, CUR_R, RESP_DEFAULTS, RESP_TEXT_FREE, SLA_TIPOS, GATILHOS, OPERADORES, TR, OPS_ES,
+    set_lang, get_lang, _t, _plural_unit, _render_sla, _join_conditions, _cond_to_text,
+    _acao_tarefa_texto, _acao_status_texto, _acao_fluxo_texto, _acao_retornar_texto,
+    _acao_encerramento, _compose_rn, _when_to_text, _cond_dict_to_text, _acao_dict_to_text,
+    _acoes_join, _compose_preview, RNRecord, render_flow, records_from_project,
+)
+from rn_index import MemIndex, Typeahead, norm_item, item_key, open_import_source
+from rn_schema import ProjectError, normalize_acao
+from rn_history import UndoLog
+from rn_project import (
+    SaveWorker, Journal, journal_path_for, apply_entry, open_project_lazy, is_project_dir, project_dir_of,
+    PROJECT_DIR_EXT, MANIFEST_NAME, COMPACT_EXT,
+)
+
+
+def _enable_dpi_awareness():
+    try:
+        import ctypes
+        # Nível 2 = Per Monitor Aware (Corrige bug de transparência no monitor externo)
+        ctypes.windll.shcore.SetProcessDpiAwareness(2)
+    except Exception:
+        try:
+            import ctypes
+            ctypes.windll.user32.SetProcessDPIAware()
+        except Exception:
+            pass
+
+
+def _apply_dark_title_bar(win):
+    """Força a barra de título do Windows a ficar escura."""
+    try:
+        import ctypes
+        win.update_idletasks()
+        hwnd = ctypes.windll.user32.GetParent(win.winfo_id())
+        # 20 = DWMWA_USE_IMMERSIVE_DARK_MODE
+        value = ctypes.c_int(1)
+        ctypes.windll.dwmapi.DwmSetWindowAttribute(hwnd, 20, ctypes.byref(value), 4)
+    except Exception:
+        pass
+
+
+class SafeCTkTextbox(ctk.CTkTextbox):
+    _FORBIDDEN_TAG_OPTIONS = {"font", "ctk_font"}
+
+    def tag_config(self, tagName, **kwargs):  # noqa: N802 (Tkinter camelCase)
+        cleaned = {k: v for k, v in kwargs.items() if k not in self._FORBIDDEN_TAG_OPTIONS}
+        return super().tag_config(tagName, **cleaned)
+
+    def tag_configure(self, tagName, **kwargs):  # noqa: N802 (Tkinter camelCase)
+        cleaned = {k: v for k, v in kwargs.items() if k not in self._FORBIDDEN_TAG_OPTIONS}
+        return super().tag_configure(tagName, **cleaned)
+
+
+def _theme_color(widget: str, option: str, fallback):
+    try:
+        value = ctk.ThemeManager.theme[widget][option]
+        if isinstance(value, str):
+            return (value, value)
+        return value
+    except Exception:
+        return fallback
+
+
+def _mix_hex(color_a: str, color_b: str, factor: float) -> str:
+    try:
+        ca = color_a.lstrip("#")
+        cb = color_b.lstrip("#")
+        if len(ca) != 6 or len(cb) != 6:
+            raise ValueError
+        factor = max(0.0, min(1.0, float(factor)))
+        ra, ga, ba = (int(ca[i : i + 2], 16) for i in (0, 2, 4))
+        rb, gb, bb = (int(cb[i : i + 2], 16) for i in (0, 2, 4))
+        blend = lambda va, vb: int(round(va + (vb - va) * factor))
+        r = blend(ra, rb)
+        g = blend(ga, gb)
+        b = blend(ba, bb)
+        return f"#{r:02x}{g:02x}{b:02x}"
+    except Exception:
+        return color_a
+
+
+# --- PALETA ESTILO CÁPSULA (V6) ---
+# Fundo cinza escuro para os blocos (Cápsulas)
+CAPSULE_BG = ("#f0f0f0", "#2b2b2b")
+# Borda sutil para definir os blocos
+CAPSULE_BORDER = ("#dce4ee", "#454545")
+
+# Manter cores de ação
+DANGER_BG = ("#2e2e2e", "#ff6b6b")
+DANGER_HOVER = ("#c9585c", "#ff8080")
+PRIMARY_BTN = _theme_color("CTkButton", "fg_color", ("#3B8ED0", "#1F6AA5"))
+PRIMARY_HOVER = _theme_color("CTkButton", "hover_color", ("#36719F", "#144870"))
+BADGE_BG = PRIMARY_BTN
+BADGE_TEXT = ("#ffffff", "#ffffff")
+HINT_TEXT = ("gray60", "gray40")
+ACTION_BAR_TEXT = _theme_color("CTkLabel", "text_color", ("#f4f4f4", "#1a1a1a"))
+PANEL_BG = _theme_color("CTkFrame", "fg_color", ("#18181b", "#f4f4f5"))
+ACTION_BAR_BG = (_mix_hex(PANEL_BG[0], "#ffffff", 0.06), _mix_hex(PANEL_BG[1], "#000000", 0.05))
+ACTION_BAR_BORDER = (_mix_hex(ACTION_BAR_BG[0], "#ffffff", 0.18), _mix_hex(ACTION_BAR_BG[1], "#000000", 0.14))
+COMBO_BORDER = _theme_color("CTkEntry", "border_color", ("gray45", "#b5b5c8"))
+INPUT_BG = (_mix_hex(PANEL_BG[0], "#000000", 0.2), _mix_hex(PANEL_BG[1], "#ffffff", 0.4))
+
+
+def _center_window(win, width=None, height=None, parent=None):
+    try:
+        win.update_idletasks()
+        w = width or win.winfo_reqwidth()
+        h = height or win.winfo_reqheight()
+
+        if parent:
+            x = parent.winfo_rootx() + (parent.winfo_width() // 2) - (w // 2)
+            y = parent.winfo_rooty() + (parent.winfo_height() // 2) - (h // 2)
+        else:
+            ws = win.winfo_screenwidth()
+            hs = win.winfo_screenheight()
+            x = (ws // 2) - (w // 2)
+            y = (hs // 2) - (h // 2)
+
+        x = max(0, x)
+        y = max(0, y)
+
+        win.geometry(f"{w}x{h}+{x}+{y}")
+
+        # --- CORREÇÃO APLICADA AQUI ---
+        # Força a barra escura após o posicionamento final
+        _apply_dark_title_bar(win)
+        # ------------------------------
+    except Exception:
+        pass
+
+def _show_fatal_error(exc: BaseException):
+    tb = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+    try:
+        log_path = os.path.join(os.path.dirname(__file__), "rn_error.log")
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write(tb)
+    except Exception:
+        pass
+    try:
+        _r = tk.Tk(); _r.withdraw()
+        messagebox.showerror("Erro inesperado", tb)
+        _r.destroy()
+    except Exception:
+        print(tb, file=sys.stderr)
+
+
+_GUI_CONFIGURED = False
+
+
+def _configure_gui():
+    """Efeitos globais da interface (DPI, tema, excepthook); aplicados ao criar o RNBuilder."""
+    global _GUI_CONFIGURED
+    if _GUI_CONFIGURED:
+        return
+    _GUI_CONFIGURED = True
+    _enable_dpi_awareness()
+    sys.excepthook = lambda et, ev, tb: _show_fatal_error(ev)
+    ctk.set_appearance_mode("system")
+    ctk.set_default_color_theme("blue")
+
+
+class CollapsibleGroup(ctk.CTkFrame):
+    def __init__(self, master, text="Grupo", start_expanded=True, build=None, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.grid_columnconfigure(0, weight=1)
+        self._expanded = start_expanded
+        self._text = text
+        # build(inner): conteúdo montado só quando o grupo aparece expandido pela primeira vez
+        self._build = build
+
+        self.title_frame = ctk.CTkFrame(self)
+        self.title_frame.grid(row=0, column=0, sticky="ew")
+        self.title_frame.grid_columnconfigure(0, weight=1)
+        
+        self.title_label = ctk.CTkLabel(self.title_frame, text=self._get_title_text(), font=ctk.CTkFont(weight="bold"))
+        self.title_label.grid(row=0, column=0, sticky="w", padx=8, pady=8)
+
+        self.inner = ctk.CTkFrame(self, fg_color="transparent")
+        self.inner.grid_columnconfigure(0, weight=1)
+
+        self.title_frame.bind("<Button-1>", self._toggle)
+        self.title_label.bind("<Button-1>", self._toggle)
+        if build is not None:
+            tk.Misc.bind(self, "<Map>", self._on_map, add="+")
+        
+        self._update_visibility()
+
+    def _get_title_text(self):
+        return f"v  {self._text}" if self._expanded else f">  {self._text}"
+
+    def _toggle(self, event=None):
+        self._expanded = not self._expanded
+        self._update_visibility()
+        if self._expanded:
+            self.ensure_built()
+
+    def _on_map(self, event=None):
+        if self._expanded and self._build is not None:
+            # Deixa o esqueleto ser desenhado antes de montar o conteúdo
+            self.after_idle(self.ensure_built)
+
+    def ensure_built(self):
+        build, self._build = self._build, None
+        if build is not None:
+            build(self.inner)
+
+    def _update_visibility(self):
+        self.title_label.configure(text=self._get_title_text())
+        if self._expanded:
+            self.inner.grid(row=1, column=0, sticky="nsew", padx=6, pady=6)
+        else:
+            self.inner.grid_forget()
+
+    def get_inner_frame(self):
+        return self.inner
+
+def scrollable_body(widget: ctk.CTkScrollableFrame):
+    return getattr(widget, "scrollable_frame", getattr(widget, "_scrollable_frame", widget))
+
+RN_SEP = "\n\n"
+ROW_POOL_MAX = 32
+# Tempo máximo de uma fatia do filtro das listas de memória (mantém a janela responsiva)
+FILTER_SLICE_MS = 8
+# Itens lidos por lote na importação de listas (entre um lote e outro o Tk volta a processar eventos)
+IMPORT_BATCH = 500
+# Teto de chaves conferidas de uma vez pelo filtro via trigramas; acima disso ele varre em fatias
+FILTER_INDEX_CAP = 2000
+ACAO_PANEL_TIPOS = ("Acionar Tarefa", "Atualizar Status", "Acionar Fluxo", "Retornar a Tarefa")
+
+def _tk_len(s: str) -> int:
+    # Tk 8.6 conta caracteres fora do BMP como dois (UTF-16)
+    return len(s.encode("utf-16-le")) // 2
+
+class IntSpin(ctk.CTkFrame):
+    def __init__(self, master, from_=0, to=365, width=90, variable=None, on_change=None):
+        super().__init__(master)
+        self.min = from_; self.max = to
+        self.on_change = on_change
+        self.var = variable or tk.IntVar(value=0)
+        ctk.CTkButton(self, text="−", width=28, command=self._dec).grid(row=0, column=0, padx=(0,2))
+        self.entry = ctk.CTkEntry(self, width=width-56)
+        self.entry.grid(row=0, column=1)
+        ctk.CTkButton(self, text="+", width=28, command=self._inc).grid(row=0, column=2, padx=(2,0))
+        self.entry.insert(0, str(self.var.get()))
+        self.entry.bind("<FocusOut>", self._sync_from_entry)
+        self.entry.bind("<Return>", self._sync_from_entry)
+
+    def _clamp(self, v):
+        return max(self.min, min(self.max, v))
+
+    def _notify(self):
+        if callable(self.on_change):
+            self.on_change()
+
+    def refresh_entry(self):
+        try:
+            value = str(self.var.get())
+        except Exception:
+            return
+        if self.entry.get() != value:
+            self.entry.delete(0, "end"); self.entry.insert(0, value)
+
+    def _sync_from_entry(self, *_):
+        try:
+            v = int(self.entry.get().strip())
+        except Exception:
+            v = self.var.get()
+        v = self._clamp(v)
+        if v != self.var.get():
+            self.var.set(v)
+        self.entry.delete(0, "end"); self.entry.insert(0, str(v))
+        self._notify()
+
+    def _dec(self):
+        self.var.set(self._clamp(int(self.var.get()) - 1))
+        self.entry.delete(0, "end"); self.entry.insert(0, str(self.var.get()))
+        self._notify()
+
+    def _inc(self):
+        self.var.set(self._clamp(int(self.var.get()) + 1))
+        self.entry.delete(0, "end"); self.entry.insert(0, str(self.var.get()))
+        self._notify()
+
+class VirtualList(ctk.CTkFrame):
+    """Lista com um pool fixo de linhas: só as linhas visíveis existem e são reaproveitadas na rolagem."""
+
+    def __init__(self, master, make_row, bind_row, row_height=36, wheel_step=3, **kwargs):
+        super().__init__(master, **kwargs)
+        self.make_row = make_row      # make_row(parent) -> linha nova (sem grid)
+        self.bind_row = bind_row      # bind_row(linha, índice) -> preenche a linha
+        self.row_height = row_height
+        self.wheel_step = wheel_step
+        self.count = 0
+        self.first = 0
+        self.pool = []
+        self._tag = f"VirtualList{id(self)}"
+
+        self.grid_propagate(False)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.body.grid_propagate(False)
+        self.body.grid_columnconfigure(0, weight=1)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scroll)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.body.bind("<Configure>", lambda e: self._render(), add=True)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind_class(self._tag, seq, self._on_wheel)
+        self._add_tag(self.body)
+
+    def _add_tag(self, widget):
+        widget.bindtags((self._tag,) + tuple(widget.bindtags()))
+        for child in widget.winfo_children():
+            self._add_tag(child)
+
+    def _visible_rows(self) -> int:
+        height = self.body.winfo_height()
+        if height <= 1:
+            height = self.body.winfo_reqheight()
+        return max(1, height // max(self.row_height, 1) + 1)
+
+    def _on_wheel(self, event):
+        delta = getattr(event, "delta", 0)
+        if delta == 0 and getattr(event, "num", None) in (4, 5):
+            delta = 120 if event.num == 4 else -120
+        self.scroll_to(self.first + (-self.wheel_step if delta > 0 else self.wheel_step))
+        return "break"
+
+    def _on_scroll(self, *args):
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.count))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                step *= max(self._visible_rows() - 1, 1)
+            self.scroll_to(self.first + step)
+
+    def scroll_to(self, first: int):
+        last_first = max(0, self.count - self._visible_rows() + 1)
+        first = max(0, min(int(first), last_first))
+        if first != self.first:
+            self.first = first
+            self._render()
+
+    def see(self, index: int):
+        visible = self._visible_rows() - 1
+        if index < self.first:
+            self.scroll_to(index)
+        elif index >= self.first + visible:
+            self.scroll_to(index - visible + 1)
+
+    def set_count(self, count: int):
+        self.count = max(0, int(count))
+        self.first = max(0, min(self.first, max(0, self.count - self._visible_rows() + 1)))
+        self._render()
+
+    def refresh(self):
+        self._render()
+
+    def refresh_index(self, index: int):
+        k = index - self.first
+        if 0 <= k < len(self.pool) and index < self.count:
+            self.bind_row(self.pool[k], index)
+
+    # Alterações pontuais: só re-renderizam quando a linha afetada está na janela visível
+    def row_inserted(self, index: int):
+        self.count += 1
+        if index < self.first + self._visible_rows():
+            self._render()
+        else:
+            self._update_scrollbar(min(self._visible_rows(), self.count))
+
+    def row_updated(self, index: int):
+        self.refresh_index(index)
+
+    def row_deleted(self, index: int):
+        self.count = max(0, self.count - 1)
+        self.first = max(0, min(self.first, max(0, self.count - self._visible_rows() + 1)))
+        self._render()
+
+    def _update_scrollbar(self, visible: int):
+        if self.count:
+            self.scrollbar.set(self.first / self.count, min(1.0, (self.first + visible) / self.count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _render(self):
+        visible = min(self._visible_rows(), self.count)
+        while len(self.pool) < visible:
+            row = self.make_row(self.body)
+            self._add_tag(row)
+            self.pool.append(row)
+            if len(self.pool) == 1:
+                row.update_idletasks()
+                self.row_height = max(row.winfo_reqheight() + 4, 1)
+                visible = min(self._visible_rows(), self.count)
+        for k, row in enumerate(self.pool):
+            idx = self.first + k
+            if k < visible and idx < self.count:
+                self.bind_row(row, idx)
+                row.grid(row=k, column=0, sticky="we", padx=4, pady=2)
+            else:
+                row.grid_remove()
+        self._update_scrollbar(visible)
+
+class MemManagerTab(ctk.CTkFrame):
+    def __init__(self, master, title, mem_list, refresh_cb, **kwargs):
+        super().__init__(master, fg_color="transparent")
+        self.app = master.winfo_toplevel()
+        self.mem_list = mem_list
+        self.refresh_cb = refresh_cb
+        # Índice próprio só quando o app não entrega um compartilhado; é desligado em destroy()
+        self._own_index = kwargs.get("index") is None
+        self.index = Typeahead(mem_list) if self._own_index else kwargs["index"]
+        # Filtro: _view guarda as posições em mem_list que aparecem (None = sem filtro)
+        self._view = None
+        self._filter_q = ""
+        self._filter_done = True
+        self._filter_job = None
+        self._index_job = None if self.index.ready else self.after(100, self._build_index_step)
+        self._import_job = None
+        self._import_source = None
+        self._import_listener = None
+        self._seen_version = None
+
+        hint_text = kwargs.get("hint_text", _t("mem_hint"))
+        import_label = kwargs.get("import_label", _t("mem_import_label"))
+        list_label = kwargs.get("list_label", _t("mem_saved_label"))
+        placeholder = kwargs.get("placeholder", _t("mem_new_placeholder"))
+        add_button_text = kwargs.get("add_button_text", _t("mem_add_button"))
+        self.forbidden = {item_key(v) for v in kwargs.get("forbidden_values", []) if item_key(v)}
+        layout = kwargs.get("layout", "vertical").lower()
+
+        side_by_side = layout in {"horizontal", "side", "two-column", "grid"}
+
+        self.grid_columnconfigure(0, weight=1, uniform="mem")
+        if side_by_side:
+            self.grid_columnconfigure(1, weight=1, uniform="mem")
+            self.grid_rowconfigure(1, weight=1)
+        else:
+            self.grid_rowconfigure(2, weight=1)
+
+        # --- 1. HEADER CÁPSULA ---
+        header_cols = 2 if side_by_side else 1
+        header = ctk.CTkFrame(self, corner_radius=8, fg_color=CAPSULE_BG, border_width=1, border_color=CAPSULE_BORDER)
+        header.grid(row=0, column=0, columnspan=header_cols, sticky="ew", pady=(0, 12))
+        header.grid_columnconfigure(0, weight=1)
+
+        ctk.CTkLabel(
+            header,
+            text=title,
+            font=ctk.CTkFont(size=16, weight="bold"),
+        ).grid(row=0, column=0, sticky="w", padx=16, pady=(16, 12))
+
+        self.count_var = tk.StringVar(value="")
+        ctk.CTkLabel(header, textvariable=self.count_var, font=ctk.CTkFont(size=12), text_color=("gray50", "gray70")).grid(row=0, column=1, sticky="e", padx=12, pady=(10, 0))
+
+        if hint_text and not side_by_side:
+            ctk.CTkLabel(header, text=hint_text, justify="left", wraplength=480, text_color=HINT_TEXT).grid(row=1, column=0, columnspan=2, sticky="w", padx=12, pady=(6, 10))
+
+        # --- 2. IMPORT CARD CÁPSULA ---
+        import_card = ctk.CTkFrame(self, corner_radius=8, fg_color=CAPSULE_BG, border_width=1, border_color=CAPSULE_BORDER)
+        if side_by_side:
+            import_card.grid(row=1, column=0, sticky="nsew", padx=(0, 8), pady=(0, 12))
+        else:
+            import_card.grid(row=1, column=0, sticky="ew", pady=(0, 12))
+        import_card.grid_columnconfigure(0, weight=1)
+        import_card.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(import_card, text=import_label, font=ctk.CTkFont(size=13, weight="bold")).grid(row=0, column=0, sticky="w", padx=12, pady=(12, 6))
+
+        box_h = 140 if side_by_side else 100
+        self.import_box = ctk.CTkTextbox(import_card, height=box_h)
+        self.import_box.grid(row=1, column=0, sticky="nsew", padx=12)
+
+        if hint_text and side_by_side:
+            ctk.CTkLabel(import_card, text=hint_text, justify="left", wraplength=300, text_color=HINT_TEXT, font=ctk.CTkFont(size=11)).grid(row=2, column=0, sticky="w", padx=12, pady=(6, 0))
+
+        import_bar = ctk.CTkFrame(import_card, fg_color="transparent")
+        import_bar.grid(row=3, column=0, sticky="ew", padx=12, pady=(10, 12))
+        import_bar.grid_columnconfigure(0, weight=1)
+        self.import_progress = ctk.CTkProgressBar(import_bar)
+        self.import_progress.set(0)
+        self.import_file_btn = ctk.CTkButton(import_bar, text="Importar arquivo...", width=140, command=self._import_file, fg_color=PRIMARY_BTN, hover_color=PRIMARY_HOVER)
+        self.import_file_btn.grid(row=0, column=1, sticky="e", padx=(8, 8))
+        self.import_btn = ctk.CTkButton(import_bar, text="Importar", width=120, command=self._import_items, fg_color=PRIMARY_BTN, hover_color=PRIMARY_HOVER)
+        self.import_btn.grid(row=0, column=2, sticky="e")
+
+        # --- 3. LISTA CÁPSULA ---
+        list_card = ctk.CTkFrame(self, corner_radius=8, fg_color=CAPSULE_BG, border_width=1, border_color=CAPSULE_BORDER)
+        if side_by_side:
+            list_card.grid(row=1, column=1, sticky="nsew", padx=(8, 0), pady=(0, 12))
+        else:
+            list_card.grid(row=2, column=0, sticky="nsew")
+        list_card.grid_columnconfigure(0, weight=1)
+        list_card.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(list_card, text=list_label, font=ctk.CTkFont(size=13, weight="bold")).grid(row=0, column=0, sticky="w", padx=12, pady=(12, 6))
+
+        self.filter_entry = ctk.CTkEntry(list_card, width=200, placeholder_text="Filtrar...")
+        self.filter_entry.grid(row=0, column=0, sticky="e", padx=12, pady=(12, 6))
+        self.filter_entry.bind("<KeyRelease>", self._on_filter_key)
+
+        # Só as linhas visíveis existem; inclusão, renomeação e remoção atualizam a linha afetada
+        self.list_view = VirtualList(
+            list_card,
+            make_row=self._make_row,
+            bind_row=self._bind_row,
+            fg_color="transparent",
+            height=240,
+        )
+        self.list_view.grid(row=1, column=0, sticky="nsew", padx=6, pady=0)
+
+        footer = ctk.CTkFrame(list_card, fg_color="transparent")
+        footer.grid(row=2, column=0, sticky="ew", padx=12, pady=(10, 12))
+        footer.grid_columnconfigure(0, weight=1)
+
+        self.new_entry = ctk.CTkEntry(footer, placeholder_text=placeholder)
+        self.new_entry.grid(row=0, column=0, sticky="ew", padx=(0, 8))
+        self.new_entry.bind("<Return>", self._add_item)
+        self.add_btn = ctk.CTkButton(footer, text=add_button_text, width=100, command=self._add_item, fg_color=PRIMARY_BTN, hover_color=PRIMARY_HOVER)
+        self.add_btn.grid(row=0, column=1, sticky="e")
+
+        self._rebuild_list()
+
+    def _norm(self, s):
+        return norm_item(s)
+
+    def _is_allowed(self, v):
+        key = item_key(v)
+        return key not in self.forbidden if key else False
+
+    def _add_item(self, e=None):
+        v = self._norm(self.new_entry.get())
+        if not v or len(v) < 3:
+            return
+        if not self._is_allowed(v):
+            return
+        i = self.mem_list.insert_sorted(v)
+        if i >= 0:
+            if self._view is None:
+                self.list_view.row_inserted(i)
+                self.list_view.see(i)
+            else:
+                self._refilter()
+            self._update_count()
+            self.refresh_cb()
+        self.new_entry.delete(0, "end")
+
+    def _import_items(self):
+        txt = self.import_box.get("1.0", "end").strip()
+        if not txt:
+            return
+        lines = txt.split("\n")
+        self.import_box.delete("1.0", "end")
+        self._start_import(iter(lines), total=len(lines))
+
+    def _import_file(self):
+        path = filedialog.askopenfilename(
+            parent=self,
+            title="Importar lista",
+            filetypes=[("Texto ou CSV", "*.txt *.csv"), ("Todos os arquivos", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            source, values = open_import_source(path)
+            size = max(os.path.getsize(path), 1)
+        except (OSError, LookupError) as e:
+            messagebox.showerror("Importar", f"Não foi possível abrir o arquivo:\n{e}")
+            return
+        self._import_source = source
+        self._start_import(values, progress=lambda: source.buffer.tell() / size)
+
+    # --- Importação em lotes: cada fatia lê IMPORT_BATCH itens até FILTER_SLICE_MS e devolve o controle ao Tk ---
+    def _start_import(self, values, total=None, progress=None):
+        if self._import_job is not None:
+            return
+        state = {"values": values, "seen": 0, "added": 0}
+        if progress is None:
+            progress = lambda: state["seen"] / max(total or 1, 1)
+        state["progress"] = progress
+        # Sem uma linha de diário por item: a lista inteira vai para o diário uma vez, no fim
+        self._import_listener, self.mem_list.listener = self.mem_list.listener, None
+        for btn in (self.import_btn, self.import_file_btn):
+            btn.configure(state="disabled")
+        self.import_progress.set(0)
+        self.import_progress.grid(row=0, column=0, sticky="ew")
+        self._import_job = self.after_idle(lambda: self._import_step(state))
+
+    def _import_step(self, state):
+        self._import_job = None
+        deadline = time.perf_counter() + FILTER_SLICE_MS / 1000
+        error = None
+        done = False
+        try:
+            while True:
+                batch = list(islice(state["values"], IMPORT_BATCH))
+                state["seen"] += len(batch)
+                # Sem aviso por item: os índices derivados são refeitos uma vez, no fim (_resume_journal)
+                vals = (self._norm(x) for x in batch)
+                state["added"] += self.mem_list.extend(
+                    (v for v in vals if len(v) >= 3 and self._is_allowed(v)), notify=False)
+                if len(batch) < IMPORT_BATCH:
+                    done = True
+                    break
+                if time.perf_counter() >= deadline:
+                    break
+        except Exception as e:
+            error = e
+            done = True
+        try:
+            self.import_progress.set(1.0 if done else min(1.0, state["progress"]()))
+        except Exception:
+            pass
+        self.count_var.set(f"Importando... {state['added']} novos")
+        if not done:
+            self._import_job = self.after(1, lambda: self._import_step(state))
+            return
+        self._finish_import(state["added"], error)
+
+    def _finish_import(self, added, error=None):
+        self._resume_journal(added)
+        self._close_import_source()
+        self.import_progress.grid_remove()
+        for btn in (self.import_btn, self.import_file_btn):
+            btn.configure(state="normal")
+        self._rebuild_list()
+        if self._view is not None:
+            self._refilter()
+        if added:
+            self.refresh_cb()
+        if error is not None:
+            messagebox.showerror("Importar", f"Importação interrompida ({added} itens incluídos):\n{error}")
+        elif added:
+            messagebox.showinfo("Importar", f"{added} itens.")
+
+    def _resume_journal(self, added):
+        listener, self._import_listener = self._import_listener, None
+        self.mem_list.listener = listener
+        if added:
+            self.mem_list.touch()
+            if listener is not None:
+                listener("reset", list(self.mem_list))
+
+    def _close_import_source(self):
+        if self._import_source is not None:
+            try:
+                self._import_source.close()
+            except Exception:
+                pass
+            self._import_source = None
+
+    def destroy(self):
+        if self._import_job is not None:
+            self._resume_journal(True)
+        for job in (self._filter_job, self._import_job, self._index_job):
+            if job is not None:
+                try:
+                    self.after_cancel(job)
+                except Exception:
+                    pass
+        self._filter_job = self._import_job = self._index_job = None
+        self._close_import_source()
+        if self._own_index:
+            self.index.close()
+        super().destroy()
+
+    def _remove_item(self, val):
+        if messagebox.askyesno("Remover", f"Excluir '{val}'?"):
+            try:
+                i = self.mem_list.index(val)
+            except ValueError:
+                return
+            self.mem_list.remove(val)
+            if self._view is None:
+                self.list_view.row_deleted(i)
+            else:
+                self._refilter()
+            self._update_count()
+            self.refresh_cb()
+
+    def _rename_item(self, old, new_val):
+        nv = self._norm(new_val)
+        if len(nv) < 3 or not self._is_allowed(nv):
+            return
+        if not self.mem_list.rename(old, nv):
+            return
+        i = self.mem_list.index(nv)
+        j = self.mem_list.reposition(nv)
+        if self._view is not None:
+            self._refilter()
+        elif i == j:
+            self.list_view.row_updated(i)
+        else:
+            self.list_view.refresh()
+            self.list_view.see(j)
+        self.refresh_cb()
+
+    def _update_count(self):
+        total = len(self.mem_list)
+        if self._view is not None:
+            self.count_var.set(f"{len(self._view)} de {total}")
+            return
+        self.count_var.set(f"{total} itens salvos" if total > 1 else f"{total} item salvo")
+
+    # --- Filtro incremental ---
+    def _on_filter_key(self, _=None):
+        if self._filter_job is not None:
+            try:
+                self.after_cancel(self._filter_job)
+            except Exception:
+                pass
+        self._filter_job = self.after_idle(self._run_filter)
+
+    def _refilter(self):
+        self._filter_q = ""
+        self._filter_done = False
+        self._run_filter()
+
+    def _run_filter(self):
+        self._filter_job = None
+        q = item_key(self.filter_entry.get())
+        prev_q, prev_view, prev_done = self._filter_q, self._view, self._filter_done
+        self._filter_q = q
+        if not q:
+            self._view = None
+            self._filter_done = True
+            self.list_view.set_count(len(self.mem_list))
+            self._update_count()
+            return
+        if prev_done and prev_q and prev_view is not None and q.startswith(prev_q):
+            # Texto só cresceu: basta estreitar o resultado anterior
+            source = prev_view
+        else:
+            found = None
+            if len(q) >= 3 and self.index.ready and self._import_job is None:
+                found = self.index.matching(q, cap=FILTER_INDEX_CAP)
+            if found is not None:
+                self._view = self.mem_list.positions(found)
+                self._filter_done = True
+                self.list_view.scroll_to(0)
+                self.list_view.set_count(len(self._view))
+                self._update_count()
+                return
+            # Texto curto, índice de trigramas em montagem ou trigramas comuns demais: varredura em fatias
+            source = range(len(self.mem_list))
+            if len(q) >= 3 and self._index_job is None:
+                self._build_index_step()
+        self._view = []
+        self._filter_done = False
+        self.list_view.scroll_to(0)
+        self._filter_scan(q, source, list(self.mem_list), 0)
+
+    def _build_index_step(self):
+        # Monta o índice de trigramas em fatias (as listas de tarefas/campos já são montadas pelo app)
+        self._index_job = None
+        if not self.index.prepare(FILTER_SLICE_MS / 1000):
+            self._index_job = self.after(1, self._build_index_step)
+
+    def _filter_scan(self, q, source, items, start):
+        self._filter_job = None
+        if q != self._filter_q:
+            return
+        deadline = time.perf_counter() + FILTER_SLICE_MS / 1000
+        view = self._view
+        i, n = start, len(source)
+        while i < n:
+            j = min(n, i + 512)
+            view.extend(k for k in source[i:j] if q in items[k].casefold())
+            i = j
+            if time.perf_counter() >= deadline:
+                break
+        self.list_view.set_count(len(view))
+        self._update_count()
+        if i < n:
+            self._filter_job = self.after(1, lambda: self._filter_scan(q, source, items, i))
+        else:
+            self._filter_done = True
+
+    def _rebuild_list(self):
+        self.mem_list.sort()
+        self._seen_version = self.mem_list.version
+        self._update_count()
+        self.list_view.set_count(len(self.mem_list))
+
+    def sync(self):
+        """Reapresenta a lista se ela mudou enquanto a aba estava escondida."""
+        if self._import_job is not None or self.mem_list.version == self._seen_version:
+            return
+        self._rebuild_list()
+        if self._view is not None:
+            self._refilter()
+
+    def _make_row(self, parent):
+        row = ctk.CTkFrame(parent, corner_radius=6, fg_color=CAPSULE_BG, border_width=1, border_color=CAPSULE_BORDER)
+        row.grid_columnconfigure(0, weight=1)
+        row.item = None
+
+        row.entry = ctk.CTkEntry(row, fg_color="transparent", border_width=0)
+        row.entry.grid(row=0, column=0, sticky="ew", padx=(8, 4), pady=6)
+        row.hl = ""
+        try:
+            # Permite destacar o trecho filtrado em várias linhas ao mesmo tempo
+            row.entry._entry.configure(exportselection=False)
+        except Exception:
+            pass
+        row.entry.bind("<Return>", lambda e, r=row: self._rename_item(r.item, r.entry.get()))
+
+        btn_box = ctk.CTkFrame(row, fg_color="transparent")
+        btn_box.grid(row=0, column=1, sticky="e", padx=(0, 8), pady=6)
+
+        ctk.CTkButton(btn_box, text="Renomear", width=70, height=24, font=ctk.CTkFont(size=11), command=lambda r=row: self._rename_item(r.item, r.entry.get()), fg_color=PRIMARY_BTN, hover_color=PRIMARY_HOVER).pack(side="left", padx=(0, 6))
+
+        ctk.CTkButton(btn_box, text="Remover", width=70, height=24, font=ctk.CTkFont(size=11), command=lambda r=row: self._remove_item(r.item), fg_color=DANGER_BG, hover_color=DANGER_HOVER).pack(side="left")
+        return row
+
+    def _bind_row(self, row, index: int):
+        if self._view is not None:
+            index = self._view[index]
+        item = self.mem_list[index]
+        q = self._filter_q if self._view is not None else ""
+        if row.item == item and row.entry.get() == item and row.hl == q:
+            return
+        row.item = item
+        row.hl = q
+        row.entry.delete(0, "end")
+        row.entry.insert(0, item)
+        try:
+            folded = item.casefold()
+            pos = folded.find(q) if q and len(folded) == len(item) else -1
+            if pos >= 0:
+                row.entry.select_range(pos, pos + len(q))
+            else:
+                row.entry.select_clear()
+        except Exception:
+            pass
+
+class TraceRegistry:
+    """Traces das variáveis Tk de uma linha: cada (variável, chave) é registrado uma única vez
+    e todos são removidos quando a linha é destruída."""
+
+    _live_traces = 0
+
+    def _trace(self, var, callback, key="on_change", mode="write"):
+        subs = self.__dict__.setdefault("_subscriptions", {})
+        k = (str(var), key, mode)
+        if k in subs:
+            return
+        subs[k] = (var, mode, var.trace_add(mode, callback))
+        TraceRegistry._live_traces += 1
+
+    def _untrace_all(self):
+        subs = self.__dict__.get("_subscriptions", {})
+        for var, mode, cbname in subs.values():
+            try:
+                var.trace_remove(mode, cbname)
+            except Exception:
+                pass
+        TraceRegistry._live_traces -= len(subs)
+        subs.clear()
+
+    def trace_count(self) -> int:
+        return len(self.__dict__.get("_subscriptions", {}))
+
+    @classmethod
+    def live_trace_count(cls) -> int:
+        return TraceRegistry._live_traces
+
+    def destroy(self):
+        self._untrace_all()
+        super().destroy()
+
+class ComboRegistry:
+    """Combos de memória por categoria ("task", "field", "resp"), guardados por referência fraca.
+
+    Widgets destruídos saem sozinhos do registro. `schedule` junta os pedidos de atualização
+    em uma passada por ciclo ocioso do Tk; combos que não estão visíveis ficam marcados e
+    recebem os valores quando aparecem, recebem foco ou o mouse passa sobre eles.
+    """
+
+    def __init__(self, owner, values_for):
+        self._owner = owner
+        self._values_for = values_for
+        self._combos: dict[str, weakref.WeakSet] = {}
+        self._stale: dict[str, weakref.WeakSet] = {}
+        self._pending: set = set()
+        self._job = None
+
+    def register(self, bucket: str, combo) -> bool:
+        combos = self._combos.setdefault(bucket, weakref.WeakSet())
+        if combo in combos:
+            return False
+        combos.add(combo)
+        ref = weakref.ref(combo)
+
+        def _on_show(_=None):
+            cb = ref()
+            if cb is not None:
+                self._apply_if_stale(bucket, cb)
+
+        try:
+            tk.Misc.bind(combo, "<Map>", _on_show, add="+")
+            tk.Misc.bind(combo, "<Enter>", _on_show, add="+")
+            combo._entry.bind("<FocusIn>", _on_show, add="+")
+        except Exception:
+            pass
+        return True
+
+    def count(self, bucket: str) -> int:
+        return len(self._combos.get(bucket, ()))
+
+    def schedule(self, *buckets):
+        self._pending.update(buckets)
+        if self._job is None:
+            try:
+                self._job = self._owner.after_idle(self.flush)
+            except Exception:
+                self._job = None
+                self.flush()
+
+    def flush(self):
+        self._job = None
+        pending, self._pending = self._pending, set()
+        for bucket in pending:
+            stale = self._stale.setdefault(bucket, weakref.WeakSet())
+            for cb in list(self._combos.get(bucket, ())):
+                try:
+                    if not cb.winfo_exists():
+                        self._combos[bucket].discard(cb)
+                        continue
+                    if not cb.winfo_viewable():
+                        stale.add(cb)
+                        continue
+                except Exception:
+                    self._combos[bucket].discard(cb)
+                    continue
+                stale.discard(cb)
+                self.apply(bucket, cb)
+
+    def apply(self, bucket: str, combo):
+        try:
+            combo.configure(values=self._values_for(bucket, combo))
+        except Exception:
+            self._combos.get(bucket, weakref.WeakSet()).discard(combo)
+
+    def _apply_if_stale(self, bucket: str, combo):
+        stale = self._stale.get(bucket)
+        if stale is not None and combo in stale:
+            stale.discard(combo)
+            self.apply(bucket, combo)
+
+class LinhaCondicao(TraceRegistry, ctk.CTkFrame):
+    def __init__(self, master, on_change, on_remove, on_release=None):
+        super().__init__(master)
+        self.on_change = on_change
+        self.on_remove = on_remove
+        self.on_release = on_release
+        self.var_campo = tk.StringVar()
+        self.var_op = tk.StringVar(value=OPERADORES[0])
+        self.var_valor = tk.StringVar()
+
+        self.grid_columnconfigure(0, weight=0, minsize=120)
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_columnconfigure(2, weight=0)
+
+        ctk.CTkLabel(self, text="Campo:").grid(row=0, column=0, sticky="e", padx=(4, 6), pady=(4, 2))
+        ctk.CTkEntry(self, textvariable=self.var_campo).grid(row=0, column=1, sticky="ew", padx=(0, 4), pady=(4, 2))
+
+        ctk.CTkLabel(self, text="Operador:").grid(row=1, column=0, sticky="e", padx=(4, 6), pady=(0, 2))
+        ctk.CTkComboBox(
+            self,
+            values=OPERADORES,
+            variable=self.var_op,
+            command=lambda *_: self.on_change(),
+        ).grid(row=1, column=1, sticky="ew", padx=(0, 4), pady=(0, 2))
+
+        ctk.CTkLabel(self, text="Valor / Resposta:").grid(row=2, column=0, sticky="e", padx=(4, 6), pady=(0, 2))
+        ctk.CTkEntry(self, textvariable=self.var_valor).grid(row=2, column=1, sticky="ew", padx=(0, 4), pady=(0, 4))
+
+        btn_frame = ctk.CTkFrame(self, fg_color="transparent")
+        btn_frame.grid(row=0, column=2, rowspan=3, sticky="ne", padx=(0, 4), pady=(4, 4))
+
+        app = self.winfo_toplevel()
+        ctk.CTkButton(
+            btn_frame,
+            text="↑",
+            width=28,
+            command=lambda: app._move_row(self, -1, app.cond_rows, app.frm_conds_body),
+        ).pack(pady=(0, 2))
+        ctk.CTkButton(
+            btn_frame,
+            text="↓",
+            width=28,
+            command=lambda: app._move_row(self, 1, app.cond_rows, app.frm_conds_body),
+        ).pack(pady=(0, 4))
+        ctk.CTkButton(btn_frame, text="Remover", command=self._remove, width=80).pack()
+
+        for v in (self.var_campo, self.var_op, self.var_valor):
+            self._trace(v, lambda *a: self.on_change())
+
+    def _remove(self):
+        try:
+            if callable(self.on_release):
+                self.on_release(self)
+            else:
+                self.destroy()
+        finally:
+            if callable(self.on_remove):
+                self.on_remove(self)
+            self.on_change()
+
+    def request_remove(self):
+        self._remove()
+
+    def reset(self):
+        self.var_campo.set("")
+        self.var_op.set(OPERADORES[0])
+        self.var_valor.set("")
+
+    def to_dict(self):
+        return {"campo": self.var_campo.get(), "op": self.var_op.get(), "valor": self.var_valor.get()}
+
+    def from_dict(self, d: dict):
+        self.var_campo.set(d.get("campo", ""))
+        self.var_op.set(d.get("op", OPERADORES[0]))
+        self.var_valor.set(d.get("valor", ""))
+
+    def to_text(self):
+        return _cond_dict_to_text(self.to_dict())
+
+class LinhaAcao(TraceRegistry, ctk.CTkFrame):
+    def __init__(self, master, on_change, on_remove, default_resp="Escritório Externo", default_resp_free="", row_list_key="acao_rows", on_release=None):
+        super().__init__(master)
+        self.on_change = on_change
+        self.on_remove = on_remove
+        self.on_release = on_release
+        self.row_list_key = row_list_key
+
+        self.var_tipo = tk.StringVar(value="Acionar Tarefa")
+
+        self.var_tarefa = tk.StringVar()
+
+        resp_initial, resp_free_initial = self._resp_initial(default_resp, default_resp_free)
+
+        self.var_resp = tk.StringVar(value=resp_initial)
+        self.var_resp_livre = tk.StringVar(value=resp_free_initial)
+        self.var_sla_tipo = tk.StringVar(value=SLA_TIPOS[0])
+        self.var_sla_dias = tk.IntVar(value=2)
+        self.var_sla_marco = tk.StringVar(value="Prazo Fatal da Peça")
+        self.var_sla_fer = tk.BooleanVar(value=True)
+        self.var_status = tk.StringVar()
+        self.var_fluxo = tk.StringVar()
+        self.var_texto = tk.StringVar()
+
+        self.var_ret_tarefa = tk.StringVar()
+        self.var_ret_restart = tk.BooleanVar(value=True)
+
+        self.grid_columnconfigure(0, weight=0, minsize=120)
+        self.grid_columnconfigure(1, weight=1)
+
+        self.tipo_bar = ctk.CTkFrame(
+            self,
+            fg_color=ACTION_BAR_BG,
+            border_color=ACTION_BAR_BORDER,
+            border_width=1,
+            corner_radius=10,
+        )
+        self.tipo_bar.grid(
+            row=0,
+            column=0,
+            columnspan=2,
+            sticky="ew",
+            padx=(6, 6),
+            pady=(6, 10),
+        )
+        self.tipo_bar.grid_columnconfigure(0, weight=0)
+        self.tipo_bar.grid_columnconfigure(1, weight=1)
+        self.tipo_bar.grid_columnconfigure(2, weight=0)
+        self.tipo_bar.grid_columnconfigure(3, weight=0)
+
+        label_font = ctk.CTkFont(size=12, weight="bold")
+        ctk.CTkLabel(
+            self.tipo_bar,
+            text="Tipo de ação",
+            font=label_font,
+            text_color=ACTION_BAR_TEXT,
+        ).grid(row=0, column=0, sticky="w", padx=(14, 10), pady=10)
+
+        self.cbo_tipo = ctk.CTkComboBox(
+            self.tipo_bar,
+            values=[
+                "Acionar Tarefa",
+                "Atualizar Status",
+                "Texto Livre",
+            ],
+            variable=self.var_tipo,
+            command=lambda *_: self._refresh(),
+            border_width=1,
+            border_color=COMBO_BORDER,
+        )
+        self.cbo_tipo.grid(row=0, column=1, sticky="ew", padx=(0, 12), pady=10)
+
+        arrow_row = ctk.CTkFrame(self.tipo_bar, fg_color="transparent")
+        arrow_row.grid(row=0, column=2, sticky="e", padx=(0, 4), pady=8)
+
+        app = self.winfo_toplevel()
+        row_list = getattr(app, self.row_list_key, [])
+        frame_parent = self.master
+
+        up_btn = ctk.CTkButton(
+            arrow_row,
+            text="↑",
+            width=28,
+            command=lambda: app._move_row(self, -1, row_list, frame_parent),
+        )
+        up_btn.grid(row=0, column=0, padx=(0, 6))
+
+        down_btn = ctk.CTkButton(
+            arrow_row,
+            text="↓",
+            width=28,
+            command=lambda: app._move_row(self, 1, row_list, frame_parent),
+        )
+        down_btn.grid(row=0, column=1)
+
+        ctk.CTkButton(
+            self.tipo_bar,
+            text="Remover",
+            command=self._remove,
+            width=90,
+        ).grid(row=0, column=3, sticky="e", padx=(6, 12), pady=8)
+
+        self.frm_dyn = ctk.CTkFrame(self, fg_color="transparent")
+        self.frm_dyn.grid(row=1, column=0, columnspan=2, sticky="ew", padx=(4, 4), pady=(0, 4))
+        self.frm_dyn.grid_columnconfigure(0, weight=0, minsize=110)
+        self.frm_dyn.grid_columnconfigure(1, weight=1)
+        self._panels = {}
+        self._panel_shown = None
+
+        for v in (
+            self.var_tarefa, self.var_resp, self.var_resp_livre, self.var_sla_tipo, self.var_sla_dias,
+            self.var_sla_marco, self.var_sla_fer, self.var_status, self.var_fluxo, self.var_texto,
+            self.var_ret_tarefa, self.var_ret_restart,
+        ):
+            self._trace(v, lambda *a: self.on_change())
+
+        self._refresh()
+
+    def _app(self):
+        return self.winfo_toplevel()
+
+    def _register_task_combo(self, combo, var_getter):
+        try:
+            self._app()._mem_register_task_combo(combo)
+            self._app()._mem_bind_combo_capture(combo, var_getter, bucket="task")
+        except Exception:
+            pass
+
+    def _register_field_combo(self, combo, var_getter):
+        try:
+            self._app()._mem_register_field_combo(combo)
+            self._app()._mem_bind_combo_capture(combo, var_getter, bucket="field")
+        except Exception:
+            pass
+
+    def _resp_options(self):
+        try:
+            return self._app()._resp_get_options()
+        except Exception:
+            base = sorted(RESP_DEFAULTS, key=str.lower)
+            if RESP_TEXT_FREE not in base:
+                base.append(RESP_TEXT_FREE)
+            return base
+
+    def _register_resp_combo(self, combo, var_getter, on_select=None):
+        try:
+            self._app()._resp_register_combo(combo)
+            self._app()._resp_bind_combo_capture(combo, var_getter, on_select=on_select)
+        except Exception:
+            pass
+
+    def _resp_initial(self, default_resp, default_resp_free):
+        resp_options = self._resp_options()
+        preset = (default_resp or "").strip()
+        if preset and preset not in resp_options and preset != RESP_TEXT_FREE:
+            try:
+                self._app()._resp_add(preset)
+                resp_options = self._resp_options()
+            except Exception:
+                pass
+
+        if preset and preset in resp_options and preset != RESP_TEXT_FREE:
+            return preset, (default_resp_free or "")
+        if preset == RESP_TEXT_FREE:
+            return RESP_TEXT_FREE, default_resp_free or ""
+        return RESP_TEXT_FREE, default_resp_free or (preset if preset else "")
+
+    def _remove(self):
+        try:
+            if callable(self.on_release):
+                self.on_release(self)
+            else:
+                self.destroy()
+        finally:
+            if callable(self.on_remove):
+                self.on_remove(self)
+            self.on_change()
+
+    def request_remove(self):
+        self._remove()
+
+    def reset(self, default_resp="Escritório Externo", default_resp_free=""):
+        resp, resp_free = self._resp_initial(default_resp, default_resp_free)
+        self.var_tipo.set("Acionar Tarefa")
+        self.var_tarefa.set("")
+        self.var_resp.set(resp)
+        self.var_resp_livre.set(resp_free)
+        self.var_sla_tipo.set(SLA_TIPOS[0])
+        self.var_sla_dias.set(2)
+        self.var_sla_marco.set("Prazo Fatal da Peça")
+        self.var_sla_fer.set(True)
+        self.var_status.set("")
+        self.var_fluxo.set("")
+        self.var_texto.set("")
+        self.var_ret_tarefa.set("")
+        self.var_ret_restart.set(True)
+        self._refresh()
+
+    def _panel_key(self, tipo: str):
+        if tipo.startswith("Encerrar Fluxo"):
+            return None
+        if tipo in ACAO_PANEL_TIPOS:
+            return tipo
+        return "Texto Livre"
+
+    def _refresh(self):
+        # Cada tipo de ação tem um sub-painel construído sob demanda; trocar de tipo só troca o grid
+        key = self._panel_key(self.var_tipo.get())
+
+        if key is None:
+            self.frm_dyn.grid_forget()
+        else:
+            self.frm_dyn.grid(row=1, column=0, columnspan=2, sticky="ew", padx=(4, 4), pady=(0, 4))
+
+        if key != self._panel_shown:
+            if self._panel_shown is not None:
+                self._panels[self._panel_shown].grid_remove()
+            if key is not None:
+                panel = self._panels.get(key)
+                if panel is None:
+                    panel = self._panels[key] = self._build_panel(key)
+                panel.grid(row=0, column=0, columnspan=2, sticky="ew")
+            self._panel_shown = key
+
+        if key == "Acionar Tarefa":
+            self.spin_sla.refresh_entry()
+            self._toggle_resp_free()
+            self._apply_sla_visibility()
+
+        self.on_change()
+
+    def _new_panel(self):
+        panel = ctk.CTkFrame(self.frm_dyn, fg_color="transparent")
+        panel.grid_columnconfigure(0, weight=0, minsize=110)
+        panel.grid_columnconfigure(1, weight=1)
+        return panel
+
+    def _build_panel(self, key: str):
+        panel = self._new_panel()
+
+        if key == "Acionar Tarefa":
+            ctk.CTkLabel(panel, text="Tarefa:").grid(row=0, column=0, sticky="e", pady=(0, 2), padx=(0, 6))
+            cb_tarefa = ctk.CTkComboBox(panel, values=self._app()._mem_suggest("task"), variable=self.var_tarefa)
+            cb_tarefa.grid(row=0, column=1, sticky="ew", pady=(0, 2))
+            self._register_task_combo(cb_tarefa, lambda: self.var_tarefa.get())
+
+            ctk.CTkLabel(panel, text="Responsável:").grid(row=1, column=0, sticky="e", pady=(2, 2), padx=(0, 6))
+            cb_resp = ctk.CTkComboBox(
+                panel,
+                values=self._resp_options(),
+                variable=self.var_resp,
+                border_width=1,
+                border_color=COMBO_BORDER,
+            )
+            cb_resp.grid(row=1, column=1, sticky="ew", pady=(2, 2))
+
+            self.entry_resp_livre = ctk.CTkEntry(
+                panel,
+                textvariable=self.var_resp_livre,
+                placeholder_text="Responsável (texto livre)",
+            )
+            self._register_resp_combo(cb_resp, lambda: self.var_resp.get(), on_select=self._toggle_resp_free)
+
+            ctk.CTkLabel(panel, text="Tipo de SLA:").grid(row=3, column=0, sticky="e", pady=(2, 2), padx=(0, 6))
+            cb_sla = ctk.CTkComboBox(panel, values=SLA_TIPOS, variable=self.var_sla_tipo,
+                                     command=lambda *_: self._apply_sla_visibility())
+            cb_sla.grid(row=3, column=1, sticky="ew", pady=(2, 2))
+
+            ctk.CTkLabel(panel, text="SLA:").grid(row=4, column=0, sticky="e", pady=(2, 2), padx=(0, 6))
+
+            sla_frame = ctk.CTkFrame(panel, fg_color="transparent")
+            sla_frame.grid(row=4, column=1, sticky="w")
+
+            self.spin_sla = IntSpin(
+                sla_frame,
+                from_=0,
+                to=365,
+                variable=self.var_sla_dias,
+                width=120,
+                on_change=self.on_change,
+            )
+            self.spin_sla.grid(row=0, column=0, sticky="w", pady=(2, 2))
+
+            self.chk_feriados = ctk.CTkCheckBox(
+                sla_frame,
+                text="Considerar feriados",
+                variable=self.var_sla_fer,
+                onvalue=True,
+                offvalue=False,
+                command=self.on_change,
+            )
+            self.chk_feriados.grid(row=0, column=1, sticky="w", pady=(2, 2), padx=(10, 0))
+
+            self.lbl_marco = ctk.CTkLabel(panel, text="Campo de Data:")
+            self.cb_marco = ctk.CTkComboBox(panel, values=self._app()._mem_suggest("field"), variable=self.var_sla_marco)
+            self._register_field_combo(self.cb_marco, lambda: self.var_sla_marco.get())
+
+        elif key == "Atualizar Status":
+            ctk.CTkLabel(panel, text="Status:").grid(row=0, column=0, sticky="e", pady=(0, 2), padx=(0, 6))
+            ctk.CTkEntry(panel, textvariable=self.var_status).grid(row=0, column=1, sticky="ew", pady=(0, 2))
+
+        elif key == "Acionar Fluxo":
+            ctk.CTkLabel(panel, text="Fluxo:").grid(row=0, column=0, sticky="e", pady=(0, 2), padx=(0, 6))
+            ctk.CTkEntry(panel, textvariable=self.var_fluxo).grid(row=0, column=1, sticky="ew", pady=(0, 2))
+
+        elif key == "Retornar a Tarefa":
+            ctk.CTkLabel(panel, text="Retornar a tarefa:").grid(row=0, column=0, sticky="e", pady=(0, 2), padx=(0, 6))
+            cb_ret = ctk.CTkComboBox(panel, values=self._app()._mem_suggest("task"), variable=self.var_ret_tarefa)
+            cb_ret.grid(row=0, column=1, sticky="ew", pady=(0, 2))
+            self._register_task_combo(cb_ret, lambda: self.var_ret_tarefa.get())
+            ctk.CTkCheckBox(
+                panel,
+                text="Reiniciar SLA",
+                variable=self.var_ret_restart,
+                onvalue=True,
+                offvalue=False,
+                command=self.on_change,
+            ).grid(row=1, column=1, sticky="w", pady=(2, 2))
+
+        else:
+            ctk.CTkLabel(panel, text="Texto:").grid(row=0, column=0, sticky="e", pady=(0, 2), padx=(0, 6))
+            ctk.CTkEntry(panel, textvariable=self.var_texto).grid(row=0, column=1, sticky="ew", pady=(0, 2))
+
+        return panel
+
+    def _toggle_resp_free(self, *_):
+        if self.var_resp.get() == RESP_TEXT_FREE:
+            self.entry_resp_livre.grid(row=2, column=1, sticky="ew", pady=(0, 2))
+        else:
+            self.var_resp_livre.set("")
+            self.entry_resp_livre.grid_remove()
+        self.on_change()
+
+    def _apply_sla_visibility(self, *_):
+        tt = self.var_sla_tipo.get()
+        is_corridos = (tt == "Dias corridos (fixo)")
+        needs_marco = tt in ("D- (antes do Marco)", "D+ (Apos o Marco)")
+        try:
+            self.chk_feriados.configure(state=("disabled" if is_corridos else "normal"))
+        except Exception:
+            pass
+        if needs_marco:
+            self.lbl_marco.grid(row=5, column=0, sticky="e", pady=(2, 2), padx=(0, 6))
+            self.cb_marco.grid(row=5, column=1, sticky="ew", pady=(2, 2))
+        else:
+            self.lbl_marco.grid_remove()
+            self.cb_marco.grid_remove()
+        self.on_change()
+
+    def to_dict(self) -> dict:
+        return {
+            "tipo": self.var_tipo.get(),
+            "tarefa": self.var_tarefa.get(),
+            "resp": self.var_resp.get(),
+            "resp_livre": self.var_resp_livre.get(),
+            "sla_tipo": self.var_sla_tipo.get(),
+            "sla_dias": int(self.var_sla_dias.get()),
+            "sla_marco": self.var_sla_marco.get(),
+            "sla_fer": bool(self.var_sla_fer.get()),
+            "status": self.var_status.get(),
+            "fluxo": self.var_fluxo.get(),
+            "texto": self.var_texto.get(),
+            "ret_tarefa": self.var_ret_tarefa.get(),
+            "ret_restart": bool(self.var_ret_restart.get()),
+        }
+
+    def from_dict(self, d: dict):
+        d = normalize_acao(d)
+        tipo = d.get("tipo", "Acionar Tarefa")
+
+        self.var_tipo.set(tipo); self._refresh()
+
+        self.var_tarefa.set(d.get("tarefa", ""))
+
+        resp_value = d.get("resp", RESP_DEFAULTS[0] if RESP_DEFAULTS else RESP_TEXT_FREE)
+        resp_free = d.get("resp_livre", "")
+        try:
+            if resp_value and resp_value not in ("", RESP_TEXT_FREE):
+                self._app()._resp_add(resp_value)
+        except Exception:
+            pass
+
+        if resp_value in self._resp_options():
+            self.var_resp.set(resp_value)
+            self.var_resp_livre.set(resp_free)
+        else:
+            self.var_resp.set(RESP_TEXT_FREE)
+            self.var_resp_livre.set(resp_free or (resp_value if resp_value not in (None, "", RESP_TEXT_FREE) else ""))
+        self.var_sla_tipo.set(d.get("sla_tipo", SLA_TIPOS[0])); self._refresh()
+        
+        try:
+            self.var_sla_dias.set(int(d.get("dias", d.get("sla_dias", 2))))
+        except (ValueError, TypeError):
+            self.var_sla_dias.set(2)
+            
+        self.var_sla_marco.set(d.get("sla_marco", "Prazo Fatal da Peça"))
+        
+        try:
+            self.var_sla_fer.set(bool(d.get("sla_fer", True)))
+        except (ValueError, TypeError):
+             self.var_sla_fer.set(True)
+             
+        self.var_status.set(d.get("status", ""))
+        self.var_fluxo.set(d.get("fluxo", ""))
+        self.var_texto.set(d.get("texto", ""))
+        self.var_ret_tarefa.set(d.get("ret_tarefa", ""))
+        
+        try:
+            self.var_ret_restart.set(bool(d.get("ret_restart", True)))
+        except (ValueError, TypeError):
+            self.var_ret_restart.set(True)
+            
+        self._refresh()
+
+    def to_text(self) -> str:
+        return _acao_dict_to_text(self.to_dict())
+
+class RNBuilder(ctk.CTk):
+    def __init__(self):
+        _configure_gui()
+        super().__init__()
+        self.title("RN Builder — Montador de Regras")
+        self._apply_initial_geometry()
+        self.grid_rowconfigure(0, weight=0)
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.flows: dict[str, list[RNRecord]] = {"Fluxo Padrão": []}
+        self.current_flow: str = "Fluxo Padrão"
+        self.start_idx = tk.IntVar(value=1)
+        self.flow_var = tk.StringVar(value=self.current_flow)
+        self.flow_combo = None
+
+        # Memórias indexadas por chave normalizada (casefold); a lista mantém a grafia exibida
+        self._mem_tasks = MemIndex()
+        self._mem_fields = MemIndex()
+        self._resp_defaults = MemIndex(RESP_DEFAULTS)
+        # Combos de tarefa/campo recebem só as sugestões para o texto digitado, não a lista inteira;
+        # os índices também servem ao filtro das abas de memória, que são recriadas a cada troca de idioma
+        self._typeahead = {
+            "task": Typeahead(self._mem_tasks),
+            "field": Typeahead(self._mem_fields),
+            "resp": Typeahead(self._resp_defaults),
+        }
+        # Índices de busca aproximada montados em fatias, fora da digitação (e de novo a cada troca da lista)
+        self._typeahead_job = None
+        for index in (self._mem_tasks, self._mem_fields, self._resp_defaults):
+            index.watch(self._on_mem_index_changed)
+        self._schedule_typeahead_build()
+
+        # Salvamento em segundo plano + diário de edições para recuperar o trabalho após uma queda
+        self._project_path = None
+        self._save_worker = SaveWorker()
+        self._save_poll_job = None
+        self._journal = None
+        self._journal_flush_job = None
+        self._journal_paused = False
+        # Projeto em pasta: o que já está em disco, para regravar só o que mudou
+        self._saved_dir = None
+        self._saved_flows: set = set()
+        self._saved_mem: dict = {}
+        self._saved_header = None
+        self._dirty_flows: set = set()
+        self._materialize_job = None
+        # Desfazer/refazer (Ctrl+Z / Ctrl+Y) com deltas de operação
+        self._history = UndoLog.from_env()
+        self._history_paused = 0
+        # Fluxos guardados pelo desfazer de um reset que ainda têm arquivos por ler
+        self._flow_snapshots = weakref.WeakSet()
+        for bucket, index in self._mem_buckets().items():
+            index.listener = (lambda op, *args, b=bucket: self._journal_mem(b, op, *args))
+        self._combos = ComboRegistry(self, self._combo_values)
+        self._mem_guard = False
+
+        self._mem_manager_window = None
+        self._mem_manager_tabs = {}
+        self._mem_manager_lang = None
+        self._mem_tab_view = None
+
+        # Preview com coalescência: 0 = uma renderização por ciclo ocioso do Tk
+        try:
+            self.preview_interval_ms = max(0, int(os.environ.get("RN_PREVIEW_INTERVAL_MS", "0")))
+        except ValueError:
+            self.preview_interval_ms = 0
+        self._preview_job = None
+        self._preview_stats = {"requested": 0, "rendered": 0, "skipped": 0}
+        # > 0 durante uma restauração em lote do construtor: sem preview nem relayout por linha
+        self._builder_batch = 0
+
+        initial_resp = (self._resp_defaults[0] if self._resp_defaults else RESP_TEXT_FREE)
+        self.var_resp_preset = tk.StringVar(value=initial_resp)
+        self.var_resp_preset_free = tk.StringVar()
+
+        self._lang_var = tk.StringVar(value=("Português" if get_lang() == "pt" else "Español"))
+
+        self._build_header()
+
+        self.content = ctk.CTkFrame(self, fg_color="transparent")
+        self.content.grid(row=1, column=0, sticky="nsew")
+        self.content.grid_rowconfigure(0, weight=1)
+
+        # Substitui o grid fixo por um painel redimensionável (splitter)
+        self.paned = tk.PanedWindow(
+            self.content,
+            orient="horizontal",
+            sashwidth=6,
+            bg="#2b2b2b",
+            bd=0,
+        )
+        self.paned.pack(fill="both", expand=True, padx=6, pady=6)
+
+        self.left_pane = ctk.CTkFrame(self.paned, fg_color="transparent")
+        self.right_pane = ctk.CTkFrame(self.paned, fg_color="transparent")
+
+        self.paned.add(self.left_pane, minsize=450, stretch="always")
+        self.paned.add(self.right_pane, minsize=450, stretch="always")
+
+        self._startup_timer = None
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._panels_pending = 0
+
+        self._bind_shortcuts()
+
+    def _norm(self, s: str) -> str:
+        return norm_item(s)
+
+    def _add_unique(self, bucket: MemIndex, value: str) -> bool:
+        v = self._norm(value)
+        if len(v) < 3:
+            return False
+        return bucket.add(v)
+
+    def _mem_add_task(self, s: str):
+        if self._add_unique(self._mem_tasks, s):
+            self._refresh_task_combos()
+
+    def _mem_add_field(self, s: str):
+        if self._add_unique(self._mem_fields, s):
+            self._refresh_field_combos()
+
+    def _mem_get_tasks(self):
+        return list(self._mem_tasks)
+
+    def _mem_get_fields(self):
+        return list(self._mem_fields)
+
+    def _mem_suggest(self, bucket: str, text: str = "") -> list[str]:
+        return self._typeahead[bucket].suggest(text)
+
+    def _mem_apply_suggestions(self, combo, bucket: str):
+        try:
+            text = combo.get()
+            combo.configure(values=self._mem_suggest(bucket, text))
+            combo._typeahead_text = text
+        except Exception:
+            pass
+
+    def _mem_bind_typeahead(self, combo, bucket: str):
+        def _on_key(_=None):
+            try:
+                if combo.get() != getattr(combo, "_typeahead_text", None):
+                    self._mem_apply_suggestions(combo, bucket)
+            except Exception:
+                pass
+        try:
+            combo._entry.bind("<KeyRelease>", _on_key, add="+")
+        except Exception:
+            pass
+
+    def _mem_register_task_combo(self, combo):
+        try:
+            if self._combos.register("task", combo):
+                self._mem_bind_typeahead(combo, "task")
+            self._mem_apply_suggestions(combo, "task")
+        except Exception:
+            pass
+
+    def _mem_register_field_combo(self, combo):
+        try:
+            if self._combos.register("field", combo):
+                self._mem_bind_typeahead(combo, "field")
+            self._mem_apply_suggestions(combo, "field")
+        except Exception:
+            pass
+
+    def _combo_values(self, bucket: str, combo) -> list[str]:
+        if bucket == "resp":
+            return self._resp_get_options()
+        return self._mem_suggest(bucket, combo.get())
+
+    def _get_flow_names(self):
+        return list(self.flows.keys()) if self.flows else ["Fluxo Padrão"]
+
+    def _ensure_flow(self, name: str):
+        if not name:
+            name = "Fluxo Padrão"
+        if name not in self.flows:
+            self.flows[name] = []
+        return name
+
+    def _current_rns(self):
+        self.current_flow = self._ensure_flow(self.current_flow)
+        return self.flows[self.current_flow]
+
+    def _start_index(self) -> int:
+        try:
+            return int(self.start_idx.get())
+        except Exception:
+            return 1
+
+    def _current_rn_texts(self) -> list[str]:
+        return render_flow(self._current_rns(), self._start_index())
+
+    def _set_current_flow(self, name: str):
+        name = self._ensure_flow(self._norm(name))
+        self.current_flow = name
+        self.flow_var.set(name)
+        self._refresh_flow_controls()
+        self._refresh_textbox()
+
+    def _refresh_flow_controls(self):
+        names = self._get_flow_names()
+        if not names:
+            names = ["Fluxo Padrão"]
+        if self.current_flow not in names:
+            self.current_flow = names[0]
+        try:
+            self.flow_combo.configure(values=names)
+        except Exception:
+            pass
+        try:
+            self.flow_var.set(self.current_flow)
+        except Exception:
+            pass
+
+    def _on_flow_selected(self, *_):
+        name = self.flow_var.get()
+        if name not in self.flows:
+            name = self._get_flow_names()[0]
+        if hasattr(self.flows, "loads") and not self.flows.loads(name):
+            # Fluxo ilegível não vira o atual: a lista fica no fluxo anterior
+            self._show_broken_flows({name: self.flows.errors.get(name)})
+            self.flow_var.set(self.current_flow)
+            return
+        self.current_flow = name
+        self.flow_var.set(name)
+        self._refresh_textbox()
+
+    def _ask_flow_name(self, title: str, initial: str = "") -> str:
+        try:
+            dialog = ctk.CTkInputDialog(text=title, title=title)
+            try:
+                _apply_dark_title_bar(dialog)
+            except Exception:
+                pass
+
+            # Tenta centralizar usando nossa função global segura
+            try:
+                _center_window(dialog, width=300, height=200, parent=self)
+            except Exception:
+                pass
+
+            # Tenta preencher o valor inicial (para Renomear) com segurança
+            if initial:
+                try:
+                    # Tenta acessar _entry (privado) ou entry (publico)
+                    entry_widget = getattr(dialog, "_entry", getattr(dialog, "entry", None))
+                    if entry_widget:
+                        entry_widget.delete(0, "end")
+                        entry_widget.insert(0, initial)
+                except Exception:
+                    pass
+
+            result = dialog.get_input()
+        except Exception:
+            result = None
+        return self._norm(result or "")
+
+    def _new_flow(self):
+        name = self._ask_flow_name("Nome do novo fluxo")
+        if not name:
+            return
+        if name in self.flows:
+            messagebox.showinfo("Fluxo existente", "Já existe um fluxo com esse nome.", parent=self)
+            return
+        self.flows[name] = []
+        self._record_edit([{"op": "flow_new", "name": name}], [{"op": "flow_delete", "name": name}])
+        self._set_current_flow(name)
+
+    def _rename_flow(self):
+        old = self.current_flow
+        name = self._ask_flow_name("Renomear fluxo", initial=old)
+        if not name or name == old:
+            return
+        if name in self.flows:
+            messagebox.showinfo("Fluxo existente", "Já existe um fluxo com esse nome.", parent=self)
+            return
+        self.flows[name] = self.flows.pop(old)
+        self._record_edit(
+            [{"op": "flow_rename", "old": old, "new": name}],
+            [{"op": "flow_rename", "old": name, "new": old}],
+        )
+        self._set_current_flow(name)
+
+    def _delete_flow(self):
+        if len(self.flows) <= 1:
+            messagebox.showinfo("Fluxos", "É necessário ter pelo menos um fluxo.", parent=self)
+            return
+        if not messagebox.askyesno("Remover fluxo", f"Remover o fluxo '{self.current_flow}' e suas RNs?", parent=self):
+            return
+        try:
+            name = self.current_flow
+            recs = [r.to_dict() for r in self.flows.pop(name)]
+            self._record_edit([{"op": "flow_delete", "name": name}], [{"op": "rns_set", "flow": name, "recs": recs}])
+        except Exception:
+            pass
+        remaining = self._get_flow_names()
+        self.current_flow = remaining[0] if remaining else "Fluxo Padrão"
+        self._refresh_flow_controls()
+        self._refresh_textbox()
+
+    def _resp_get_options(self):
+        free_key = item_key(RESP_TEXT_FREE)
+        options = [v for v in self._resp_defaults if item_key(v) != free_key]
+        options.sort(key=str.casefold)
+        if RESP_TEXT_FREE not in options:
+            options.append(RESP_TEXT_FREE)
+        return options
+
+    def _resp_register_combo(self, combo):
+        try:
+            self._combos.register("resp", combo)
+            combo.configure(values=self._resp_get_options())
+        except Exception:
+            pass
+
+    def _refresh_task_combos(self):
+        if not self._mem_guard:
+            self._combos.schedule("task")
+
+    def _refresh_field_combos(self):
+        if not self._mem_guard:
+            self._combos.schedule("field")
+
+    def _refresh_resp_combos(self):
+        if not self._mem_guard:
+            self._combos.schedule("resp")
+
+    def _mem_bind_combo_capture(self, combo, getter, bucket: str):
+        try:
+            entry = combo._entry
+            if bucket == "task":
+                entry.bind("<FocusOut>", lambda e: self._mem_add_task(getter()))
+                entry.bind("<Return>",   lambda e: self._mem_add_task(getter()))
+            else:
+                entry.bind("<FocusOut>", lambda e: self._mem_add_field(getter()))
+                entry.bind("<Return>",   lambda e: self._mem_add_field(getter()))
+        except Exception:
+            pass
+
+        def _on_select(_=None):
+            if self._mem_guard:
+                return
+            try:
+                self._mem_guard = True
+                val = getter()
+                if bucket == "task":
+                    self._mem_add_task(val)
+                else:
+                    self._mem_add_field(val)
+            finally:
+                self._mem_guard = False
+        try:
+            combo.configure(command=_on_select)
+        except Exception:
+            pass
+
+    def _resp_add(self, s: str):
+        v = self._norm(s)
+        if not v or v == RESP_TEXT_FREE:
+            return
+        if not self._resp_defaults.add(v):
+            return
+        self._resp_defaults.sort()
+        self._refresh_resp_combos()
+
+    def _resp_bind_combo_capture(self, combo, getter, on_select=None):
+        try:
+            entry = combo._entry
+            entry.bind("<FocusOut>", lambda e: self._resp_add(getter()))
+            entry.bind("<Return>",   lambda e: self._resp_add(getter()))
+        except Exception:
+            pass
+
+        def _on_select(_=None):
+            prev_guard = self._mem_guard
+            if not prev_guard:
+                self._mem_guard = True
+            try:
+                if not prev_guard:
+                    self._resp_add(getter())
+            finally:
+                if not prev_guard:
+                    self._mem_guard = False
+            if callable(on_select):
+                on_select()
+
+        try:
+            combo.configure(command=_on_select)
+        except Exception:
+            pass
+
+    def _clear_memories(self):
+        if messagebox.askyesno("Limpar memórias", "Limpar listas de TAREFAS, CAMPOS e RESPONSÁVEIS deste projeto?"):
+            self._mem_tasks.clear()
+            self._mem_fields.clear()
+            self._resp_defaults.reset(RESP_DEFAULTS)
+            for bucket, index in self._mem_buckets().items():
+                self._journal_log("mem_reset", bucket=bucket, values=list(index))
+            self._refresh_task_combos()
+            self._refresh_field_combos()
+            self._refresh_resp_combos()
+    
+    def _mem_manager_specs(self) -> dict:
+        return {
+            "Tarefas": dict(
+                title="Gerenciar Tarefas",
+                mem_list=self._mem_tasks,
+                refresh_cb=self._refresh_task_combos,
+                index=self._typeahead["task"],
+                layout="horizontal",
+            ),
+            "Campos": dict(
+                title="Gerenciar Campos",
+                mem_list=self._mem_fields,
+                refresh_cb=self._refresh_field_combos,
+                index=self._typeahead["field"],
+                layout="horizontal",
+            ),
+            "Responsáveis": dict(
+                title="Gerenciar Responsáveis padrão",
+                mem_list=self._resp_defaults,
+                refresh_cb=self._refresh_resp_combos,
+                index=self._typeahead["resp"],
+                hint_text=_t("mem_resp_hint"),
+                import_label=_t("mem_resp_import_label"),
+                list_label=_t("mem_resp_label"),
+                placeholder=_t("mem_resp_new_placeholder"),
+                add_button_text=_t("mem_resp_add_button"),
+                count_labels={
+                    "none": _t("mem_resp_none"),
+                    "one": _t("mem_resp_one"),
+                    "many": _t("mem_resp_many"),
+                },
+                forbidden_values=[RESP_TEXT_FREE],
+                layout="horizontal",
+            ),
+        }
+
+    def _open_mem_manager(self):
+        # A janela é criada uma vez e só escondida ao fechar; cada aba é montada na primeira seleção
+        top = self._mem_manager_window
+        try:
+            alive = top is not None and top.winfo_exists()
+        except Exception:
+            alive = False
+        if alive and self._mem_manager_lang != get_lang():
+            try:
+                top.destroy()
+            except Exception:
+                pass
+            alive = False
+        if alive:
+            top.deiconify()
+            top.lift()
+            top.grab_set()
+            top.focus()
+            self._on_mem_tab_selected()
+            return
+
+        top = ctk.CTkToplevel(self)
+        top.title("Gerenciador de Listas")
+        try:
+            _apply_dark_title_bar(top)
+        except Exception:
+            pass
+        top.transient(self)
+        top.grab_set()
+        self._mem_manager_window = top
+        self._mem_manager_lang = get_lang()
+        self._mem_manager_tabs = {}
+
+        def _on_close():
+            try:
+                top.grab_release()
+            except Exception:
+                pass
+            top.withdraw()
+        top.protocol("WM_DELETE_WINDOW", _on_close)
+
+        self._mem_tab_view = ctk.CTkTabview(top, command=self._on_mem_tab_selected)
+        self._mem_tab_view.pack(expand=True, fill="both", padx=16, pady=16)
+        for name in self._mem_manager_specs():
+            self._mem_tab_view.add(name)
+
+        self._on_mem_tab_selected()
+        _center_window(top, width=960, height=540, parent=self)
+
+    def _on_mem_tab_selected(self):
+        try:
+            name = self._mem_tab_view.get()
+        except Exception:
+            return
+        mgr = self._mem_manager_tabs.get(name)
+        if mgr is None:
+            spec = self._mem_manager_specs().get(name)
+            if spec is None:
+                return
+            mgr = MemManagerTab(self._mem_tab_view.tab(name), **spec)
+            mgr.pack(expand=True, fill="both")
+            self._mem_manager_tabs[name] = mgr
+        else:
+            mgr.sync()
+
+    def _build_header(self):
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.grid(row=0, column=0, sticky="we", padx=10, pady=(10, 6))
+        header.grid_columnconfigure(0, weight=1)
+
+        button_bar = ctk.CTkFrame(header, fg_color="transparent")
+        button_bar.grid(row=0, column=0, sticky="we")
+
+        actions_bar = ctk.CTkFrame(button_bar, fg_color="transparent")
+        actions_bar.pack(side="left", fill="x", expand=True)
+        for text, cmd, width in (
+            ("Limpar construtor", self._clear_builder, 150),
+            ("Gerenciar Listas", self._open_mem_manager, 160),
+            ("Limpar memórias", self._clear_memories, 150),
+            ("Reset geral", self._reset_all, 140),
+        ):
+            ctk.CTkButton(actions_bar, text=text, command=cmd, width=width).pack(side="left", padx=(0, 8), pady=4)
+
+        more_bar = ctk.CTkFrame(button_bar, fg_color="transparent")
+        more_bar.pack(side="right")
+        ctk.CTkLabel(more_bar, text="Idioma:").pack(side="left", padx=(0, 6))
+        ctk.CTkOptionMenu(
+            more_bar,
+            values=["Português", "Español"],
+            variable=self._lang_var,
+            width=120,
+            command=self._on_change_lang,
+        ).pack(side="left", padx=(0, 12))
+
+        self._more_btn = ctk.CTkButton(more_bar, text="Mais...", command=self._open_more_menu, width=140)
+        self._more_btn.pack(side="left")
+
+        config_row = ctk.CTkFrame(header, fg_color="transparent")
+        config_row.grid(row=1, column=0, sticky="we", pady=(6, 0))
+        config_row.grid_columnconfigure(2, weight=1)
+
+        start_frame = ctk.CTkFrame(config_row, fg_color="transparent")
+        start_frame.grid(row=0, column=0, sticky="w")
+        ctk.CTkLabel(start_frame, text="RN inicial:").pack(side="left", padx=(0, 6))
+        self.spin_start = IntSpin(start_frame, from_=1, to=999, width=110, variable=self.start_idx)
+        self.spin_start.pack(side="left")
+        def _sync_start(*_):
+            try:
+                value = int(self.start_idx.get())
+            except Exception:
+                value = 1
+            self.spin_start.entry.delete(0, "end")
+            self.spin_start.entry.insert(0, str(value))
+        self.start_idx.trace_add("write", lambda *a: _sync_start())
+        _sync_start()
+
+        resp_frame = ctk.CTkFrame(config_row, fg_color="transparent")
+        resp_frame.grid(row=0, column=1, sticky="w", padx=(20, 0))
+        ctk.CTkLabel(resp_frame, text="Responsável padrão (novas ações):").pack(side="left")
+
+        cb = ctk.CTkComboBox(
+            resp_frame,
+            values=self._resp_get_options(),
+            variable=self.var_resp_preset,
+            width=220,
+            border_width=1,
+            border_color=COMBO_BORDER,
+        )
+        cb.pack(side="left", padx=(6, 0))
+
+        self.entry_resp_preset_free = ctk.CTkEntry(
+            resp_frame, textvariable=self.var_resp_preset_free, width=220
+        )
+
+        def _toggle_preset_free(*_):
+            if self.var_resp_preset.get() == RESP_TEXT_FREE:
+                self.entry_resp_preset_free.pack(side="left", padx=(6, 0))
+            else:
+                self.var_resp_preset_free.set("")
+                try:
+                    self.entry_resp_preset_free.pack_forget()
+                except Exception:
+                    pass
+
+        self._resp_register_combo(cb)
+        self._resp_bind_combo_capture(cb, lambda: self.var_resp_preset.get(), on_select=_toggle_preset_free)
+        _toggle_preset_free()
+
+    def _on_change_lang(self, _choice: str):
+        val = self._lang_var.get()
+        set_lang("es" if val.startswith("Espa") else "pt")
+        try:
+            if hasattr(self, "_schedule_preview"):
+                self._schedule_preview()
+            if hasattr(self, "_refresh_textbox"):
+                self._refresh_textbox()
+        except Exception:
+            pass
+
+    def _open_more_menu(self):
+        try:
+            menu = tk.Menu(self, tearoff=False)
+            menu.add_command(label="Salvar projeto", command=self._save_project, accelerator="Ctrl+S")
+            menu.add_command(label="Salvar como…", command=self._save_project_as, accelerator="Ctrl+Shift+S")
+            menu.add_command(label="Abrir projeto…", command=self._open_project)
+            menu.add_separator()
+            menu.add_command(label="Sobre", command=self._show_about)
+            bx = self._more_btn.winfo_rootx()
+            by = self._more_btn.winfo_rooty() + self._more_btn.winfo_height()
+            try:
+                menu.tk_popup(bx, by)
+            finally:
+                menu.grab_release()
+        except Exception as e:
+            messagebox.showerror("Menu", str(e))
+
+    def _bind_shortcuts(self):
+        try:
+            self.bind_all("<Control-s>", lambda e: self._save_project())
+            self.bind_all("<Control-Shift-S>", lambda e: self._save_project_as())
+            self.bind_all("<Control-o>", lambda e: self._open_project())
+            self.bind_all("<Control-L>", lambda e: self._clear_builder())
+            self.bind_all("<Control-l>", lambda e: self._clear_builder())
+            self.bind_all("<Control-M>", lambda e: self._clear_memories())
+            self.bind_all("<Control-m>", lambda e: self._clear_memories())
+            self.bind_all("<Control-Shift-R>", lambda e: self._reset_all())
+            self.bind_all("<Control-z>", self._on_undo_key)
+            self.bind_all("<Control-Z>", self._on_undo_key)
+            self.bind_all("<Control-y>", self._on_redo_key)
+            self.bind_all("<Control-Y>", self._on_redo_key)
+            self.bind_all("<F1>", lambda e: self._show_about())
+
+            self.bind_all("<Control-Return>", lambda e: self._add_rn())
+            self.bind_all("<Alt-c>", lambda e: self._add_cond())
+            self.bind_all("<Alt-a>", lambda e: self._add_acao())
+
+        except Exception:
+            pass
+
+    def _apply_initial_geometry(self):
+        def _clamp(value: int, minimum: int, maximum: int) -> int:
+            return max(minimum, min(value, maximum))
+
+        self.update_idletasks()
+        screen_w = max(self.winfo_screenwidth(), 1)
+        screen_h = max(self.winfo_screenheight(), 1)
+
+        margin_w = 40 if screen_w > 40 else 0
+        margin_h = 80 if screen_h > 80 else 0
+
+        width = _clamp(int(screen_w * 0.85), int(screen_w * 0.6), screen_w - margin_w)
+        height = _clamp(int(screen_h * 0.85), int(screen_h * 0.6), screen_h - margin_h)
+
+        x = max((screen_w - width) // 2, 0)
+        y = max((screen_h - height) // 2, 0)
+
+        self.geometry(f"{width}x{height}+{x}+{y}")
+
+        min_w = min(width, max(int(screen_w * 0.55), 880))
+        min_h = min(height, max(int(screen_h * 0.55), 640))
+        self.minsize(min_w, min_h)
+
+        try:
+            self.attributes("-alpha", 1.0)
+        except Exception:
+            pass
+
+    def _enable_scrollwheel(self, scrollable: ctk.CTkScrollableFrame):
+        canvas = getattr(scrollable, "_parent_canvas", None)
+        if canvas is None:
+            return
+
+        def _on_mousewheel(event):
+            delta = getattr(event, "delta", 0)
+            if delta == 0 and getattr(event, "num", None) in (4, 5):
+                delta = 120 if event.num == 4 else -120
+            step = -1 if delta > 0 else 1
+            canvas.yview_scroll(step, "units")
+            return "break"
+
+        canvas.bind("<MouseWheel>", _on_mousewheel, add=True)
+        canvas.bind("<Button-4>", _on_mousewheel, add=True)
+        canvas.bind("<Button-5>", _on_mousewheel, add=True)
+
+    def _show_about(self):
+        messagebox.showinfo("Sobre", "Criado por Rodrigo Salvador Escudero")
+
+    def _clear_header(self):
+        self.start_idx.set(1)
+        options = self._resp_get_options()
+        default_resp = next((opt for opt in options if opt != RESP_TEXT_FREE), RESP_TEXT_FREE)
+        self.var_resp_preset.set(default_resp)
+        self.var_resp_preset_free.set("")
+        try:
+            self.entry_resp_preset_free.pack_forget()
+        except Exception:
+            pass
+
+    def _clear_builder(self):
+        before = self._builder_snapshot()
+        try:
+            if hasattr(self, "_destroy_rows"):
+                self._destroy_rows(getattr(self, "cond_rows", []))
+                self._destroy_rows(getattr(self, "acao_rows", []))
+                if hasattr(self, "_ensure_min_builder_rows"):
+                    self._ensure_min_builder_rows()
+            if hasattr(self, "_schedule_preview"):
+                self._schedule_preview()
+        except Exception:
+            pass
+        after = self._builder_snapshot()
+        if before is not None and after is not None and before != after:
+            self._record_edit([{"op": "builder_set", "builder": after}], [{"op": "builder_set", "builder": before}])
+
+    def _reset_all(self):
+        # Desfazer volta fluxos, memórias, cabeçalho e construtor; as entradas guardam só os dados,
+        # não widgets. Os fluxos voltam como estavam: o próprio dicionário, com os ainda não lidos
+        # mantendo a função de leitura (o reset troca self.flows por um novo)
+        undo = [{"op": "flows_restore", "flows": self.flows}]
+        if hasattr(self.flows, "pending"):
+            self._flow_snapshots.add(self.flows)
+        undo += [{"op": "mem_reset", "bucket": b, "values": list(index)} for b, index in self._mem_buckets().items()]
+        undo.append({"op": "header_set", "header": self._header_snapshot()})
+        before = self._builder_snapshot()
+        if before is not None:
+            undo.append({"op": "builder_set", "builder": before})
+        self._history_paused += 1
+        try:
+            self._reset_all_now()
+        finally:
+            self._history_paused -= 1
+        do = [{"op": "reset"}, {"op": "header_set", "header": self._header_snapshot()}]
+        after = self._builder_snapshot()
+        if after is not None:
+            do.append({"op": "builder_set", "builder": after})
+        self._history.push(do, undo, "reset")
+
+    def _reset_all_now(self):
+        self._journal_log("reset")
+        self._cancel_materialize()
+        self._resp_defaults.reset(RESP_DEFAULTS)
+        self._refresh_resp_combos()
+        self._clear_header()
+        self._mem_tasks.clear(); self._mem_fields.clear()
+        self._refresh_task_combos(); self._refresh_field_combos()
+
+        self._clear_builder()
+
+        self.flows = {"Fluxo Padrão": []}
+        self.current_flow = "Fluxo Padrão"
+        self.flow_var.set(self.current_flow)
+        self._refresh_flow_controls()
+
+        try:
+            if hasattr(self, "_reset_builder_defaults"):
+                self._reset_builder_defaults()
+            if hasattr(self, "_clear_preview"):
+                self._clear_preview()
+            if hasattr(self, "_schedule_preview"):
+                self._schedule_preview()
+            if hasattr(self, "_ensure_min_builder_rows"):
+                self._ensure_min_builder_rows()
+            if hasattr(self, "_refresh_textbox"):
+                self._refresh_textbox()
+        except Exception:
+            pass
+
+    def _header_snapshot(self) -> dict:
+        return {
+            "start_idx": self._start_index(),
+            "resp_preset": self.var_resp_preset.get(),
+            "resp_preset_free": self.var_resp_preset_free.get(),
+        }
+
+    def _apply_header(self, header: dict):
+        self.start_idx.set(int(header.get("start_idx", 1)))
+        self.var_resp_preset.set(header.get("resp_preset", RESP_DEFAULTS[0] if RESP_DEFAULTS else RESP_TEXT_FREE))
+        self.var_resp_preset_free.set(header.get("resp_preset_free", ""))
+        if self.var_resp_preset.get() == RESP_TEXT_FREE:
+            self.entry_resp_preset_free.pack(side="left", padx=(6, 0))
+        else:
+            try:
+                self.entry_resp_preset_free.pack_forget()
+            except Exception:
+                pass
+
+    def _restore_flows(self, flows: dict):
+        """Desfaz um reset: os fluxos de antes voltam sem ler os pendentes."""
+        self._cancel_materialize()
+        self.flows = flows
+        if hasattr(flows, "pending") and flows.pending():
+            # O diário refaz a volta a partir do estado guardado no "reset" anterior a ele
+            self._journal_log("reset_undo")
+            self._materialize_job = self.after(50, self._materialize_step)
+        else:
+            self._journal_log("flows_set", flows={k: [r.to_dict() for r in v] for k, v in flows.items()})
+
+    def _collect_project(self, flows=None, memory=None) -> dict:
+        """flows/memory limitam os fluxos e as listas (task/field/resp) coletados; None = todos.
+        A coleta parcial só serve para projetos em pasta (ver rn_project.save_project_dir)."""
+        start = self._start_index()
+        names = self.flows.keys() if flows is None else [k for k in self.flows if k in flows]
+        texts = {k: render_flow(self.flows[k], start) for k in names}
+        proj = {
+            "version": 5,
+            "lang": get_lang(),
+            "header": {
+                "start_idx": int(self.start_idx.get()),
+                "resp_preset": self.var_resp_preset.get(),
+                "resp_preset_free": self.var_resp_preset_free.get(),
+            },
+            "builder": {},
+            "memory": {
+                key: list(index)
+                for key, bucket, index in (
+                    ("tarefas", "task", self._mem_tasks),
+                    ("campos", "field", self._mem_fields),
+                    ("responsaveis", "resp", self._resp_defaults),
+                )
+                if memory is None or bucket in memory
+            },
+            "flows": texts,
+            "rns": list(texts.get("Fluxo Padrão", [])),
+            "flow_records": {k: [r.to_dict() for r in self.flows[k]] for k in names},
+        }
+        if flows is not None:
+            proj["flow_order"] = list(self.flows.keys())
+        try:
+            if hasattr(self, "_collect_builder_into"):
+                self._collect_builder_into(proj)
+        except Exception:
+            pass
+        return proj
+
+    def _apply_project(self, proj: dict, flows: Optional[dict] = None):
+        try:
+            lang = proj.get("lang", "pt")
+            set_lang(lang)
+            self._lang_var.set("Español" if lang == "es" else "Português")
+
+            self._apply_header(proj.get("header", {}))
+
+            mem = proj.get("memory", {})
+            # Atualiza os índices no lugar: as abas de memória abertas mantêm a mesma referência
+            self._mem_tasks.reset(mem.get("tarefas", []))
+            self._mem_fields.reset(mem.get("campos", []))
+            resp_list = mem.get("responsaveis", RESP_DEFAULTS)
+            self._resp_defaults.reset(resp_list if resp_list else RESP_DEFAULTS)
+            self._refresh_task_combos(); self._refresh_field_combos(); self._refresh_resp_combos()
+
+            preset_value = self.var_resp_preset.get()
+            if preset_value and preset_value not in self._resp_get_options() and preset_value != RESP_TEXT_FREE:
+                self._resp_add(preset_value)
+            elif preset_value == RESP_TEXT_FREE and not self.var_resp_preset_free.get():
+                self.var_resp_preset_free.set("")
+
+            try:
+                if hasattr(self, "_apply_builder_from"):
+                    self._apply_builder_from(proj)
+            except Exception:
+                pass
+
+            self._cancel_materialize()
+            self.flows = records_from_project(proj) if flows is None else flows
+            broken = self._broken_flows()
+            self.current_flow = next((k for k in self.flows if k not in broken), next(iter(self.flows), "Fluxo Padrão"))
+            self.flow_var.set(self.current_flow)
+            self._refresh_flow_controls()
+            try:
+                if hasattr(self, "_refresh_textbox"):
+                    self._refresh_textbox()
+            except Exception:
+                pass
+
+            try:
+                if hasattr(self, "_schedule_preview"):
+                    self._schedule_preview()
+            except Exception:
+                pass
+
+            if hasattr(self.flows, "pending") and self.flows.pending():
+                self._materialize_job = self.after(50, self._materialize_step)
+            if broken:
+                self._show_broken_flows(broken)
+
+        except Exception as e:
+            messagebox.showerror("Erro ao carregar projeto", str(e))
+
+    # --- Fluxos carregados sob demanda: os que ainda não foram abertos são lidos em fatias ---
+    def _materialize_step(self):
+        self._materialize_job = None
+        pending = getattr(self.flows, "pending", None)
+        if pending is None:
+            return
+        deadline = time.perf_counter() + FILTER_SLICE_MS / 1000
+        names = pending()
+        failed = {}
+        while names and time.perf_counter() < deadline:
+            name = names.pop(0)
+            try:
+                self.flows.materialize(name)
+            except Exception as e:
+                # Fluxo ilegível: continua não carregado (nunca vira lista vazia) e os demais seguem
+                failed[name] = e
+        if names:
+            self._materialize_job = self.after(1, self._materialize_step)
+        if failed:
+            self._show_broken_flows(failed)
+
+    def _on_mem_index_changed(self, op: str, *args):
+        if op == "reset":
+            self._schedule_typeahead_build()
+
+    def _schedule_typeahead_build(self):
+        if self._typeahead_job is None:
+            self._typeahead_job = self.after(100, self._typeahead_build_step)
+
+    def _typeahead_build_step(self):
+        self._typeahead_job = None
+        busy = [t for t in self._typeahead.values() if not t.prepare(FILTER_SLICE_MS / 1000)]
+        if busy:
+            self._typeahead_job = self.after(1, self._typeahead_build_step)
+
+    def _broken_flows(self) -> dict:
+        return dict(getattr(self.flows, "errors", {}))
+
+    def _show_broken_flows(self, errors: dict):
+        lines = [f"• {name}: {error}" for name, error in errors.items()]
+        messagebox.showerror(
+            "Fluxo com erro",
+            "Não foi possível ler:\n" + "\n".join(lines[:10])
+            + "\n\nO fluxo fica fora da edição e não é salvo vazio; corrija o arquivo e abra o projeto de novo.",
+        )
+
+    def _cancel_materialize(self):
+        if self._materialize_job is not None:
+            try:
+                self.after_cancel(self._materialize_job)
+            except Exception:
+                pass
+            self._materialize_job = None
+
+    def _save_project(self):
+        # Projeto já aberto ou salvo: grava no mesmo lugar, sem perguntar
+        if self._project_path:
+            self._save_project_to(self._project_path)
+        else:
+            self._save_project_as()
+
+    def _save_project_as(self):
+        path = filedialog.asksaveasfilename(
+            title="Salvar projeto",
+            defaultextension=".rnproj",
+            filetypes=[("Projeto de RNs", ".rnproj"), ("Projeto compacto", COMPACT_EXT), ("Projeto em pasta", PROJECT_DIR_EXT), ("JSON", ".json"), ("Todos", "*.*")],
+            initialfile="meu_projeto.rnproj",
+        )
+        if not path:
+            return
+        folder = project_dir_of(path)
+        if folder is not None:
+            # Dentro de um projeto em pasta: o manifesto vale pela pasta; outro arquivo ali estragaria o projeto
+            if os.path.basename(path) != MANIFEST_NAME:
+                messagebox.showerror("Salvar projeto", f"Escolha outro local: o arquivo ficaria dentro do projeto em pasta\n{folder}")
+                return
+            path = folder
+        self._save_project_to(path)
+
+    def _save_state(self) -> tuple:
+        """Fluxos, versões das memórias e (início, idioma) gravados: a numeração e o idioma
+        entram no texto de todos os fluxos, então mudar qualquer um deles regrava todos."""
+        buckets = self._mem_buckets()
+        return set(self.flows), {b: index.version for b, index in buckets.items()}, (self._start_index(), get_lang())
+
+    def _save_project_to(self, path: str):
+        # A coleta é feita aqui (thread do Tk); serialização e escrita atômica ficam na thread de salvamento
+        state = self._save_state() if is_project_dir(path) else None
+        flows = memory = None
+        if state is not None and path == self._saved_dir and os.path.isdir(path):
+            # Só os fluxos editados (ou ainda não gravados) e as listas cuja versão mudou
+            if state[2] != self._saved_header:
+                flows = set(self.flows)
+            else:
+                flows = {k for k in self.flows if k in self._dirty_flows or k not in self._saved_flows}
+            memory = {b for b, version in state[1].items() if self._saved_mem.get(b) != version}
+        if state is not None:
+            # A pasta vai ser regravada: o desfazer de um reset não pode depender dos arquivos de lá
+            for snapshot in list(self._flow_snapshots):
+                for name in snapshot.pending():
+                    snapshot.loads(name)
+        # Fluxos pendentes que vão para o arquivo são lidos antes da coleta
+        if hasattr(self.flows, "loads"):
+            for name in list(self.flows if flows is None else flows):
+                self.flows.loads(name)
+        broken = self._broken_flows()
+        if broken and flows is None:
+            # Só a própria pasta guarda o arquivo original de um fluxo ilegível
+            messagebox.showerror(
+                "Salvar projeto",
+                "Há fluxos que não puderam ser lidos e não seriam salvos:\n"
+                + "\n".join(f"• {name}" for name in list(broken)[:10])
+                + "\n\nSalve na pasta do projeto aberto ou corrija esses arquivos antes.",
+            )
+            return
+        if flows is not None:
+            # Os ilegíveis mantêm o arquivo que já está na pasta
+            proj = self._collect_project(flows=flows - set(broken), memory=memory)
+        else:
+            proj = self._collect_project()
+        self._dirty_flows = set()
+        self._journal_flush()
+        journal = self._journal
+        token = (journal.seq, journal.path, state) if journal is not None else (0, None, state)
+        self._save_worker.submit(path, proj, token=token)
+        if self._save_poll_job is None:
+            self._save_poll_job = self.after(50, self._poll_saves)
+
+    def _poll_saves(self, notify: bool = True):
+        self._save_poll_job = None
+        for (seq, jpath, state), path, error in self._save_worker.poll():
+            self._on_project_saved(path, seq, jpath, error, notify, state)
+        if self._save_worker.pending and notify:
+            self._save_poll_job = self.after(100, self._poll_saves)
+
+    def _on_project_saved(self, path, seq, jpath, error=None, notify=True, state=None):
+        if error is not None:
+            # O disco pode ter ficado entre dois estados: o próximo salvamento regrava tudo
+            self._saved_dir = None
+            messagebox.showerror("Erro ao salvar projeto", str(error))
+            return
+        self._project_path = path
+        self._mark_saved(path if state is not None else None, state)
+        try:
+            # O que entrou no diário até o instante da coleta já está no arquivo. Com vários
+            # salvamentos em andamento, o diário do pedido pode já ter migrado para o do destino
+            # (a migração mantém a numeração); qualquer outro diário não é deste salvamento
+            target = journal_path_for(path)
+            cur = self._journal
+            if cur is not None and jpath is not None and cur.path in (jpath, target):
+                rest = cur.compact(seq)
+                if cur.path != target:
+                    journal = Journal(target)
+                    journal.discard()
+                    journal.seq = seq
+                    for e in rest:
+                        journal.append(e["op"], **{k: v for k, v in e.items() if k not in ("seq", "op")})
+                    journal.flush()
+                    cur.discard()
+                    self._journal = journal
+            elif cur is None and jpath is None:
+                # Nenhuma edição antes do salvamento: um diário velho no destino não vale mais
+                Journal(target).discard()
+        except Exception:
+            pass
+        if notify:
+            messagebox.showinfo("Projeto salvo", f"Projeto salvo em:\n{path}")
+
+    def _open_project(self):
+        path = filedialog.askopenfilename(
+            title="Abrir projeto",
+            filetypes=[("Projeto de RNs", ".rnproj"), ("Projeto compacto", COMPACT_EXT), ("JSON", ".json"), ("Todos", "*.*")],
+        )
+        if not path:
+            return
+        if os.path.basename(path) == MANIFEST_NAME and project_dir_of(path):
+            path = project_dir_of(path)
+        # Abrir não é uma edição: nada do carregamento vai para o diário
+        self._journal_paused = True
+        try:
+            # Cabeçalho e memórias agora; cada fluxo vira RNRecord quando for exibido ou em segundo plano
+            proj, flows = open_project_lazy(path)
+            # O fluxo inicial precisa abrir; se nenhum abrir, a interface não é alterada
+            if not any(flows.loads(name) for name in flows):
+                raise ProjectError([f"{name}: {error}" for name, error in flows.errors.items()])
+            self._apply_project(proj, flows)
+        except ProjectError as e:
+            messagebox.showerror("Projeto inválido", "\n".join(e.errors[:10]))
+            return
+        except Exception as e:
+            messagebox.showerror("Erro ao abrir projeto", str(e))
+            return
+        finally:
+            self._journal_paused = False
+        self._project_path = path
+        self._dirty_flows = set()
+        self._history.clear()
+        if os.path.isdir(path):
+            self._mark_saved(path, self._save_state())
+        else:
+            self._mark_saved(None)
+        self._offer_recovery(path)
+
+    def _mark_saved(self, path: Optional[str], state=None):
+        self._saved_dir = path
+        self._saved_flows, self._saved_mem, self._saved_header = state if state is not None else (set(), {}, None)
+
+    def _mark_dirty(self, op: str, data: dict):
+        if op == "reset":
+            self._dirty_flows.add("Fluxo Padrão")
+        elif op == "flows_set":
+            self._dirty_flows.update(data.get("flows", ()))
+        for key in ("flow", "name", "new"):
+            name = data.get(key)
+            if isinstance(name, str) and not op.startswith("mem_"):
+                self._dirty_flows.add(name)
+
+    # --- Desfazer/refazer ---
+    def _record_edit(self, do: list, undo: list):
+        """Registra uma edição já aplicada: vai para o diário e para o histórico de desfazer."""
+        for entry in do:
+            if entry["op"] != "builder_set":
+                self._journal_log(**entry)
+        if not self._history_paused:
+            self._history.push(do, undo)
+
+    def _builder_snapshot(self) -> Optional[dict]:
+        if not hasattr(self, "cond_rows"):
+            return None
+        proj = {}
+        try:
+            self._collect_builder_into(proj)
+        except Exception:
+            return None
+        return proj["builder"]
+
+    def _on_undo_key(self, event=None):
+        if self._shortcut_in_dialog(event):
+            return None
+        self._undo()
+        return "break"
+
+    def _on_redo_key(self, event=None):
+        if self._shortcut_in_dialog(event):
+            return None
+        self._redo()
+        return "break"
+
+    def _shortcut_in_dialog(self, event) -> bool:
+        # Janelas secundárias (edição de RN, memórias) ficam com o comportamento padrão do Tk
+        try:
+            return event is not None and event.widget.winfo_toplevel() is not self
+        except Exception:
+            return False
+
+    def _undo(self):
+        entries = self._history.undo()
+        if entries is not None:
+            self._apply_history(entries)
+
+    def _redo(self):
+        entries = self._history.redo()
+        if entries is not None:
+            self._apply_history(entries)
+
+    def _apply_history(self, entries: list):
+        memory = self._mem_buckets()
+        touched = None
+        focus = None
+        flows_changed = mem_changed = False
+        for entry in entries:
+            op = entry["op"]
+            if op == "builder_set":
+                self._apply_builder_from({"builder": entry["builder"]})
+                continue
+            if op == "header_set":
+                self._apply_header(entry["header"])
+                continue
+            if op == "flows_restore":
+                self._restore_flows(entry["flows"])
+                flows_changed = True
+                continue
+            if op == "reset":
+                # Refazer o reset não pode limpar no lugar o dicionário guardado pelo desfazer
+                self._cancel_materialize()
+                self.flows = {}
+            flow = apply_entry(self.flows, memory, entry)
+            self._journal_log(**entry)
+            touched = flow or touched
+            flows_changed = flows_changed or op.startswith("flow") or op in ("reset", "rns_set")
+            mem_changed = mem_changed or op.startswith("mem_") or op == "reset"
+            if "index" in entry or "i" in entry:
+                focus = int(entry.get("j", entry.get("index", entry.get("i", 0))))
+        if mem_changed:
+            self._refresh_task_combos(); self._refresh_field_combos(); self._refresh_resp_combos()
+        if flows_changed:
+            self._refresh_flow_controls()
+        # Mostra o fluxo afetado; _refresh_textbox só reescreve o trecho de RNs que mudou
+        if touched in self.flows and touched != self.current_flow:
+            self._set_current_flow(touched)
+        else:
+            if self.current_flow not in self.flows:
+                self.current_flow = self._ensure_flow(next(iter(self.flows), "Fluxo Padrão"))
+                self.flow_var.set(self.current_flow)
+            self._refresh_textbox()
+        if focus is not None and getattr(self, "rn_mgr", None) is not None:
+            try:
+                self.rn_mgr.see(min(focus, max(len(self._current_rns()) - 1, 0)))
+            except Exception:
+                pass
+
+    # --- Diário de edições ---
+    def _mem_buckets(self) -> dict:
+        return {"task": self._mem_tasks, "field": self._mem_fields, "resp": self._resp_defaults}
+
+    def _journal_log(self, op: str, **data):
+        self._mark_dirty(op, data)
+        if self._journal_paused:
+            return
+        try:
+            path = journal_path_for(self._project_path)
+            if self._journal is None or self._journal.path != path:
+                if self._journal is not None:
+                    self._journal.close()
+                self._journal = Journal(path)
+            self._journal.append(op, **data)
+        except Exception:
+            return
+        if self._journal_flush_job is None:
+            self._journal_flush_job = self.after_idle(self._journal_flush)
+
+    def _journal_flush(self):
+        self._journal_flush_job = None
+        try:
+            if self._journal is not None:
+                self._journal.flush()
+        except Exception:
+            pass
+
+    def _journal_mem(self, bucket: str, op: str, *args):
+        if op == "rename":
+            self._journal_log("mem_rename", bucket=bucket, old=args[0], new=args[1])
+        elif op == "reset":
+            self._journal_log("mem_reset", bucket=bucket, values=args[0])
+        else:
+            self._journal_log(f"mem_{op}", bucket=bucket, value=args[0])
+
+    def _offer_recovery(self, path: Optional[str] = None) -> bool:
+        try:
+            journal = Journal(journal_path_for(path))
+            entries = journal.entries()
+        except Exception:
+            return False
+        if not entries:
+            return False
+        where = " deste projeto" if path else " de uma sessão anterior"
+        if not messagebox.askyesno("Recuperar alterações", f"Foram encontradas {len(entries)} alterações não salvas{where}.\nDeseja recuperá-las?"):
+            journal.discard()
+            return False
+        if self._journal is not None and self._journal is not journal:
+            self._journal.close()
+        self._journal = journal
+        self._replay_journal(entries)
+        return True
+
+    def _replay_journal(self, entries: list):
+        memory = self._mem_buckets()
+        last = None
+        self._history.clear()
+        self._journal_paused = True
+        try:
+            stash = None
+            for entry in entries:
+                op = entry.get("op", "")
+                if op == "reset":
+                    stash, self.flows = self.flows, {}
+                elif op == "reset_undo":
+                    if stash is not None:
+                        self.flows, stash = stash, None
+                    continue
+                last = apply_entry(self.flows, memory, entry) or last
+                self._mark_dirty(op, entry)
+        finally:
+            self._journal_paused = False
+        if not self.flows:
+            self.flows = {"Fluxo Padrão": []}
+        if last in self.flows:
+            self.current_flow = last
+        self.current_flow = self._ensure_flow(self.current_flow if self.current_flow in self.flows else next(iter(self.flows)))
+        self.flow_var.set(self.current_flow)
+        self._refresh_task_combos(); self._refresh_field_combos(); self._refresh_resp_combos()
+        self._refresh_flow_controls()
+        self._refresh_textbox()
+        if hasattr(self.flows, "pending") and self.flows.pending() and self._materialize_job is None:
+            self._materialize_job = self.after(50, self._materialize_step)
+
+    def _on_close(self):
+        try:
+            if self._save_worker.pending:
+                self._save_worker.wait(10.0)
+                self._poll_saves(notify=False)
+            self._journal_flush()
+            if self._journal is not None:
+                self._journal.close()
+        except Exception:
+            pass
+        self.destroy()
+
+def _attach_builder_to_RNBuilder():
+    def _build_rule(self: 'RNBuilder'):
+        parent = self.left_pane
+        self.builder_scroll = ctk.CTkScrollableFrame(parent, fg_color="transparent")
+        self.builder_scroll.pack(fill="both", expand=True, padx=(10, 6), pady=6)
+        self.builder_scroll.grid_columnconfigure(0, weight=1)
+        self._enable_scrollwheel(self.builder_scroll)
+
+        self.builder_container = scrollable_body(self.builder_scroll)
+        self.builder_container.grid_columnconfigure(0, weight=1)
+        self.builder_container.grid_rowconfigure(0, weight=4)
+        self.builder_container.grid_rowconfigure(1, weight=3)
+        self.builder_container.grid_rowconfigure(2, weight=5)
+
+        self.frm_gatilho_collapsible = CollapsibleGroup(
+            self.builder_container,
+            text="Gatilho",
+            start_expanded=True
+        )
+        self.frm_gatilho_collapsible.grid(row=0, column=0, padx=(0,0), pady=(0,10), sticky="nsew")
+        frm_gatilho_group = self.frm_gatilho_collapsible.get_inner_frame()
+        frm_gatilho_group.grid_columnconfigure(0, weight=1)
+
+        self.var_gatilho_tipo = tk.StringVar(value=GATILHOS[1])
+        gtbar = ctk.CTkFrame(frm_gatilho_group, fg_color="transparent")
+        gtbar.grid(row=0, column=0, padx=6, pady=6, sticky="ew")
+        gtbar.grid_columnconfigure(1, weight=1)
+        ctk.CTkLabel(gtbar, text="Gatilho:").grid(row=0, column=0, sticky="w")
+        ctk.CTkComboBox(
+            gtbar,
+            values=GATILHOS,
+            variable=self.var_gatilho_tipo,
+            command=lambda *_: self._refresh_gatilho_fields(),
+        ).grid(row=0, column=1, sticky="ew", padx=(6, 0))
+
+        self.var_obj = tk.StringVar(value="")
+        self.var_tarefa_ctx = tk.StringVar(value="")
+        self.var_campo = tk.StringVar(value="")
+        self.var_resposta = tk.StringVar(value="")
+        self.var_tarefa_done = tk.StringVar(value="")
+        self.var_evento = tk.StringVar(value="")
+
+        self.frm_gatilho = ctk.CTkFrame(frm_gatilho_group, fg_color="transparent")
+        self.frm_gatilho.grid(row=1, column=0, sticky="nsew", padx=6, pady=(0, 6))
+        self.frm_gatilho.grid_columnconfigure(0, weight=0, minsize=120)
+        self.frm_gatilho.grid_columnconfigure(1, weight=1)
+        self._refresh_gatilho_fields()
+
+        self.frm_cond_collapsible = CollapsibleGroup(
+            self.builder_container,
+            text="Condições adicionais",
+            start_expanded=True
+        )
+        self.frm_cond_collapsible.grid(row=1, column=0, padx=(0,0), pady=(0,10), sticky="nsew")
+        frm_cond_group = self.frm_cond_collapsible.get_inner_frame()
+        frm_cond_group.grid_columnconfigure(0, weight=1)
+
+        cond_hdr = ctk.CTkFrame(frm_cond_group, fg_color="transparent")
+        cond_hdr.grid(row=0, column=0, padx=6, pady=(6, 2), sticky="ew")
+        cond_hdr.grid_columnconfigure(0, weight=1)
+        cond_hdr.grid_columnconfigure(1, weight=1)
+        ctk.CTkLabel(cond_hdr, text="Condições adicionais:").grid(
+            row=0, column=0, columnspan=2, sticky="w"
+        )
+        self.var_conj = tk.StringVar(value="E")
+        ctk.CTkRadioButton(
+            cond_hdr,
+            text="Todas (E)",
+            variable=self.var_conj,
+            value="E",
+            command=self._schedule_preview,
+        ).grid(row=1, column=0, sticky="w", pady=(4, 0))
+        ctk.CTkRadioButton(
+            cond_hdr,
+            text="Qualquer (OU)",
+            variable=self.var_conj,
+            value="OU",
+            command=self._schedule_preview,
+        ).grid(row=1, column=1, sticky="w", pady=(4, 0), padx=(12, 0))
+
+        self.frm_conds = ctk.CTkFrame(frm_cond_group, fg_color="transparent")
+        self.frm_conds.grid(row=1, column=0, sticky="ew", padx=6)
+        self.frm_conds.grid_columnconfigure(0, weight=1)
+        self.frm_conds_body = self.frm_conds
+        self.frm_conds_body.grid_columnconfigure(0, weight=1)
+        self.cond_rows = []
+        self._row_pool = {}
+
+        cond_btnbar = ctk.CTkFrame(frm_cond_group, fg_color="transparent")
+        cond_btnbar.grid(row=2, column=0, padx=6, pady=(4, 6), sticky="ew")
+        cond_btnbar.grid_columnconfigure(0, weight=1)
+        cond_btnbar.grid_columnconfigure(1, weight=1)
+        ctk.CTkButton(
+            cond_btnbar,
+            text="+ Adicionar condição",
+            command=self._add_cond,
+        ).grid(row=0, column=0, sticky="ew", padx=(0, 6))
+        ctk.CTkButton(
+            cond_btnbar,
+            text="Limpar condições",
+            command=self._clear_conditions,
+        ).grid(row=0, column=1, sticky="ew")
+
+        self.frm_acao_collapsible = CollapsibleGroup(
+            self.builder_container,
+            text="Ações",
+            start_expanded=True
+        )
+        self.frm_acao_collapsible.grid(row=2, column=0, padx=(0,0), pady=(0,0), sticky="nsew")
+        frm_acao_group = self.frm_acao_collapsible.get_inner_frame()
+        frm_acao_group.grid_columnconfigure(0, weight=1)
+
+        ctk.CTkLabel(frm_acao_group, text="Ações:").grid(row=0, column=0, padx=6, pady=(6,2), sticky="w")
+        self.frm_acoes = ctk.CTkFrame(frm_acao_group, fg_color="transparent")
+        self.frm_acoes.grid(row=1, column=0, sticky="ew", padx=6)
+        self.frm_acoes.grid_columnconfigure(0, weight=1)
+        self.frm_acoes_body = self.frm_acoes
+        self.frm_acoes_body.grid_columnconfigure(0, weight=1)
+        self.acao_rows = []
+
+        acoes_btnbar = ctk.CTkFrame(frm_acao_group, fg_color="transparent")
+        acoes_btnbar.grid(row=2, column=0, padx=6, pady=(4, 2), sticky="ew")
+        acoes_btnbar.grid_columnconfigure(0, weight=1)
+        acoes_btnbar.grid_columnconfigure(1, weight=1)
+        ctk.CTkButton(
+            acoes_btnbar,
+            text="+ Adicionar ação",
+            command=self._add_acao,
+        ).grid(row=0, column=0, sticky="ew", padx=(0, 6))
+        ctk.CTkButton(
+            acoes_btnbar,
+            text="Limpar ações",
+            command=self._clear_actions,
+        ).grid(row=0, column=1, sticky="ew")
+
+        freq_bar = ctk.CTkFrame(frm_acao_group, fg_color="transparent")
+        freq_bar.grid(row=3, column=0, padx=6, pady=(8, 4), sticky="ew")
+        freq_bar.grid_columnconfigure(0, weight=1)
+        freq_bar.grid_columnconfigure(1, weight=0)
+        ctk.CTkLabel(freq_bar, text="Ações frequentes — Acionar fluxo:").grid(
+            row=0, column=0, columnspan=2, sticky="w"
+        )
+        self.var_freq = tk.StringVar(value="Cadastro")
+        flow_combo = ctk.CTkComboBox(
+            freq_bar,
+            values=[
+                "Cadastro", "Acordo", "Decisão", "Réplica", "Garantias", "Bloqueio",
+                "Penhora", "Encerramento", "Reativação", "Perícias", "Obrigações",
+            ],
+            variable=self.var_freq,
+        )
+        flow_combo.grid(row=1, column=0, sticky="ew", pady=(4, 0), padx=(0, 6))
+        ctk.CTkButton(
+            freq_bar,
+            text="Inserir",
+            command=self._insert_frequent_flow,
+        ).grid(row=1, column=1, sticky="ew", pady=(4, 0))
+
+        freq_ret = ctk.CTkFrame(frm_acao_group, fg_color="transparent")
+        freq_ret.grid(row=4, column=0, padx=6, pady=(8, 4), sticky="ew")
+        freq_ret.grid_columnconfigure(0, weight=2)
+        freq_ret.grid_columnconfigure(1, weight=1)
+        freq_ret.grid_columnconfigure(2, weight=1)
+        
+        ctk.CTkLabel(freq_ret, text="Retornar a tarefa:").grid(row=0, column=0, columnspan=3, sticky="w")
+        
+        self.var_freq_ret = tk.StringVar(value="")
+        cb_ret = ctk.CTkComboBox(freq_ret, values=self._mem_suggest("task"), variable=self.var_freq_ret)
+        cb_ret.grid(row=1, column=0, sticky="ew", pady=(4, 0), padx=(0, 6))
+        self._mem_register_task_combo(cb_ret)
+        self._mem_bind_combo_capture(cb_ret, lambda: self.var_freq_ret.get(), bucket="task")
+        
+        self.var_freq_ret_restart = tk.BooleanVar(value=True)
+        ctk.CTkCheckBox(
+            freq_ret,
+            text="Reiniciar SLA",
+            variable=self.var_freq_ret_restart,
+            onvalue=True,
+            offvalue=False,
+            command=self._schedule_preview,
+        ).grid(row=1, column=1, sticky="w", pady=(4, 0), padx=(6,6))
+        
+        btn_ret = ctk.CTkButton(freq_ret, text="Inserir", command=self._insert_frequent_return)
+        btn_ret.grid(row=1, column=2, sticky="ew", pady=(4, 0))
+
+        freq_close = ctk.CTkFrame(frm_acao_group, fg_color="transparent")
+        freq_close.grid(row=5, column=0, padx=6, pady=(8, 4), sticky="ew")
+        freq_close.grid_columnconfigure(0, weight=0)
+        freq_close.grid_columnconfigure(1, weight=1)
+        freq_close.grid_columnconfigure(2, weight=1)
+        
+        ctk.CTkLabel(freq_close, text="Encerramento:").grid(row=0, column=0, sticky="w", padx=(0, 6))
+        
+        ctk.CTkButton(
+            freq_close, text="Parcial",
+            command=lambda: self._insert_frequent_close(parcial=True)
+        ).grid(row=0, column=1, sticky="ew", padx=(0, 6))
+        
+        ctk.CTkButton(
+            freq_close, text="Total",
+            command=lambda: self._insert_frequent_close(parcial=False)
+        ).grid(row=0, column=2, sticky="ew")
+
+        freq_cond = ctk.CTkFrame(frm_acao_group, fg_color="transparent")
+        freq_cond.grid(row=6, column=0, padx=6, pady=(8, 6), sticky="ew")
+        
+        freq_cond.grid_columnconfigure(0, weight=0)
+        freq_cond.grid_columnconfigure(1, weight=3)
+        freq_cond.grid_columnconfigure(2, weight=0)
+        freq_cond.grid_columnconfigure(3, weight=2)
+
+        ctk.CTkLabel(freq_cond, text="Condição rápida (Campo / Resposta):").grid(
+            row=0, column=0, columnspan=4, sticky="w"
+        )
+        
+        ctk.CTkLabel(freq_cond, text="Campo:").grid(row=1, column=0, sticky="w", pady=(4, 0), padx=(0, 6))
+        self.var_freq_cond_field = tk.StringVar(value="")
+        cb_field = ctk.CTkComboBox(
+            freq_cond,
+            values=self._mem_suggest("field"),
+            variable=self.var_freq_cond_field,
+        )
+        cb_field.grid(row=1, column=1, sticky="ew", pady=(4, 0))
+        self._mem_register_field_combo(cb_field)
+        self._mem_bind_combo_capture(cb_field, lambda: self.var_freq_cond_field.get(), bucket="field")
+
+        ctk.CTkLabel(freq_cond, text="Resposta:").grid(row=1, column=2, sticky="w", pady=(4, 0), padx=(10, 6))
+        self.var_freq_cond_resp = tk.StringVar(value="")
+        ent_resp = ctk.CTkEntry(freq_cond, textvariable=self.var_freq_cond_resp)
+        ent_resp.grid(row=1, column=3, sticky="ew", pady=(4, 0))
+        
+        ent_resp.bind("<Return>", lambda e: self._insert_frequent_condition())
+        ent_resp.bind("<FocusOut>", lambda e: self._schedule_preview())
+
+        ctk.CTkButton(
+            freq_cond,
+            text="Adicionar",
+            command=self._insert_frequent_condition,
+        ).grid(row=2, column=0, columnspan=4, sticky="ew", pady=(8, 0))
+
+
+        if not self.cond_rows:
+            self._add_cond()
+        if not self.acao_rows:
+            self._add_acao()
+
+        for v in (
+            self.var_gatilho_tipo, self.var_obj, self.var_tarefa_ctx, self.var_campo,
+            self.var_resposta, self.var_tarefa_done, self.var_evento, self.var_conj
+        ):
+            v.trace_add("write", lambda *a: self._schedule_preview())
+
+    def _reset_builder_defaults(self: 'RNBuilder'):
+        self.var_gatilho_tipo.set(GATILHOS[1])
+        self.var_obj.set("")
+        self.var_tarefa_ctx.set("")
+        self.var_campo.set("")
+        self.var_resposta.set("")
+        self.var_tarefa_done.set("")
+        self.var_evento.set("")
+        self._refresh_gatilho_fields()
+
+    def _destroy_rows(self: 'RNBuilder', rows):
+        for r in list(rows):
+            try:
+                self._release_row(r)
+            except Exception:
+                pass
+        rows.clear()
+
+    def _release_row(self: 'RNBuilder', row):
+        # Linhas descartadas voltam ao pool (fora do grid) para serem reaproveitadas
+        pool = self._row_pool.setdefault(type(row), [])
+        if row in pool:
+            return
+        if len(pool) >= ROW_POOL_MAX:
+            row.destroy()
+            return
+        row.grid_forget()
+        pool.append(row)
+
+    def _relayout_cond_rows(self: 'RNBuilder'):
+        for idx, widget in enumerate(getattr(self, 'cond_rows', [])):
+            try:
+                widget.grid(row=idx, column=0, sticky="ew", padx=0, pady=(0, 6))
+            except Exception:
+                pass
+
+    def _relayout_acao_rows(self: 'RNBuilder'):
+        for idx, widget in enumerate(getattr(self, 'acao_rows', [])):
+            try:
+                widget.grid(row=idx, column=0, sticky="ew", padx=0, pady=(0, 6))
+            except Exception:
+                pass
+
+    def _ensure_min_builder_rows(self: 'RNBuilder'):
+        try:
+            if hasattr(self, 'frm_conds_body') and not getattr(self, 'cond_rows', []):
+                self._add_cond()
+            if hasattr(self, 'frm_acoes_body') and not getattr(self, 'acao_rows', []):
+                self._add_acao()
+        except Exception:
+            pass
+
+    def _clear_conditions(self: 'RNBuilder', *, confirm=True):
+        if not getattr(self, 'cond_rows', []):
+            if hasattr(self, 'frm_conds_body'):
+                self._add_cond()
+            return
+        if (not confirm) or messagebox.askyesno("Limpar condições", "Remover todas as condições?"):
+            self._destroy_rows(self.cond_rows)
+            if hasattr(self, 'frm_conds_body'):
+                self._add_cond()
+
+    def _clear_actions(self: 'RNBuilder', *, confirm=True):
+        if not getattr(self, 'acao_rows', []):
+            if hasattr(self, 'frm_acoes_body'):
+                self._add_acao()
+            return
+        if (not confirm) or messagebox.askyesno("Limpar ações", "Remover todas as ações?"):
+            self._destroy_rows(self.acao_rows)
+            if hasattr(self, 'frm_acoes_body'):
+                self._add_acao()
+
+    def _on_cond_row_removed(self: 'RNBuilder', row):
+        if row in self.cond_rows:
+            self.cond_rows.remove(row)
+            self._relayout_cond_rows()
+        self.after_idle(self._ensure_min_builder_rows)
+
+    def _on_acao_row_removed(self: 'RNBuilder', row):
+        if row in self.acao_rows:
+            self.acao_rows.remove(row)
+            self._relayout_acao_rows()
+        self.after_idle(self._ensure_min_builder_rows)
+
+    def _new_cond_row(self: 'RNBuilder') -> LinhaCondicao:
+        pool = self._row_pool.get(LinhaCondicao)
+        if pool:
+            row = pool.pop()
+            row.reset()
+        else:
+            row = LinhaCondicao(
+                self.frm_conds_body,
+                on_change=self._schedule_preview,
+                on_remove=self._on_cond_row_removed,
+                on_release=self._release_row,
+            )
+        self.cond_rows.append(row)
+        if not self._builder_batch:
+            self._relayout_cond_rows()
+            self._schedule_preview()
+            self.after(100, self.builder_scroll._parent_canvas.yview_moveto, 1.0)
+        return row
+
+    def _new_acao_row(self: 'RNBuilder', tipo: Optional[str] = None) -> LinhaAcao:
+        if self.var_resp_preset.get() == RESP_TEXT_FREE:
+            preset_value = self.var_resp_preset_free.get().strip()
+            preset_free = self.var_resp_preset_free.get()
+        else:
+            preset_value = self.var_resp_preset.get()
+            preset_free = ""
+        pool = self._row_pool.get(LinhaAcao)
+        if pool:
+            row = pool.pop()
+            row.reset(default_resp=preset_value, default_resp_free=preset_free)
+        else:
+            row = LinhaAcao(self.frm_acoes_body, on_change=self._schedule_preview,
+                            on_remove=self._on_acao_row_removed,
+                            on_release=self._release_row,
+                            default_resp=preset_value,
+                            default_resp_free=preset_free,
+                            row_list_key="acao_rows")
+        if tipo:
+            row.var_tipo.set(tipo); row._refresh()
+        self.acao_rows.append(row)
+        if not self._builder_batch:
+            self._relayout_acao_rows()
+            self._schedule_preview()
+            self.after(100, self.builder_scroll._parent_canvas.yview_moveto, 1.0)
+        return row
+
+    def _add_cond(self: 'RNBuilder'):
+        self._new_cond_row()
+
+    def _add_acao(self: 'RNBuilder'):
+        self._new_acao_row()
+
+    def _insert_frequent_flow(self: 'RNBuilder'):
+        try:
+            nome = (self.var_freq.get() or '').strip()
+            if not nome:
+                return
+            row = self._new_acao_row("Acionar Fluxo")
+            row.var_fluxo.set(nome)
+            self.var_freq.set("Cadastro")
+        except Exception as e:
+            messagebox.showerror("Falha ao inserir ação frequente", str(e))
+
+    def _insert_frequent_return(self: 'RNBuilder'):
+        try:
+            tarefa = (self.var_freq_ret.get() or '').strip()
+            if not tarefa:
+                return
+            self._mem_add_task(tarefa)
+            row = self._new_acao_row("Retornar a Tarefa")
+            row.var_ret_tarefa.set(tarefa)
+            row.var_ret_restart.set(bool(self.var_freq_ret_restart.get()))
+            self.var_freq_ret.set("")
+        except Exception as e:
+            messagebox.showerror("Falha ao inserir 'Retornar a tarefa'", str(e))
+
+    def _insert_frequent_condition(self: 'RNBuilder'):
+        try:
+            campo = (self.var_freq_cond_field.get() or '').strip()
+            resp  = (self.var_freq_cond_resp.get() or '').strip()
+            if not campo or not resp:
+                messagebox.showwarning("Condição incompleta", "Informe o Campo e a Resposta.")
+                return
+            self._mem_add_field(campo)
+            row = self._new_cond_row()
+            row.var_campo.set(campo)
+            row.var_op.set("for respondido como")
+            row.var_valor.set(resp)
+            self.var_freq_cond_field.set("")
+            self.var_freq_cond_resp.set("")
+        except Exception as e:
+            messagebox.showerror("Falha ao inserir condição rápida", str(e))
+
+    def _insert_frequent_close(self: 'RNBuilder', *, parcial: bool):
+        try:
+            self._new_acao_row("Encerrar Fluxo (Parcial)" if parcial else "Encerrar Fluxo (Total)")
+        except Exception as e:
+            messagebox.showerror("Falha ao inserir ação de encerramento", str(e))
+
+    def _refresh_gatilho_fields(self: 'RNBuilder'):
+        for w in self.frm_gatilho.winfo_children():
+            w.destroy()
+        
+        t = self.var_gatilho_tipo.get()
+        if t == "Sempre que inserido novo OBJETO":
+            ctk.CTkLabel(self.frm_gatilho, text="Objeto:").grid(
+                row=0, column=0, padx=(0, 6), pady=3, sticky="e"
+            )
+            ctk.CTkEntry(self.frm_gatilho, textvariable=self.var_obj).grid(
+                row=0, column=1, padx=(0, 0), pady=3, sticky="ew"
+            )
+        elif t == "Em TAREFA se CAMPO for RESPOSTA":
+            ctk.CTkLabel(self.frm_gatilho, text="Tarefa:").grid(
+                row=0, column=0, padx=(0, 6), pady=3, sticky="e"
+            )
+            cb_t = ctk.CTkComboBox(
+                self.frm_gatilho,
+                values=self._mem_suggest("task"),
+                variable=self.var_tarefa_ctx,
+            )
+            cb_t.grid(row=0, column=1, padx=0, pady=3, sticky="ew")
+            self._mem_register_task_combo(cb_t)
+            self._mem_bind_combo_capture(cb_t, lambda: self.var_tarefa_ctx.get(), "task")
+
+            ctk.CTkLabel(self.frm_gatilho, text="Campo:").grid(
+                row=1, column=0, padx=(0, 6), pady=3, sticky="e"
+            )
+            cb_c = ctk.CTkComboBox(
+                self.frm_gatilho,
+                values=self._mem_suggest("field"),
+                variable=self.var_campo,
+            )
+            cb_c.grid(row=1, column=1, padx=0, pady=3, sticky="ew")
+            self._mem_register_field_combo(cb_c)
+            self._mem_bind_combo_capture(cb_c, lambda: self.var_campo.get(), "field")
+
+            ctk.CTkLabel(self.frm_gatilho, text="Resposta:").grid(
+                row=2, column=0, padx=(0, 6), pady=3, sticky="e"
+            )
+            ent_r = ctk.CTkEntry(self.frm_gatilho, textvariable=self.var_resposta)
+            ent_r.grid(row=2, column=1, padx=0, pady=3, sticky="ew")
+            ent_r.bind("<Return>", lambda e: self._schedule_preview())
+            ent_r.bind("<FocusOut>", lambda e: self._schedule_preview())
+        elif t == "Concluída TAREFA":
+            ctk.CTkLabel(self.frm_gatilho, text="Tarefa concluída:").grid(
+                row=0, column=0, padx=(0, 6), pady=3, sticky="e"
+            )
+            cb_done = ctk.CTkComboBox(
+                self.frm_gatilho,
+                values=self._mem_suggest("task"),
+                variable=self.var_tarefa_done,
+            )
+            cb_done.grid(row=0, column=1, padx=0, pady=3, sticky="ew")
+            self._mem_register_task_combo(cb_done)
+            self._mem_bind_combo_capture(cb_done, lambda: self.var_tarefa_done.get(), "task")
+        else:
+            ctk.CTkLabel(self.frm_gatilho, text="Evento:").grid(
+                row=0, column=0, padx=(0, 6), pady=3, sticky="e"
+            )
+            ctk.CTkEntry(self.frm_gatilho, textvariable=self.var_evento).grid(
+                row=0, column=1, padx=0, pady=3, sticky="ew"
+            )
+        self._schedule_preview()
+
+    def _gatilho_to_dict(self: 'RNBuilder') -> dict:
+        return {
+            "tipo": self.var_gatilho_tipo.get(),
+            "obj": self.var_obj.get(),
+            "tarefa": self.var_tarefa_ctx.get(),
+            "campo": self.var_campo.get(),
+            "resposta": self.var_resposta.get(),
+            "tarefa_done": self.var_tarefa_done.get(),
+            "evento": self.var_evento.get(),
+        }
+
+    def _collect_builder_into(self: 'RNBuilder', proj: dict):
+        # Regra em construção como dados simples, inclusive linhas ainda vazias
+        proj["builder"] = {
+            "gatilho": self._gatilho_to_dict(),
+            "conds": [r.to_dict() for r in getattr(self, 'cond_rows', [])],
+            "conj": self.var_conj.get(),
+            "acoes": [r.to_dict() for r in getattr(self, 'acao_rows', [])],
+        }
+
+    def _apply_builder_from(self: 'RNBuilder', proj: dict):
+        builder = proj.get("builder")
+        if not builder:
+            return  # projeto salvo sem o construtor: mantém a regra atual
+        g = builder.get("gatilho") or {}
+        # Restauração em lote: as linhas são reidratadas sem preview/relayout a cada variável,
+        # e o grid e o preview são atualizados uma vez no final
+        self._builder_batch += 1
+        try:
+            self.var_gatilho_tipo.set(g.get("tipo") or GATILHOS[1])
+            self.var_obj.set(g.get("obj", ""))
+            self.var_tarefa_ctx.set(g.get("tarefa", ""))
+            self.var_campo.set(g.get("campo", ""))
+            self.var_resposta.set(g.get("resposta", ""))
+            self.var_tarefa_done.set(g.get("tarefa_done", ""))
+            self.var_evento.set(g.get("evento", ""))
+            self.var_conj.set(builder.get("conj") or "E")
+            self._refresh_gatilho_fields()
+
+            self._destroy_rows(self.cond_rows)
+            self._destroy_rows(self.acao_rows)
+            for d in builder.get("conds") or []:
+                self._new_cond_row().from_dict(d)
+            for d in builder.get("acoes") or []:
+                self._new_acao_row().from_dict(d)
+            if not self.cond_rows:
+                self._new_cond_row()
+            if not self.acao_rows:
+                self._new_acao_row()
+        finally:
+            self._builder_batch -= 1
+        self._relayout_cond_rows()
+        self._relayout_acao_rows()
+        self._update_preview()
+
+    def _when_text(self: 'RNBuilder') -> str:
+        return _when_to_text(self._gatilho_to_dict())
+
+    def _cond_text(self: 'RNBuilder') -> str:
+        texts = [r.to_text() for r in getattr(self, 'cond_rows', [])]
+        texts = [t for t in texts if t]
+        conj = getattr(self, 'var_conj', tk.StringVar(value='E')).get()
+        return _join_conditions(texts, conj) if texts else ""
+
+    def _acoes_text(self: 'RNBuilder', rows) -> str:
+        return _acoes_join(r.to_text() for r in rows)
+
+    def _move_row(self: 'RNBuilder', widget, delta, row_list, frame_parent):
+        try:
+            idx = row_list.index(widget)
+        except ValueError:
+            return
+
+        new_idx = idx + delta
+        if not (0 <= new_idx < len(row_list)):
+            return
+
+        row_list[idx], row_list[new_idx] = row_list[new_idx], row_list[idx]
+
+        if row_list and isinstance(row_list[0], LinhaCondicao):
+            self._relayout_cond_rows()
+        else:
+            self._relayout_acao_rows()
+
+        self._schedule_preview()
+
+    RNBuilder._build_rule = _build_rule
+    RNBuilder._reset_builder_defaults = _reset_builder_defaults
+    RNBuilder._destroy_rows = _destroy_rows
+    RNBuilder._release_row = _release_row
+    RNBuilder._relayout_cond_rows = _relayout_cond_rows
+    RNBuilder._relayout_acao_rows = _relayout_acao_rows
+    RNBuilder._ensure_min_builder_rows = _ensure_min_builder_rows
+    RNBuilder._clear_conditions = _clear_conditions
+    RNBuilder._clear_actions = _clear_actions
+    RNBuilder._on_cond_row_removed = _on_cond_row_removed
+    RNBuilder._on_acao_row_removed = _on_acao_row_removed
+    RNBuilder._new_cond_row = _new_cond_row
+    RNBuilder._new_acao_row = _new_acao_row
+    RNBuilder._add_cond = _add_cond
+    RNBuilder._add_acao = _add_acao
+    RNBuilder._insert_frequent_flow = _insert_frequent_flow
+    RNBuilder._insert_frequent_return = _insert_frequent_return
+    RNBuilder._insert_frequent_condition = _insert_frequent_condition
+    RNBuilder._insert_frequent_close = _insert_frequent_close
+    RNBuilder._refresh_gatilho_fields = _refresh_gatilho_fields
+    RNBuilder._gatilho_to_dict = _gatilho_to_dict
+    RNBuilder._collect_builder_into = _collect_builder_into
+    RNBuilder._apply_builder_from = _apply_builder_from
+    RNBuilder._when_text = _when_text
+    RNBuilder._cond_text = _cond_text
+    RNBuilder._acoes_text = _acoes_text
+    RNBuilder._move_row = _move_row
+
+_attach_builder_to_RNBuilder()
+
+
+def _attach_panels_to_RNBuilder():
+    def _build_panels(self: 'RNBuilder'):
+        parent = self.right_pane
+        parent.grid_columnconfigure(0, weight=1)
+        parent.grid_rowconfigure(0, weight=4)
+        parent.grid_rowconfigure(1, weight=5)
+
+        # Só o esqueleto é criado aqui; o conteúdo de cada grupo é montado na primeira exibição
+        self._panels_pending = 2
+        self.preview_collapsible = CollapsibleGroup(
+            parent,
+            text="Pré-visualização da RN atual",
+            start_expanded=True,
+            build=self._build_preview_group,
+        )
+        self.preview_collapsible.grid(row=0, column=0, padx=(0,0), pady=(0,8), sticky="nsew")
+
+        self.rn_collapsible = CollapsibleGroup(
+            parent,
+            text="RNs (lista final)",
+            start_expanded=True,
+            build=self._build_rn_group,
+        )
+        self.rn_collapsible.grid(row=1, column=0, padx=(0,0), pady=(0,0), sticky="nsew")
+
+        self.start_idx.trace_add("write", lambda *a: self._refresh_textbox())
+
+    def _panel_built(self: 'RNBuilder', phase: str):
+        timer = self._startup_timer
+        if timer is not None:
+            timer.mark(phase)
+        self._panels_pending -= 1
+        if self._panels_pending == 0 and timer is not None:
+            self.after_idle(lambda: (timer.mark("primeiro quadro completo"), timer.report()))
+
+    def _build_preview_group(self: 'RNBuilder', preview_group):
+        preview_group.grid_rowconfigure(0, weight=1)
+        preview_group.grid_columnconfigure(0, weight=1)
+
+        self.prev_box = SafeCTkTextbox(preview_group)
+        self.prev_box.grid(row=0, column=0, sticky="nsew", padx=0, pady=(0, 8))
+
+        try:
+            self.prev_box.configure(wrap="word")
+        except Exception:
+            pass
+
+        left_btnbar = ctk.CTkFrame(preview_group, fg_color="transparent")
+        left_btnbar.grid(row=1, column=0, sticky="w", padx=0, pady=(0, 2))
+        ctk.CTkButton(left_btnbar, text="Adicionar RN", command=self._add_rn, width=160).pack(side="left", padx=(0, 6))
+        ctk.CTkButton(left_btnbar, text="Adicionar RN e preparar oposto (Sim/Não)",
+                      command=self._add_rn_and_prepare_opposite, width=300).pack(side="left", padx=(0, 6))
+        ctk.CTkButton(left_btnbar, text="Limpar pré-visualização", command=self._clear_preview, width=200).pack(side="left")
+
+        self._update_preview()
+        self._panel_built("painel: pré-visualização")
+
+    def _build_rn_group(self: 'RNBuilder', rn_group):
+        rn_group.grid_rowconfigure(2, weight=2)
+        rn_group.grid_rowconfigure(3, weight=3)
+        rn_group.grid_columnconfigure(0, weight=1)
+
+        flow_bar = ctk.CTkFrame(rn_group, fg_color="transparent")
+        flow_bar.grid(row=0, column=0, sticky="ew", padx=0, pady=(0, 6))
+        flow_bar.grid_columnconfigure(1, weight=1)
+
+        ctk.CTkLabel(flow_bar, text="Fluxo:", font=ctk.CTkFont(size=13, weight="bold")).grid(row=0, column=0, sticky="w", padx=(0, 8))
+
+        self.flow_combo = ctk.CTkComboBox(
+            flow_bar,
+            variable=self.flow_var,
+            values=self._get_flow_names(),
+            command=self._on_flow_selected,
+            width=220,
+        )
+        self.flow_combo.grid(row=0, column=1, sticky="w", pady=2)
+
+        flow_btns = ctk.CTkFrame(flow_bar, fg_color="transparent")
+        flow_btns.grid(row=0, column=2, sticky="e", padx=(8, 0))
+        ctk.CTkButton(flow_btns, text="Novo", width=70, command=self._new_flow).pack(side="left", padx=(0, 6))
+        ctk.CTkButton(flow_btns, text="Renomear", width=90, command=self._rename_flow).pack(side="left", padx=(0, 6))
+        ctk.CTkButton(flow_btns, text="Excluir", width=80, command=self._delete_flow, fg_color=DANGER_BG, hover_color=DANGER_HOVER).pack(side="left")
+
+        right_btnbar = ctk.CTkFrame(rn_group, fg_color="transparent")
+        right_btnbar.grid(row=1, column=0, sticky="w", padx=0, pady=(0, 6))
+        ctk.CTkButton(right_btnbar, text="Copiar RN", command=self._copy_single_rn, width=120).pack(side="left", padx=(0, 6))
+        ctk.CTkButton(right_btnbar, text="Copiar tudo", command=self._copy_all, width=110).pack(side="left", padx=(0, 6))
+        ctk.CTkButton(right_btnbar, text="Salvar .txt", command=self._save_txt, width=110).pack(side="left", padx=(0, 6))
+        ctk.CTkButton(right_btnbar, text="Limpar RNs", command=lambda: self._clear_rns(confirm=True), width=110).pack(side="left")
+
+        self.rn_mgr = VirtualList(rn_group, make_row=self._make_rn_mgr_row, bind_row=self._bind_rn_mgr_row, height=200)
+        self.rn_mgr.grid(row=2, column=0, sticky="nsew", padx=0, pady=(0, 6))
+
+        self.txt = ctk.CTkTextbox(rn_group)
+        self.txt.grid(row=3, column=0, sticky="nsew", padx=0, pady=0)
+        try:
+            self.txt.configure(wrap="word")
+        except Exception:
+            pass
+
+        self._refresh_flow_controls()
+        self._refresh_textbox()
+        self._panel_built("painel: lista de RNs")
+
+    def _set_preview_text(self: 'RNBuilder', txt: str):
+        try:
+            self.prev_box.configure(state="normal")
+            self.prev_box.delete("1.0", "end")
+            self.prev_box.insert("1.0", txt)
+            self.prev_box.configure(state="disabled")
+        except Exception:
+            pass
+
+    def _clear_preview(self: 'RNBuilder'):
+        try:
+            self.prev_box.configure(state="normal")
+            self.prev_box.delete("1.0", "end")
+            self.prev_box.configure(state="disabled")
+        except Exception:
+            pass
+
+    def _truncate(self: 'RNBuilder', s: str, n: int = 100) -> str:
+        s = (s or "").replace("\n", " ").strip()
+        return s if len(s) <= n else s[: n - 1] + "…"
+
+    def _make_rn_mgr_row(self: 'RNBuilder', parent):
+        row = ctk.CTkFrame(parent)
+        row.grid_columnconfigure(0, weight=1)
+        row.index = -1
+        row.bound = None
+        row.label = ctk.CTkLabel(row, text="", anchor="w")
+        row.label.grid(row=0, column=0, sticky="w", padx=(4, 6))
+        btns = ctk.CTkFrame(row, fg_color="transparent")
+        btns.grid(row=0, column=1, sticky="e")
+        row.up = ctk.CTkButton(btns, text="↑", width=28, command=lambda: self._move_rn(row.index, -1))
+        row.down = ctk.CTkButton(btns, text="↓", width=28, command=lambda: self._move_rn(row.index, +1))
+        edit = ctk.CTkButton(btns, text="Editar", width=70, command=lambda: self._edit_rn(row.index))
+        delete = ctk.CTkButton(btns, text="Excluir", width=70, command=lambda: self._delete_rn(row.index))
+        row.up.pack(side="left", padx=(0, 4))
+        row.down.pack(side="left", padx=(0, 8))
+        edit.pack(side="left", padx=(0, 6))
+        delete.pack(side="left")
+        return row
+
+    def _bind_rn_mgr_row(self: 'RNBuilder', row, i: int):
+        texts = self._rn_mgr_texts
+        row.index = i
+        # Só reconfigura o que mudou (configure em widgets CTk força redesenho)
+        state = (texts[i], i == 0, i == len(texts) - 1)
+        if row.bound == state:
+            return
+        if row.bound is None or row.bound[0] != state[0]:
+            row.label.configure(text=self._truncate(texts[i]))
+        row.up.configure(state="disabled" if state[1] else "normal")
+        row.down.configure(state="disabled" if state[2] else "normal")
+        row.bound = state
+
+    def _rebuild_rn_manager(self: 'RNBuilder', texts=None):
+        self._rn_mgr_texts = texts if texts is not None else self._current_rn_texts()
+        self.rn_mgr.set_count(len(self._rn_mgr_texts))
+
+    def _refresh_textbox(self: 'RNBuilder'):
+        if getattr(self, "txt", None) is None:
+            return  # painel ainda não montado; _build_rn_group atualiza ao montar
+        texts = self._current_rn_texts()
+        shown = getattr(self, '_txt_shown', None)
+
+        self.txt.configure(state="normal")
+        try:
+            if shown is None:
+                raise LookupError
+            self._patch_textbox(shown, texts)
+        except Exception:
+            self.txt.delete("1.0", "end")
+            self.txt.insert("1.0", RN_SEP.join(texts))
+        self.txt.configure(state="disabled")
+        self._txt_shown = texts
+        self._rebuild_rn_manager(texts)
+
+    def _patch_textbox(self: 'RNBuilder', old: list, new: list):
+        # Reescreve só o trecho entre o prefixo e o sufixo comuns (RNs inalteradas ficam no widget)
+        n_old, n_new = len(old), len(new)
+        lim = min(n_old, n_new)
+        p = 0
+        while p < lim and old[p] == new[p]:
+            p += 1
+        s = 0
+        while s < lim - p and old[n_old - 1 - s] == new[n_new - 1 - s]:
+            s += 1
+        removed = old[p:n_old - s]
+        added = new[p:n_new - s]
+        if not removed and not added:
+            return
+
+        sep = len(RN_SEP)
+        # Índice do início da RN p, contado a partir do lado mais curto do texto
+        if p <= s:
+            start = f"1.0+{sum(_tk_len(t) + sep for t in old[:p])}c"
+        else:
+            tail = sum(_tk_len(t) + sep for t in old[n_old - s:]) + sum(_tk_len(t) + sep for t in removed) - sep
+            start = self.txt.index(f"end-1c-{tail}c")
+        removed_len = sum(_tk_len(t) for t in removed) + sep * max(len(removed) - 1, 0)
+        body = RN_SEP.join(added)
+
+        if removed and added:
+            self.txt.delete(start, f"{start}+{removed_len}c")
+            self.txt.insert(start, body)
+        elif added:
+            if p < n_old:
+                self.txt.insert(start, body + RN_SEP)
+            elif n_old:
+                self.txt.insert("end-1c", RN_SEP + body)
+            else:
+                self.txt.insert("1.0", body)
+        elif s:
+            self.txt.delete(start, f"{start}+{removed_len + sep}c")
+        elif p:
+            self.txt.delete(f"{start}-{sep}c", f"{start}+{removed_len}c")
+        else:
+            self.txt.delete("1.0", "end")
+
+    def _copy_all(self: 'RNBuilder'):
+        txt = self.txt.get("1.0", "end").strip()
+        if not txt:
+            messagebox.showinfo("Nada para copiar", "Adicione ao menos uma RN.")
+            return
+        self.clipboard_clear()
+        self.clipboard_append(txt)
+        messagebox.showinfo("Copiado", "Todas as RNs foram copiadas.")
+
+    def _copy_single_rn(self: 'RNBuilder'):
+        try:
+            sel = self.txt.get("sel.first", "sel.last").strip()
+        except Exception:
+            sel = ""
+        if sel:
+            payload = sel
+        elif self._current_rns():
+            payload = self._current_rn_texts()[-1]
+        else:
+            payload = self.prev_box.get("1.0", "end").strip()
+        if payload:
+            self.clipboard_clear()
+            self.clipboard_append(payload)
+            messagebox.showinfo("Copiado", "RN copiada para a área de transferência.")
+        else:
+            messagebox.showinfo("Nada para copiar", "Não há RN para copiar.")
+
+    def _save_txt(self: 'RNBuilder'):
+        txt = self.txt.get("1.0", "end").strip()
+        if not txt:
+            messagebox.showinfo("Nada para salvar", "Adicione ao menos uma RN.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Salvar RNs",
+            defaultextension=".txt",
+            filetypes=[("Texto", "*.txt"), ("Todos", "*.*")],
+            initialfile="rns_geradas.txt",
+        )
+        if path:
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(txt)
+                messagebox.showinfo("Salvo", f"Arquivo salvo em:\n{path}")
+            except Exception as e:
+                messagebox.showerror("Erro ao salvar", str(e))
+
+    def _move_rn(self: 'RNBuilder', idx: int, delta: int):
+        rns = self._current_rns()
+        j = idx + delta
+        if 0 <= idx < len(rns) and 0 <= j < len(rns):
+            rns[idx], rns[j] = rns[j], rns[idx]
+            move = {"op": "rn_move", "flow": self.current_flow, "i": idx, "j": j}
+            self._record_edit([move], [move])
+            self._refresh_textbox()
+            self.rn_mgr.see(j)
+
+    def _edit_rn(self: 'RNBuilder', idx: int):
+        rns = self._current_rns()
+        if not (0 <= idx < len(rns)):
+            return
+        flow = self.current_flow
+        top = ctk.CTkToplevel(self)
+        top.title(f"Editar RN #{idx + 1}")
+        try:
+            _apply_dark_title_bar(top)
+        except Exception:
+            pass
+        top.transient(self)
+        top.lift()
+        try:
+            top.attributes("-topmost", True)
+            top.after(300, lambda: top.attributes("-topmost", False))
+        except Exception:
+            pass
+        top.grab_set()
+        top.focus_force()
+        box = ctk.CTkTextbox(top)
+        box.pack(expand=True, fill="both", padx=10, pady=10)
+        box.insert("1.0", rns[idx].render(self._start_index() + idx))
+        btnbar = ctk.CTkFrame(top, fg_color="transparent")
+        btnbar.pack(fill="x", padx=10, pady=(0, 10))
+
+        def _save():
+            txt = box.get("1.0", "end").strip()
+            if txt:
+                old = rns[idx].to_dict()
+                rns[idx].set_text(txt)
+                self._record_edit(
+                    [{"op": "rn_edit", "flow": flow, "i": idx, "text": txt}],
+                    [{"op": "rn_replace", "flow": flow, "i": idx, "rec": old}],
+                )
+                self._refresh_textbox()
+            top.destroy()
+
+        ctk.CTkButton(btnbar, text="Salvar", command=_save, width=120).pack(side="right")
+        ctk.CTkButton(btnbar, text="Cancelar", command=top.destroy, width=120).pack(side="right", padx=(0, 8))
+
+        _center_window(top, width=760, height=440, parent=self)
+
+    def _delete_rn(self: 'RNBuilder', idx: int):
+        rns = self._current_rns()
+        if not (0 <= idx < len(rns)):
+            return
+        if messagebox.askyesno("Excluir RN", f"Remover a RN #{idx + 1}?"):
+            old = rns.pop(idx).to_dict()
+            self._record_edit(
+                [{"op": "rn_delete", "flow": self.current_flow, "i": idx}],
+                [{"op": "rn_add", "flow": self.current_flow, "index": idx, "rec": old}],
+            )
+            self._refresh_textbox()
+
+    def _schedule_preview(self: 'RNBuilder', *_):
+        # Marca o preview como sujo; várias mudanças seguidas geram uma só renderização
+        self._preview_stats["requested"] += 1
+        if self._builder_batch:
+            self._preview_stats["skipped"] += 1
+            return
+        if self._preview_job is not None:
+            self._preview_stats["skipped"] += 1
+            return
+        if self.preview_interval_ms > 0:
+            self._preview_job = self.after(self.preview_interval_ms, self._flush_preview)
+        else:
+            self._preview_job = self.after_idle(self._flush_preview)
+
+    def _flush_preview(self: 'RNBuilder'):
+        self._preview_job = None
+        self._update_preview()
+
+    def preview_stats(self: 'RNBuilder') -> dict:
+        return dict(self._preview_stats)
+
+    def _update_preview(self: 'RNBuilder'):
+        if self._preview_job is not None:
+            try:
+                self.after_cancel(self._preview_job)
+            except Exception:
+                pass
+            self._preview_job = None
+        if getattr(self, "prev_box", None) is None:
+            return  # painel ainda não montado; _build_preview_group renderiza ao montar
+        self._preview_stats["rendered"] += 1
+        try:
+            when = self._when_text()
+            cond  = self._cond_text()
+            acoes = self._acoes_text(getattr(self, 'acao_rows', []))
+
+            self.prev_box.configure(state="normal")
+            self.prev_box.delete("1.0", "end")
+
+            final_txt = _compose_preview(when, cond, acoes) or _t("preview_placeholder")
+
+            self.prev_box.insert("end", final_txt)
+
+        except Exception as e:
+            try:
+                self.prev_box.delete("1.0", "end")
+                self.prev_box.insert("end", f"Erro no preview: {e}")
+            except Exception:
+                pass
+        finally:
+            try:
+                self.prev_box.configure(state="disabled")
+            except Exception:
+                pass
+
+    def _add_rn(self: 'RNBuilder'):
+        acoes = self._acoes_text(getattr(self, 'acao_rows', []))
+        if not acoes:
+            messagebox.showwarning("Faltam ações", "Adicione pelo menos uma ação.")
+            return
+        record = RNRecord(
+            gatilho={k: v for k, v in self._gatilho_to_dict().items() if v},
+            conds=[r.to_dict() for r in getattr(self, 'cond_rows', []) if r.to_text()],
+            conj=self.var_conj.get(),
+            acoes=[r.to_dict() for r in getattr(self, 'acao_rows', []) if r.to_text()],
+        )
+        rns = self._current_rns()
+        rns.append(record)
+        self._record_edit(
+            [{"op": "rn_add", "flow": self.current_flow, "index": len(rns) - 1, "rec": record.to_dict()}],
+            [{"op": "rn_delete", "flow": self.current_flow, "i": len(rns) - 1}],
+        )
+        self._refresh_textbox()
+
+    def _add_rn_and_prepare_opposite(self: 'RNBuilder'):
+        self._add_rn()
+        try:
+            if self.var_gatilho_tipo.get() == 'Em TAREFA se CAMPO for RESPOSTA':
+                lang = get_lang()
+                resp = (self.var_resposta.get() or '').strip().lower()
+                def _norm_es(x: str) -> str:
+                    return x.replace('í', 'i').replace('Í', 'i')
+                if lang == 'es':
+                    r = _norm_es(resp)
+                    if r == 'si':
+                        self.var_resposta.set('No')
+                    elif r == 'no':
+                        self.var_resposta.set('Sí')
+                else:
+                    if resp == 'sim':
+                        self.var_resposta.set('Não')
+                    elif resp in ('não', 'nao'):
+                        self.var_resposta.set('Sim')
+        except Exception:
+            pass
+        self._destroy_rows(getattr(self, 'acao_rows', []))
+        if hasattr(self, '_ensure_min_builder_rows'):
+            self._ensure_min_builder_rows()
+        self._schedule_preview()
+
+    def _clear_rns(self: 'RNBuilder', *, confirm=True):
+        if (not confirm) or messagebox.askyesno("Limpar", "Remover todas as RNs?"):
+            rns = self._current_rns()
+            old = [r.to_dict() for r in rns]
+            rns.clear()
+            self._record_edit(
+                [{"op": "rns_clear", "flow": self.current_flow}],
+                [{"op": "rns_set", "flow": self.current_flow, "recs": old}],
+            )
+            self._refresh_textbox()
+
+    RNBuilder._build_panels = _build_panels
+    RNBuilder._set_preview_text = _set_preview_text
+    RNBuilder._clear_preview = _clear_preview
+    RNBuilder._truncate = _truncate
+    RNBuilder._make_rn_mgr_row = _make_rn_mgr_row
+    RNBuilder._bind_rn_mgr_row = _bind_rn_mgr_row
+    RNBuilder._rebuild_rn_manager = _rebuild_rn_manager
+    RNBuilder._refresh_textbox = _refresh_textbox
+    RNBuilder._patch_textbox = _patch_textbox
+    RNBuilder._copy_all = _copy_all
+    RNBuilder._copy_single_rn = _copy_single_rn
+    RNBuilder._save_txt = _save_txt
+    RNBuilder._move_rn = _move_rn
+    RNBuilder._edit_rn = _edit_rn
+    RNBuilder._delete_rn = _delete_rn
+    RNBuilder._schedule_preview = _schedule_preview
+    RNBuilder._flush_preview = _flush_preview
+    RNBuilder.preview_stats = preview_stats
+    RNBuilder._update_preview = _update_preview
+    RNBuilder._add_rn = _add_rn
+    RNBuilder._add_rn_and_prepare_opposite = _add_rn_and_prepare_opposite
+    RNBuilder._clear_rns = _clear_rns
+
+_attach_panels_to_RNBuilder()
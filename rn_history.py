@@ -0,0 +1,84 @@
+import os
+from collections import deque
+
+# Profundidade do desfazer (RN_UNDO_DEPTH) e teto de itens guardados no histórico inteiro
+# (RNs, valores de memória): operações destrutivas grandes, como limpar um fluxo, pesam mais
+UNDO_DEPTH = 1000
+UNDO_BUDGET = 200_000
+
+
+def _weight(entries) -> int:
+    w = 0
+    for e in entries:
+        w += 1
+        for key in ("recs", "values"):
+            v = e.get(key)
+            if isinstance(v, list):
+                w += len(v)
+        flows = e.get("flows")
+        if isinstance(flows, dict):
+            # dict.values: fluxos ainda não lidos (funções) não são materializados só para pesar
+            w += sum(len(v) for v in dict.values(flows) if isinstance(v, list))
+    return w
+
+
+class UndoLog:
+    """Pilhas de desfazer/refazer com deltas de operação, no mesmo formato das entradas do diário
+    (rn_project.apply_entry): cada passo guarda as entradas que o refazem e as que o desfazem."""
+
+    def __init__(self, depth: int = UNDO_DEPTH, budget: int = UNDO_BUDGET):
+        self.depth = max(1, depth)
+        self.budget = budget
+        self._undo = deque()
+        self._redo = []
+        self._weight = 0
+
+    @classmethod
+    def from_env(cls):
+        try:
+            depth = int(os.environ.get("RN_UNDO_DEPTH", UNDO_DEPTH))
+        except ValueError:
+            depth = UNDO_DEPTH
+        return cls(depth)
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def push(self, do: list, undo: list, label: str = ""):
+        for step in self._redo:
+            self._weight -= step[3]
+        self._redo.clear()
+        w = _weight(do) + _weight(undo)
+        self._undo.append((label, do, undo, w))
+        self._weight += w
+        # Descarta os passos mais antigos; o mais recente fica mesmo acima do teto
+        while len(self._undo) > 1 and (len(self._undo) > self.depth or self._weight > self.budget):
+            self._weight -= self._undo.popleft()[3]
+
+    def undo(self):
+        """Entradas que desfazem o último passo (None se não houver)."""
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        self._redo.append(step)
+        return step[2]
+
+    def redo(self):
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        self._undo.append(step)
+        return step[1]
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._weight = 0
@@ -0,0 +1,522 @@
+import codecs
+import csv
+import heapq
+import io
+import time
+from itertools import chain, islice
+from bisect import bisect_left, insort
+from typing import Optional
+
+# Quantidade máxima de sugestões entregues a um combo
+TYPEAHEAD_LIMIT = 30
+
+
+def norm_item(s) -> str:
+    return " ".join((s or "").split())
+
+
+def item_key(s) -> str:
+    return norm_item(s).casefold()
+
+
+def detect_encoding(sample: bytes) -> str:
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # Amostra cortada no meio de um caractere multibyte ainda é UTF-8
+        if e.start < len(sample) - 3:
+            return "cp1252"
+    return "utf-8"
+
+
+# Títulos de coluna comuns nas planilhas exportadas: a primeira linha com um deles é cabeçalho
+_HEADER_TITLES = {
+    "tarefa", "tarefas", "campo", "campos", "responsavel", "responsável", "responsaveis",
+    "responsáveis", "nome", "item", "itens", "descricao", "descrição",
+}
+
+
+def _is_header(sniffer, sample: str, first: list, columns: int) -> bool:
+    if any(item_key(cell) in _HEADER_TITLES for cell in first):
+        return True
+    # has_header compara a primeira linha com as demais coluna a coluna; numa coluna só ele vê
+    # apenas o comprimento do texto e confundiria o primeiro item com um título
+    if columns < 2:
+        return False
+    try:
+        return sniffer.has_header(sample)
+    except csv.Error:
+        return False
+
+
+def _iter_csv_values(text):
+    head = []
+    for _ in range(20):
+        line = text.readline()
+        if not line:
+            break
+        head.append(line)
+    sample = "".join(head)
+    sniffer = csv.Sniffer()
+    try:
+        dialect = sniffer.sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    rows = csv.reader(chain(head, text), dialect)
+    first = next(rows, [])
+    columns = max((len(r) for r in csv.reader(head, dialect)), default=0)
+    # Linha de títulos (ex.: "Tarefa;Responsável") não é um item da memória
+    if not _is_header(sniffer, sample, first, columns):
+        rows = chain([first], rows)
+    for row in rows:
+        for cell in row:
+            if cell.strip():
+                yield cell
+                break
+
+
+def open_import_source(path: str):
+    """Abre um TXT/CSV de lista de memória para leitura em fluxo.
+
+    Devolve (arquivo, valores): um valor por linha no TXT e a primeira célula preenchida de cada
+    linha no CSV. O progresso pode ser lido em arquivo.buffer.tell().
+    """
+    buf = open(path, "rb")
+    try:
+        enc = detect_encoding(buf.peek(65536)[:65536])
+        text = io.TextIOWrapper(buf, encoding=enc, errors="replace", newline="")
+    except Exception:
+        buf.close()
+        raise
+    if path.lower().endswith(".csv"):
+        return text, _iter_csv_values(text)
+    return text, (line.rstrip("\r\n") for line in text)
+
+
+class MemIndex:
+    """Lista de memória (tarefas, campos, responsáveis) indexada pela chave normalizada.
+
+    Mantém a ordem de exibição e a grafia original; busca, inclusão e renomeação são O(1).
+    """
+
+    __slots__ = ("_items", "_pos", "version", "listener", "_watchers")
+
+    def __init__(self, values=()):
+        self._items: list[str] = []
+        self._pos: dict[str, int] = {}
+        self.version = 0
+        # listener(op, *args): avisado em add/remove/rename feitos pelo usuário (não em reset/sort)
+        self.listener = None
+        # watch(): índices derivados; recebem add/remove/rename e "reset" quando o conjunto é trocado
+        self._watchers = []
+        self.extend(values)
+
+    def watch(self, callback):
+        self._watchers.append(callback)
+
+    def unwatch(self, callback):
+        try:
+            self._watchers.remove(callback)
+        except ValueError:
+            pass
+
+    def _changed(self, op: str, *args):
+        for callback in self._watchers:
+            callback(op, *args)
+
+    def _notify(self, op: str, *args):
+        if self.listener is not None:
+            self.listener(op, *args)
+        self._changed(op, *args)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __contains__(self, value) -> bool:
+        return isinstance(value, str) and item_key(value) in self._pos
+
+    def keys(self):
+        return self._pos.keys()
+
+    def positions(self, keys) -> list[int]:
+        pos = self._pos
+        return sorted(pos[k] for k in keys if k in pos)
+
+    def __repr__(self):
+        return f"MemIndex({self._items!r})"
+
+    def get(self, value) -> Optional[str]:
+        i = self._pos.get(item_key(value))
+        return None if i is None else self._items[i]
+
+    def index(self, value) -> int:
+        i = self._pos.get(item_key(value))
+        if i is None:
+            raise ValueError(value)
+        return i
+
+    def _append(self, value) -> Optional[str]:
+        v = norm_item(value)
+        k = v.casefold()
+        if not v or k in self._pos:
+            return None
+        self._pos[k] = len(self._items)
+        self._items.append(v)
+        self.version += 1
+        return v
+
+    def add(self, value) -> bool:
+        v = self._append(value)
+        if v is None:
+            return False
+        self._notify("add", v)
+        return True
+
+    def extend(self, values, notify: bool = True) -> int:
+        """Inclui vários itens com um único "reset"; notify=False adia o aviso para touch()."""
+        added = 0
+        for v in values:
+            if isinstance(v, str) and self._append(v) is not None:
+                added += 1
+        if added and notify:
+            self._changed("reset")
+        return added
+
+    def touch(self):
+        self._changed("reset")
+
+    def _sorted_pos(self, key: str, hi: Optional[int] = None) -> int:
+        lo, hi = 0, len(self._items) if hi is None else hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._items[mid].casefold() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _reindex(self, start: int, stop: Optional[int] = None):
+        stop = len(self._items) if stop is None else stop
+        for j in range(start, stop):
+            self._pos[self._items[j].casefold()] = j
+
+    def insert_sorted(self, value) -> int:
+        """Inclui na posição alfabética (a lista já deve estar ordenada). Devolve a posição ou -1."""
+        v = norm_item(value)
+        k = v.casefold()
+        if not v or k in self._pos:
+            return -1
+        i = self._sorted_pos(k)
+        self._items.insert(i, v)
+        self._reindex(i)
+        self.version += 1
+        self._notify("add", v)
+        return i
+
+    def reposition(self, value) -> int:
+        """Move um item para a sua posição alfabética e devolve o novo índice."""
+        i = self.index(value)
+        v = self._items.pop(i)
+        j = self._sorted_pos(v.casefold())
+        self._items.insert(j, v)
+        if i != j:
+            self._reindex(min(i, j), max(i, j) + 1)
+            self.version += 1
+        return j
+
+    def remove(self, value) -> bool:
+        i = self._pos.pop(item_key(value), None)
+        if i is None:
+            return False
+        v = self._items.pop(i)
+        self._reindex(i)
+        self.version += 1
+        self._notify("remove", v)
+        return True
+
+    def rename(self, old, new) -> bool:
+        ko = item_key(old)
+        nv = norm_item(new)
+        kn = nv.casefold()
+        i = self._pos.get(ko)
+        if i is None or not nv or (kn != ko and kn in self._pos):
+            return False
+        if self._items[i] == nv:
+            return False
+        del self._pos[ko]
+        self._pos[kn] = i
+        ov, self._items[i] = self._items[i], nv
+        self.version += 1
+        self._notify("rename", ov, nv)
+        return True
+
+    def sort(self):
+        self._items.sort(key=str.casefold)
+        self._pos = {v.casefold(): i for i, v in enumerate(self._items)}
+        self.version += 1
+
+    def clear(self):
+        self._items.clear()
+        self._pos.clear()
+        self.version += 1
+        self._changed("reset")
+
+    def reset(self, values=()):
+        self.clear()
+        self.extend(values)
+
+
+def _word_suffixes(key: str):
+    for i in range(1, len(key)):
+        if key[i - 1] == " " and key[i] != " ":
+            yield key[i:]
+
+
+def _trigrams(key: str) -> set:
+    k = f"  {key} "
+    return {k[i:i + 3] for i in range(len(k) - 2)}
+
+
+class Typeahead:
+    """Sugestões para os combos de tarefa/campo a partir de um MemIndex.
+
+    Prefixos usam listas ordenadas de chaves (trie achatada: cada prefixo é um intervalo contíguo
+    achado por bisect), tanto da chave inteira quanto de cada palavra; quando faltam resultados,
+    completa com busca aproximada por trigramas. O índice segue o MemIndex pelas operações
+    (add/remove/rename) e só é refeito quando a lista inteira é trocada; listas ordenadas e
+    trigramas são montados em fatias por prepare(), que a interface chama fora da digitação.
+    Enquanto a montagem não termina, sugestões e filtro (matching) varrem as chaves e a busca
+    aproximada usa o que já foi indexado.
+    """
+
+    # Teto de entradas de trigramas lidas por busca aproximada (mantém a consulta abaixo de 1 ms)
+    FUZZY_BUDGET = 3000
+    # Fatia de montagem dos trigramas feita por uma consulta que encontra o índice incompleto
+    QUERY_BUILD_S = 0.004
+    _BUILD_CHUNK = 256
+    _SORT_CHUNK = 512
+
+    def __init__(self, source: MemIndex):
+        self._source = source
+        self._stale = True
+        self._known: set = set()
+        self._keys: list[str] = []
+        self._words: list[tuple] = []
+        self._tri: dict = {}
+        self._todo: list = []
+        self._build = None
+        source.watch(self._on_change)
+
+    def close(self):
+        """Desliga o índice do MemIndex (para índices criados por quem tem vida mais curta que a lista)."""
+        self._source.unwatch(self._on_change)
+
+    def _on_change(self, op: str, *args):
+        if self._stale:
+            return
+        if self._build is not None:
+            # Listas ordenadas pela metade: mais simples recomeçar do que corrigir os trechos
+            self._stale = True
+            return
+        if op == "add":
+            self._put(item_key(args[0]))
+        elif op == "remove":
+            self._drop(item_key(args[0]))
+        elif op == "rename":
+            old, new = item_key(args[0]), item_key(args[1])
+            if old != new:
+                self._drop(old)
+                self._put(new)
+        else:
+            self._stale = True
+
+    def _sync(self):
+        if self._stale:
+            self._stale = False
+            self._rebuild(set(self._source.keys()))
+
+    def _rebuild(self, keys: set):
+        self._known = keys
+        self._keys = []
+        self._words = []
+        self._tri = {}
+        self._todo = list(keys)
+        self._build = self._build_sorted(list(keys))
+
+    def _build_sorted(self, keys: list):
+        # Trechos ordenados em fatias e depois intercalados (heapq.merge), também em fatias
+        key_runs, word_runs = [], []
+        for i in range(0, len(keys), self._SORT_CHUNK):
+            part = keys[i:i + self._SORT_CHUNK]
+            key_runs.append(sorted(part))
+            word_runs.append(sorted((w, k) for k in part for w in _word_suffixes(k)))
+            yield
+        for runs, out in ((key_runs, self._keys), (word_runs, self._words)):
+            merged = heapq.merge(*runs)
+            while True:
+                n = len(out)
+                out.extend(islice(merged, self._SORT_CHUNK))
+                if len(out) - n < self._SORT_CHUNK:
+                    break
+                yield
+
+    @property
+    def ready(self) -> bool:
+        return not self._stale and self._build is None and not self._todo
+
+    def prepare(self, budget: float) -> bool:
+        """Monta listas ordenadas e trigramas por até `budget` segundos; True quando tudo está completo."""
+        self._sync()
+        deadline = time.perf_counter() + budget
+        while self._build is not None:
+            if next(self._build, False) is False:
+                self._build = None
+            elif time.perf_counter() >= deadline:
+                return False
+        todo, tri, known = self._todo, self._tri, self._known
+        while todo:
+            for k in todo[-self._BUILD_CHUNK:]:
+                # Chaves removidas depois do início da montagem ficam de fora
+                if k in known:
+                    for t in _trigrams(k):
+                        bucket = tri.get(t)
+                        if bucket is None:
+                            tri[t] = {k}
+                        else:
+                            bucket.add(k)
+            del todo[-self._BUILD_CHUNK:]
+            if time.perf_counter() >= deadline:
+                break
+        return not todo
+
+    def _put(self, k: str):
+        if k in self._known:
+            return
+        self._known.add(k)
+        insort(self._keys, k)
+        for w in _word_suffixes(k):
+            insort(self._words, (w, k))
+        for t in _trigrams(k):
+            self._tri.setdefault(t, set()).add(k)
+
+    def _drop(self, k: str):
+        self._known.discard(k)
+        i = bisect_left(self._keys, k)
+        if i < len(self._keys) and self._keys[i] == k:
+            del self._keys[i]
+        for w in _word_suffixes(k):
+            i = bisect_left(self._words, (w, k))
+            if i < len(self._words) and self._words[i] == (w, k):
+                del self._words[i]
+        for t in _trigrams(k):
+            bucket = self._tri.get(t)
+            if bucket is not None:
+                bucket.discard(k)
+                if not bucket:
+                    del self._tri[t]
+
+    def _fuzzy(self, q: str, limit: int, seen: set) -> list[str]:
+        if self._todo:
+            self.prepare(self.QUERY_BUILD_S)
+        qt = _trigrams(q)
+        posts = sorted((p for p in (self._tri.get(t) for t in qt) if p), key=len)
+        if not posts:
+            return []
+        # Candidatos vêm dos trigramas mais raros (os que mais discriminam), até o teto de
+        # FUZZY_BUDGET verificações; cada candidato é pontuado contra todos os trigramas da busca
+        pool_max = max(limit, self.FUZZY_BUDGET // len(posts))
+        pool = set()
+        for p in posts:
+            room = pool_max - len(pool)
+            if room <= 0:
+                break
+            pool.update(p if len(p) <= room else islice(p, room))
+        pool -= seen
+        need = max(1, len(qt) // 3)
+        ranked = []
+        for k in pool:
+            n = sum(1 for p in posts if k in p)
+            if n >= need:
+                ranked.append((-n, abs(len(k) - len(q)), k))
+        return [k for _n, _d, k in heapq.nsmallest(limit, ranked)]
+
+    def matching(self, text, cap: Optional[int] = None) -> Optional[set]:
+        """Chaves que contêm o texto (filtro das listas de memória).
+
+        Com `cap`, devolve None em vez de conferir mais que `cap` chaves (o chamador varre em fatias).
+        """
+        self._sync()
+        q = item_key(text)
+        if len(q) >= 3 and self._todo:
+            self.prepare(self.QUERY_BUILD_S)
+        if len(q) < 3 or self._todo:
+            if cap is not None and len(self._known) > cap:
+                return None
+            return {k for k in self._known if q in k}
+        posts = []
+        for i in range(len(q) - 2):
+            p = self._tri.get(q[i:i + 3])
+            if not p:
+                return set()
+            posts.append(p)
+        posts.sort(key=len)
+        if cap is not None and len(posts[0]) > cap:
+            return None
+        found = set(posts[0])
+        for p in posts[1:]:
+            found &= p
+            if not found:
+                return found
+        return {k for k in found if q in k}
+
+    def _scan(self, q: str, limit: int) -> list[str]:
+        # Listas ordenadas ainda em montagem: mesmo critério (início da chave, depois início de
+        # uma palavra) por varredura das chaves
+        known = self._known
+        keys = heapq.nsmallest(limit, (k for k in known if k.startswith(q)))
+        if len(keys) < limit:
+            wq = " " + q
+            seen = set(keys)
+            keys += heapq.nsmallest(limit - len(keys), (k for k in known if wq in k and k not in seen))
+        return keys
+
+    def suggest(self, text, limit: int = TYPEAHEAD_LIMIT) -> list[str]:
+        self._sync()
+        q = item_key(text)
+        if self._build is not None:
+            self.prepare(self.QUERY_BUILD_S)
+        if self._build is not None:
+            keys = self._scan(q, limit)
+            if len(keys) < limit and len(q) >= 3:
+                keys.extend(self._fuzzy(q, limit - len(keys), set(keys)))
+        elif not q:
+            keys = self._keys[:limit]
+        else:
+            keys = []
+            seen = set()
+            i = bisect_left(self._keys, q)
+            while i < len(self._keys) and len(keys) < limit and self._keys[i].startswith(q):
+                keys.append(self._keys[i])
+                seen.add(self._keys[i])
+                i += 1
+            i = bisect_left(self._words, (q,))
+            while i < len(self._words) and len(keys) < limit and self._words[i][0].startswith(q):
+                k = self._words[i][1]
+                if k not in seen:
+                    keys.append(k)
+                    seen.add(k)
+                i += 1
+            if len(keys) < limit and len(q) >= 3:
+                keys.extend(self._fuzzy(q, limit - len(keys), seen))
+        src = self._source
+        return [src.get(k) or k for k in keys]
@@ -0,0 +1,655 @@
+import hashlib, json, os, queue, re, tempfile, threading, zlib
+from typing import Optional
+
+from rn_engine import RESP_DEFAULTS, RNRecord
+from rn_schema import ProjectError, check_project, validate_flow, records_valid
+
+JOURNAL_SUFFIX = ".journal"
+DEFAULT_FLOW = "Fluxo Padrão"
+
+# Projeto em pasta: projeto.json (cabeçalho e ordem dos fluxos), um arquivo por fluxo e um por
+# lista de memória. Um salvamento regrava só o que mudou, mais o projeto.json.
+PROJECT_DIR_EXT = ".rnprojd"
+MANIFEST_NAME = "projeto.json"
+FLOW_EXT = ".rnflow"
+MEMORY_KEYS = ("tarefas", "campos", "responsaveis")
+
+# Projeto compacto (.rnpz): cabeçalho mágico + JSON comprimido com zlib, com todas as strings
+# internadas numa tabela e as RNs quebradas em trechos reaproveitados entre regras. Desde a
+# versão 2 os registros de cada fluxo ficam num trecho JSON à parte, decodificado só quando o
+# fluxo é aberto; a versão 1 (tudo num JSON só) continua sendo lida
+COMPACT_EXT = ".rnpz"
+COMPACT_MAGIC = b"RNPZ\x02"
+_COMPACT_MAGICS = (b"RNPZ\x01", COMPACT_MAGIC)
+_RN_NUM = re.compile(r"RN(\d+): ")
+_FRAGMENT_END = re.compile(r"(?<=[,;.\n])")
+
+
+def dump_project(proj: dict) -> bytes:
+    return json.dumps(proj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def load_project(path: str) -> dict:
+    if os.path.isdir(path):
+        return load_project_dir(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(_COMPACT_MAGICS):
+        return decode_compact(data)
+    return json.loads(data.decode("utf-8"))
+
+
+def _umask() -> int:
+    # Só dá para ler o umask trocando-o; é devolvido na mesma hora (lido uma vez, na importação,
+    # antes da thread de salvamento existir)
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _umask()
+
+
+def write_atomic(path: str, data: bytes):
+    """Grava em um arquivo temporário na mesma pasta e troca pelo destino com os.replace:
+    uma queda no meio da escrita nunca deixa o arquivo pela metade."""
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=folder)
+    try:
+        # mkstemp cria com 0600: o arquivo final fica com as permissões do anterior ou as do umask
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def save_project(path: str, proj: dict):
+    if is_project_dir(path):
+        save_project_dir(path, proj)
+    elif path.lower().endswith(COMPACT_EXT):
+        write_atomic(path, encode_compact(proj))
+    else:
+        write_atomic(path, dump_project(proj))
+
+
+class _Interner:
+    __slots__ = ("table", "_ids")
+
+    def __init__(self):
+        self.table: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def __call__(self, s: str) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self.table)
+            self.table.append(s)
+        return i
+
+
+def _pack(value, intern):
+    # str -> índice na tabela; objeto -> [-1, chave, valor, ...]; número -> "i<n>"/"f<n>".
+    # Como nenhum número sai cru, o -1 no início de uma lista só pode marcar um objeto.
+    t = type(value)
+    if t is str:
+        return intern(value)
+    if t is dict:
+        out = [-1]
+        for k, v in value.items():
+            out.append(intern(k))
+            out.append(_pack(v, intern))
+        return out
+    if t is list:
+        return [_pack(v, intern) for v in value]
+    if value is None or t is bool:
+        return value
+    if t is int:
+        return f"i{value}"
+    if t is float:
+        return f"f{value!r}"
+    raise TypeError(f"valor não suportado no projeto: {value!r}")
+
+
+def _unpack(value, table):
+    t = type(value)
+    if t is int:
+        return table[value]
+    if t is list:
+        if value and type(value[0]) is int and value[0] == -1:
+            it = iter(value)
+            next(it)
+            return {table[k]: _unpack(v, table) for k, v in zip(it, it)}
+        return [_unpack(v, table) for v in value]
+    if t is str:
+        return int(value[1:]) if value[0] == "i" else float(value[1:])
+    return value
+
+
+def _pack_texts(texts, start: int, intern) -> list:
+    # Cada RN vira [numerada, trechos...]: o prefixo "RNn: " sai quando n segue a numeração
+    # do fluxo, e o texto é quebrado após , ; . e quebra de linha (trechos repetidos viram o mesmo índice)
+    out = []
+    for i, text in enumerate(texts):
+        m = _RN_NUM.match(text)
+        numbered = m is not None and m.group(1) == str(start + i)
+        body = text[m.end():] if numbered else text
+        out.append([numbered] + [intern(frag) for frag in _FRAGMENT_END.split(body) if frag])
+    return out
+
+
+def _unpack_texts(packed, start: int, table) -> list:
+    out = []
+    for i, item in enumerate(packed):
+        body = "".join(table[j] for j in item[1:])
+        out.append(f"RN{start + i}: {body}" if item[0] else body)
+    return out
+
+
+def encode_compact(proj: dict) -> bytes:
+    """Projeto versão 5 -> bytes do formato compacto; decode_compact devolve um dicionário igual."""
+    intern = _Interner()
+    header = proj.get("header")
+    start = header.get("start_idx", 1) if isinstance(header, dict) else 1
+    start = start if isinstance(start, int) and not isinstance(start, bool) else 1
+    rest = dict(proj)
+    texts = None
+    flows = rest.get("flows")
+    if isinstance(flows, dict) and all(isinstance(v, list) and all(isinstance(t, str) for t in v) for v in flows.values()):
+        texts = {intern(k): _pack_texts(v, start, intern) for k, v in flows.items()}
+        rest["flows"] = None
+    same_rns = isinstance(flows, dict) and "rns" in rest and rest["rns"] == flows.get(DEFAULT_FLOW, [])
+    if same_rns:
+        rest["rns"] = None
+    chunks = None
+    records = rest.get("flow_records")
+    if isinstance(records, dict) and all(isinstance(v, list) for v in records.values()):
+        chunks = {intern(k): json.dumps(_pack(v, intern), separators=(",", ":")) for k, v in records.items()}
+        rest["flow_records"] = None
+    packed = _pack(rest, intern)
+    body = {"s": intern.table, "p": packed, "t": texts, "r": same_rns, "n": start, "f": chunks}
+    raw = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return COMPACT_MAGIC + zlib.compress(raw, 9)
+
+
+def _unpack_chunk(chunk: str, table) -> list:
+    try:
+        return _unpack(json.loads(chunk), table)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ValueError(f"projeto compacto corrompido: {e}") from None
+
+
+def decode_compact_lazy(data: bytes) -> tuple:
+    """(proj, leitores): proj sem "flow_records" e, por fluxo, uma função que decodifica os
+    registros. Arquivos da versão 1 trazem os registros em proj e leitores None."""
+    if not data.startswith(_COMPACT_MAGICS):
+        raise ValueError("arquivo não é um projeto compacto")
+    try:
+        body = json.loads(zlib.decompress(data[len(COMPACT_MAGIC):]).decode("utf-8"))
+        table = body["s"]
+        proj = _unpack(body["p"], table)
+        if body["t"] is not None:
+            proj["flows"] = {table[int(k)]: _unpack_texts(v, body["n"], table) for k, v in body["t"].items()}
+        if body["r"]:
+            proj["rns"] = list(proj["flows"].get(DEFAULT_FLOW, []))
+        chunks = body.get("f")
+        loaders = None
+        if chunks is not None:
+            proj.pop("flow_records", None)
+            loaders = {table[int(k)]: (lambda c=c: _unpack_chunk(c, table)) for k, c in chunks.items()}
+    except (zlib.error, KeyError, IndexError, TypeError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"projeto compacto corrompido: {e}") from None
+    return proj, loaders
+
+
+def decode_compact(data: bytes) -> dict:
+    proj, loaders = decode_compact_lazy(data)
+    if loaders is not None:
+        proj["flow_records"] = {name: load() for name, load in loaders.items()}
+    return proj
+
+
+def is_project_dir(path: str) -> bool:
+    return bool(path) and (path.lower().endswith(PROJECT_DIR_EXT) or os.path.isdir(path))
+
+
+def project_dir_of(path: str) -> Optional[str]:
+    """Pasta de projeto que contém `path` (o manifesto ou um arquivo de flows/ ou memory/), ou None."""
+    folder = os.path.dirname(os.path.abspath(path))
+    if os.path.basename(path) != MANIFEST_NAME and os.path.basename(folder) in ("flows", "memory"):
+        folder = os.path.dirname(folder)
+    if folder.lower().endswith(PROJECT_DIR_EXT) or (
+            os.path.isfile(os.path.join(folder, MANIFEST_NAME)) and os.path.isdir(os.path.join(folder, "flows"))):
+        return folder
+    return None
+
+
+def flow_filename(name: str) -> str:
+    # Nome legível + hash do nome do fluxo: estável entre salvamentos e sem colisões
+    safe = re.sub(r'[<>:"/\\|?*\x00-\x1f]+', "_", name).strip(" .")[:40] or "fluxo"
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    return f"{safe}-{digest}{FLOW_EXT}"
+
+
+def _write_json(path: str, data):
+    write_atomic(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def save_project_dir(path: str, proj: dict):
+    """Grava o projeto como pasta. Regrava só os fluxos presentes em proj["flow_records"] e as
+    listas presentes em proj["memory"]; proj["flow_order"] (todos os fluxos, em ordem) vai para
+    o projeto.json, que é sempre regravado e por último."""
+    flows_dir = os.path.join(path, "flows")
+    memory_dir = os.path.join(path, "memory")
+    os.makedirs(flows_dir, exist_ok=True)
+    os.makedirs(memory_dir, exist_ok=True)
+
+    texts = proj.get("flows") or {}
+    records = proj.get("flow_records") or {}
+    order = list(proj.get("flow_order") or texts)
+    for name in order:
+        fname = flow_filename(name)
+        if name in records:
+            _write_json(os.path.join(flows_dir, fname), {"name": name, "rns": texts.get(name, []), "records": records[name]})
+        elif not os.path.exists(os.path.join(flows_dir, fname)):
+            raise ValueError(f"fluxo '{name}' não foi salvo antes e não veio no projeto")
+    for key, values in (proj.get("memory") or {}).items():
+        if key in MEMORY_KEYS:
+            _write_json(os.path.join(memory_dir, key + ".json"), list(values))
+
+    manifest = {k: v for k, v in proj.items() if k not in ("flows", "flow_records", "flow_order", "rns", "memory")}
+    manifest["layout"] = "dir"
+    manifest["flows"] = [{"name": name, "file": flow_filename(name)} for name in order]
+    _write_json(os.path.join(path, MANIFEST_NAME), manifest)
+
+    # Fluxos excluídos ou renomeados deixam arquivos órfãos
+    keep = {flow_filename(name) for name in order}
+    for fname in os.listdir(flows_dir):
+        if fname.endswith(FLOW_EXT) and fname not in keep:
+            try:
+                os.remove(os.path.join(flows_dir, fname))
+            except OSError:
+                pass
+
+
+def _read_flow_file(path: str, entry: dict, check: bool = False) -> tuple:
+    where = "flows/" + entry["file"]
+    try:
+        with open(os.path.join(path, "flows", entry["file"]), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ProjectError([f"{where}: {e}"])
+    if not isinstance(data, dict):
+        raise ProjectError([f"{where}: esperado objeto"])
+    texts, records = data.get("rns", []), data.get("records", [])
+    if check:
+        errors = validate_flow(entry["name"], texts)
+        if errors:
+            raise ProjectError(errors)
+    return texts, records
+
+
+def _read_manifest(path: str) -> tuple:
+    with open(os.path.join(path, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict):
+        raise ProjectError([f"{MANIFEST_NAME}: esperado objeto"])
+    entries = manifest.get("flows", [])
+    if not isinstance(entries, list):
+        raise ProjectError([f"{MANIFEST_NAME}.flows: esperado lista"])
+    # Só a existência de cada arquivo é conferida aqui; o conteúdo é lido (e validado) com o fluxo
+    errors = []
+    for i, entry in enumerate(entries):
+        if not (isinstance(entry, dict) and isinstance(entry.get("name"), str)
+                and isinstance(entry.get("file"), str) and os.path.basename(entry["file"]) == entry["file"]):
+            errors.append(f"{MANIFEST_NAME}.flows[{i}]: esperado {{\"name\", \"file\"}}")
+        elif not os.path.isfile(os.path.join(path, "flows", entry["file"])):
+            errors.append(f"flows/{entry['file']}: arquivo não encontrado ({entry['name']})")
+    if errors:
+        raise ProjectError(errors)
+    proj = {k: v for k, v in manifest.items() if k not in ("layout", "flows")}
+    memory = {}
+    for key in MEMORY_KEYS:
+        try:
+            with open(os.path.join(path, "memory", key + ".json"), "r", encoding="utf-8") as f:
+                memory[key] = json.load(f)
+        except FileNotFoundError:
+            pass
+    proj["memory"] = memory
+    return proj, entries
+
+
+def load_project_dir(path: str) -> dict:
+    """Lê um projeto em pasta e devolve o mesmo dicionário da versão 5 em JSON."""
+    proj, entries = _read_manifest(path)
+    flows, records = {}, {}
+    for entry in entries:
+        flows[entry["name"]], records[entry["name"]] = _read_flow_file(path, entry)
+    proj["flows"] = flows
+    proj["flow_records"] = records
+    proj["rns"] = list(flows.get(DEFAULT_FLOW, []))
+    return proj
+
+
+def _records(texts, recs) -> list:
+    # Mesma regra de records_from_project: usa os registros quando batem com os textos (e, aqui,
+    # quando são válidos; senão os textos, já validados na abertura, reconstroem as RNs)
+    if isinstance(recs, list) and len(recs) == len(texts) and records_valid(recs):
+        return [RNRecord.from_dict(r) for r in recs]
+    return [RNRecord.from_text(t) for t in texts]
+
+
+class LazyFlows(dict):
+    """Fluxos (nome -> lista de RNRecord) materializados sob demanda.
+
+    Um valor ainda não lido é uma função sem argumentos que devolve a lista; o acesso pelo nome
+    (flows[nome], get, pop, items...) a materializa. Nomes, ordem e `in` não leem nada.
+    Um fluxo que falha ao ser lido continua pendente, com o erro em `errors`, e sai de pending().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.errors = {}
+
+    def _load(self, name, value):
+        if callable(value):
+            try:
+                value = value()
+            except Exception as e:
+                self.errors[name] = e
+                raise
+            self.errors.pop(name, None)
+            dict.__setitem__(self, name, value)
+        return value
+
+    def __setitem__(self, name, value):
+        self.errors.pop(name, None)
+        dict.__setitem__(self, name, value)
+
+    def __getitem__(self, name):
+        return self._load(name, dict.__getitem__(self, name))
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def setdefault(self, name, default=None):
+        if name in self:
+            return self[name]
+        self[name] = default
+        return default
+
+    def pop(self, name, *default):
+        if name not in self:
+            return dict.pop(self, name, *default)
+        if name in self.errors:
+            # Fluxo ilegível: sai sem ser lido de novo
+            dict.pop(self, name)
+            del self.errors[name]
+            return []
+        value = self[name]
+        dict.pop(self, name)
+        return value
+
+    def values(self):
+        return [self[k] for k in self]
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+    def pending(self) -> list:
+        return [k for k, v in dict.items(self) if callable(v) and k not in self.errors]
+
+    def loads(self, name) -> bool:
+        """Materializa o fluxo; False se ele não pôde ser lido (o erro fica em `errors`)."""
+        try:
+            self[name]
+        except Exception:
+            return False
+        return True
+
+    def materialize(self, name) -> bool:
+        """Materializa um fluxo pendente; devolve False se ele já estava carregado."""
+        if name in self and callable(dict.__getitem__(self, name)):
+            self[name]
+            return True
+        return False
+
+
+def open_project_lazy(path: str) -> tuple:
+    """Abre um projeto lendo cabeçalho e memórias agora e os fluxos só quando acessados.
+
+    Devolve (proj, flows): proj sem os fluxos e flows como LazyFlows. Na pasta, o manifesto e a
+    existência dos arquivos de fluxo são conferidos aqui, mas cada fluxo só é lido (e validado) na
+    primeira vez que for usado: um arquivo corrompido levanta ProjectError nesse acesso; no .rnproj o JSON é lido, migrado e
+    validado de uma vez (os registros de cada fluxo, ao materializá-lo) e só a conversão das RNs em
+    RNRecord fica adiada. Levanta ProjectError antes de qualquer alteração na interface se o
+    projeto for inválido.
+    """
+    flows = LazyFlows()
+    if os.path.isdir(path):
+        proj, entries = _read_manifest(path)
+        proj["flows"] = {entry["name"]: [] for entry in entries}
+        proj = check_project(proj)
+        for entry in entries:
+            flows[entry["name"]] = lambda e=entry: _records(*_read_flow_file(path, e, check=True))
+    else:
+        with open(path, "rb") as f:
+            data = f.read()
+        loaders = None
+        if data.startswith(_COMPACT_MAGICS):
+            # Registros do .rnpz só são decodificados quando o fluxo for aberto
+            proj, loaders = decode_compact_lazy(data)
+        else:
+            proj = json.loads(data.decode("utf-8"))
+        del data
+        proj = check_project(proj, records=False)
+        texts = proj.pop("flows", None)
+        stored = proj.pop("flow_records", None)
+        if loaders is not None:
+            stored = loaders
+        if not (isinstance(texts, dict) and texts):
+            legacy = proj.get("rns", [])
+            texts = {DEFAULT_FLOW: list(legacy) if isinstance(legacy, list) else []}
+        if not isinstance(stored, dict):
+            stored = {}
+        for name, t in texts.items():
+            flows[name] = lambda t=t, r=stored.get(name): _records(t, r() if callable(r) else r)
+    proj.pop("rns", None)
+    if not flows:
+        flows[DEFAULT_FLOW] = []
+    return proj, flows
+
+
+class SaveWorker:
+    """Serializa e grava projetos em uma thread própria; o Tk lê os resultados com poll()."""
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, path: str, proj: dict, token=None):
+        with self._lock:
+            self._pending += 1
+        self._jobs.put((path, proj, token))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rn-save", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            path, proj, token = self._jobs.get()
+            try:
+                save_project(path, proj)
+                error = None
+            except Exception as e:
+                error = e
+            self._results.put((token, path, error))
+            self._jobs.task_done()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def poll(self) -> list:
+        out = []
+        while True:
+            try:
+                out.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        if out:
+            with self._lock:
+                self._pending -= len(out)
+        return out
+
+    def wait(self, timeout: float = 10.0) -> bool:
+        done = threading.Event()
+
+        def _join():
+            self._jobs.join()
+            done.set()
+
+        threading.Thread(target=_join, daemon=True).start()
+        return done.wait(timeout)
+
+
+def default_journal_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".rn_builder", "autosave" + JOURNAL_SUFFIX)
+
+
+def journal_path_for(project_path: Optional[str]) -> str:
+    return project_path + JOURNAL_SUFFIX if project_path else default_journal_path()
+
+
+class Journal:
+    """Diário de edições em JSON Lines, só acréscimo. Cada linha tem um `seq` crescente;
+    depois de um salvamento, compact(seq) descarta o que já está no arquivo do projeto."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = None
+        entries = self.entries()
+        self.seq = entries[-1]["seq"] if entries else 0
+
+    def append(self, op: str, **data):
+        self.seq += 1
+        if self._fh is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(json.dumps({"seq": self.seq, "op": op, **data}, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        if self._fh is not None:
+            self._fh.flush()
+
+    def close(self):
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            finally:
+                self._fh = None
+
+    def entries(self) -> list:
+        self.flush()
+        out = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # última linha cortada por uma queda
+                    if isinstance(entry, dict) and isinstance(entry.get("seq"), int):
+                        out.append(entry)
+        except FileNotFoundError:
+            pass
+        return out
+
+    def compact(self, upto: int) -> list:
+        """Remove as entradas com seq <= upto e devolve as que sobraram."""
+        keep = [e for e in self.entries() if e["seq"] > upto]
+        self.close()
+        if keep:
+            data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in keep)
+            write_atomic(self.path, data.encode("utf-8"))
+        else:
+            self.discard()
+        return keep
+
+    def discard(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def apply_entry(flows: dict, memory: dict, entry: dict) -> Optional[str]:
+    """Reaplica uma entrada do diário sobre os fluxos (nome -> lista de RNRecord) e as memórias
+    (bucket -> MemIndex). Devolve o fluxo afetado; entradas inválidas são ignoradas."""
+    op = entry.get("op")
+    flow = entry.get("flow")
+    try:
+        if op == "rn_add":
+            rns = flows.setdefault(flow, [])
+            rns.insert(int(entry.get("index", len(rns))), RNRecord.from_dict(entry["rec"]))
+        elif op == "rn_move":
+            rns = flows[flow]
+            i, j = int(entry["i"]), int(entry["j"])
+            rns[i], rns[j] = rns[j], rns[i]
+        elif op == "rn_delete":
+            del flows[flow][int(entry["i"])]
+        elif op == "rn_edit":
+            flows[flow][int(entry["i"])].set_text(entry["text"])
+        elif op == "rn_replace":
+            flows[flow][int(entry["i"])] = RNRecord.from_dict(entry["rec"])
+        elif op == "rns_clear":
+            flows[flow].clear()
+        elif op == "rns_set":
+            flows[flow] = [RNRecord.from_dict(r) for r in entry["recs"]]
+        elif op == "flows_set":
+            flows.clear()
+            for name, recs in entry["flows"].items():
+                flows[name] = [RNRecord.from_dict(r) for r in recs]
+            flow = next(iter(flows), None)
+        elif op == "flow_new":
+            flow = entry["name"]
+            flows.setdefault(flow, [])
+        elif op == "flow_rename":
+            flow = entry["new"]
+            flows[flow] = flows.pop(entry["old"])
+        elif op == "flow_delete":
+            flows.pop(entry["name"], None)
+            flow = None
+        elif op == "mem_add":
+            memory[entry["bucket"]].add(entry["value"])
+        elif op == "mem_remove":
+            memory[entry["bucket"]].remove(entry["value"])
+        elif op == "mem_rename":
+            memory[entry["bucket"]].rename(entry["old"], entry["new"])
+        elif op == "mem_reset":
+            memory[entry["bucket"]].reset(entry.get("values", []))
+        elif op == "reset":
+            flows.clear()
+            flows[DEFAULT_FLOW] = []
+            for bucket, index in memory.items():
+                index.reset(RESP_DEFAULTS if bucket == "resp" else ())
+            flow = DEFAULT_FLOW
+    except (KeyError, IndexError, ValueError, TypeError):
+        return None
+    return flow
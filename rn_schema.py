@@ -0,0 +1,312 @@
+from typing import Optional
+
+from rn_engine import TR, RESP_DEFAULTS, GATILHOS, ACOES
+
+# Versões do formato de projeto. Arquivos sem "version" (ou anteriores à 5) guardam uma única
+# lista "rns"; a versão 5 trouxe os fluxos, os registros estruturados e o construtor.
+CURRENT_VERSION = 5
+DEFAULT_FLOW = "Fluxo Padrão"
+MAX_ERRORS = 50
+
+
+class ProjectError(ValueError):
+    """Projeto que não pode ser migrado ou não passa na validação; `errors` lista os problemas."""
+
+    def __init__(self, errors: list):
+        self.errors = list(errors)
+        msg = "; ".join(self.errors[:5])
+        if len(self.errors) > 5:
+            msg += f" (+{len(self.errors) - 5})"
+        super().__init__(msg)
+
+
+# --- Migrações: MIGRATIONS[v] recebe um projeto da versão v e devolve o da versão v + 1 ---
+
+_CLOSING_TEXTS = {
+    **{TR[lang]["closing_partial"]: "Encerrar Fluxo (Parcial)" for lang in TR},
+    **{TR[lang]["closing_total"]: "Encerrar Fluxo (Total)" for lang in TR},
+}
+
+
+def normalize_acao(d: dict) -> dict:
+    """Ação "Texto Livre" com o texto padrão de encerramento vira a ação de encerramento
+    correspondente (formato antigo, antes de existir o tipo próprio)."""
+    if d.get("tipo") == "Texto Livre":
+        tipo = _CLOSING_TEXTS.get(d.get("texto", ""))
+        if tipo:
+            d = dict(d, tipo=tipo)
+    return d
+
+
+def _normalize_acoes(acoes):
+    if isinstance(acoes, list):
+        return [normalize_acao(a) if isinstance(a, dict) else a for a in acoes]
+    return acoes
+
+
+def _v4_to_v5(proj: dict) -> dict:
+    proj = dict(proj)
+    flows = proj.get("flows")
+    if not (isinstance(flows, dict) and flows):
+        legacy = proj.get("rns", [])
+        proj["flows"] = {DEFAULT_FLOW: list(legacy) if isinstance(legacy, list) else []}
+    proj.setdefault("rns", list(proj["flows"].get(DEFAULT_FLOW, [])))
+    proj.setdefault("lang", "pt")
+
+    header = dict(proj.get("header") or {})
+    start = header.get("start_idx", 1)
+    if isinstance(start, str) and start.strip().isdigit():
+        header["start_idx"] = int(start)
+    header.setdefault("start_idx", 1)
+    proj["header"] = header
+
+    memory = dict(proj.get("memory") or {})
+    memory.setdefault("tarefas", [])
+    memory.setdefault("campos", [])
+    memory.setdefault("responsaveis", list(RESP_DEFAULTS))
+    proj["memory"] = memory
+
+    builder = proj.get("builder")
+    if isinstance(builder, dict) and "acoes" in builder:
+        proj["builder"] = dict(builder, acoes=_normalize_acoes(builder["acoes"]))
+    else:
+        proj.setdefault("builder", {})
+
+    records = proj.get("flow_records")
+    if isinstance(records, dict):
+        proj["flow_records"] = {
+            name: [dict(r, acoes=_normalize_acoes(r["acoes"])) if isinstance(r, dict) and "acoes" in r else r for r in recs]
+            if isinstance(recs, list) else recs
+            for name, recs in records.items()
+        }
+    proj["version"] = 5
+    return proj
+
+
+MIGRATIONS = {4: _v4_to_v5}
+
+
+def project_version(proj: dict) -> int:
+    v = proj.get("version")
+    if isinstance(v, int) and not isinstance(v, bool):
+        return max(v, 4)
+    return 4
+
+
+def migrate(proj: dict) -> dict:
+    """Leva o projeto até CURRENT_VERSION, um passo de cada vez. Não altera o dicionário recebido."""
+    if not isinstance(proj, dict):
+        raise ProjectError(["projeto deve ser um objeto JSON"])
+    version = project_version(proj)
+    if version > CURRENT_VERSION:
+        raise ProjectError([f"versão {version} é mais nova que a suportada ({CURRENT_VERSION})"])
+    while version < CURRENT_VERSION:
+        step = MIGRATIONS.get(version)
+        if step is None:
+            raise ProjectError([f"não há migração da versão {version}"])
+        proj = step(proj)
+        version += 1
+    return proj
+
+
+# --- Validação: o esquema é compilado uma vez em funções check(valor) -> None (válido) ou lista
+# de erros com o caminho relativo; o caminho só é montado quando há erro ---
+
+def _type(*types, name: str):
+    msg = [f": esperado {name}"]
+    if bool in types:
+        return lambda v: None if isinstance(v, types) else msg
+    return lambda v: None if isinstance(v, types) and not isinstance(v, bool) else msg
+
+
+_STR = _type(str, name="texto")
+_INT = _type(int, name="inteiro")
+_BOOL = _type(bool, name="booleano")
+
+
+def _list(item):
+    msg = [": esperado lista"]
+    fast = str if item is _STR else None
+
+    def check(v):
+        if not isinstance(v, list):
+            return msg
+        if fast is not None and all(type(x) is fast for x in v):
+            return None
+        errors = []
+        for i, x in enumerate(v):
+            e = item(x)
+            if e:
+                errors.extend(f"[{i}]{m}" for m in e)
+                if len(errors) >= MAX_ERRORS:
+                    break
+        return errors or None
+    return check
+
+
+def _map(value):
+    msg = [": esperado objeto"]
+
+    def check(v):
+        if not isinstance(v, dict):
+            return msg
+        errors = []
+        for k, x in v.items():
+            e = value(x)
+            if e:
+                errors.extend(f".{k}{m}" for m in e)
+                if len(errors) >= MAX_ERRORS:
+                    break
+        return errors or None
+    return check
+
+
+def _obj(required: Optional[dict] = None, optional: Optional[dict] = None):
+    # Chaves desconhecidas são aceitas: arquivos de versões futuras compatíveis continuam abrindo
+    required = tuple((required or {}).items())
+    optional = tuple((optional or {}).items())
+    msg = [": esperado objeto"]
+
+    def check(v):
+        if not isinstance(v, dict):
+            return msg
+        errors = None
+        for key, sub in required:
+            e = [": obrigatório"] if key not in v else sub(v[key])
+            if e:
+                errors = (errors or []) + [f".{key}{m}" for m in e]
+        for key, sub in optional:
+            if key in v:
+                e = sub(v[key])
+                if e:
+                    errors = (errors or []) + [f".{key}{m}" for m in e]
+        return errors
+    return check
+
+
+def _enum(values, name: str):
+    values = frozenset(values)
+    return lambda v: None if isinstance(v, str) and v in values else [f": {name} desconhecido {v!r}"]
+
+
+def _all(*checks):
+    def check(v):
+        for c in checks:
+            e = c(v)
+            if e:
+                return e
+        return None
+    return check
+
+
+def _nonempty(check, msg: str):
+    err = [f": {msg}"]
+    return lambda v: check(v) or (None if v else err)
+
+
+def _either(*checks, name: str):
+    msg = [f": esperado {name}"]
+
+    def check(v):
+        deeper = None
+        for c in checks:
+            e = c(v)
+            if not e:
+                return None
+            # A opção cujo tipo bateu e que falhou por dentro explica melhor o erro
+            if deeper is None and not e[0].startswith(": esperado"):
+                deeper = e
+        return deeper or msg
+    return check
+
+
+_COND = _obj(optional={"campo": _STR, "op": _STR, "valor": _STR})
+_ACAO = _obj(optional={
+    "tipo": _STR, "tarefa": _STR, "resp": _STR, "resp_livre": _STR,
+    "sla_tipo": _STR, "sla_dias": _INT, "sla_marco": _STR, "sla_fer": _BOOL,
+    "status": _STR, "fluxo": _STR, "texto": _STR, "ret_tarefa": _STR, "ret_restart": _BOOL,
+})
+_GATILHO = _map(_either(_STR, _INT, _BOOL, name="texto"))
+_RECORD = _either(
+    _STR,
+    _obj(optional={
+        "gatilho": _GATILHO, "conds": _list(_COND), "conj": _STR, "acoes": _list(_ACAO),
+        "texto": _STR, "numerada": _BOOL,
+    }),
+    name="RN (texto ou registro)",
+)
+_TEXTS = _list(_STR)
+_RECORDS = _list(_RECORD)
+
+# Regras do modo em lote (JSON/CSV): os textos vão direto para render_rn, que espera texto em
+# todos os campos do gatilho e das condições; o SLA em dias pode vir como texto do CSV. Como no
+# construtor, a regra precisa de pelo menos uma ação, e os tipos são os da interface
+_SPEC = _obj(required={
+    "acoes": _nonempty(_list(_obj(optional={
+        "tipo": _enum(ACOES, "tipo de ação"), "tarefa": _STR, "resp": _STR, "resp_livre": _STR,
+        "sla_tipo": _STR, "sla_dias": _either(_INT, _STR, name="inteiro"),
+        "dias": _either(_INT, _STR, name="inteiro"), "sla_marco": _STR, "sla_fer": _BOOL,
+        "status": _STR, "fluxo": _STR, "texto": _STR, "ret_tarefa": _STR, "ret_restart": _BOOL,
+    })), "pelo menos uma ação"),
+}, optional={
+    "fluxo": _STR,
+    "gatilho": _all(_map(_STR), _obj(optional={"tipo": _enum(GATILHOS, "gatilho")})),
+    "conds": _list(_COND),
+    "conj": _STR,
+})
+
+
+def validate_spec(spec) -> list:
+    """Erros de uma regra do modo em lote ({"fluxo", "gatilho", "conds", "conj", "acoes"})."""
+    return [m.lstrip(".") for m in _SPEC(spec) or ()][:MAX_ERRORS]
+
+
+def _project_schema(records):
+    return _obj(
+        required={"version": _INT, "flows": _map(_TEXTS)},
+        optional={
+            "lang": _type(str, name="'pt' ou 'es'"),
+            "header": _obj(optional={"start_idx": _INT, "resp_preset": _STR, "resp_preset_free": _STR}),
+            "builder": _obj(optional={
+                "gatilho": _GATILHO, "conds": _list(_COND), "conj": _STR, "acoes": _list(_ACAO),
+            }),
+            "memory": _obj(optional={"tarefas": _TEXTS, "campos": _TEXTS, "responsaveis": _TEXTS}),
+            "rns": _TEXTS,
+            "flow_records": _map(records),
+        },
+    )
+
+
+_PROJECT_V5 = _project_schema(_RECORDS)
+# Sem descer nos registros: quem carrega os fluxos sob demanda valida cada um com records_valid
+_PROJECT_V5_SHALLOW = _project_schema(_type(list, name="lista"))
+
+
+def validate(proj: dict, records: bool = True) -> list:
+    """Erros de um projeto já migrado para a versão atual (lista vazia = válido)."""
+    schema = _PROJECT_V5 if records else _PROJECT_V5_SHALLOW
+    errors = [f"projeto{m}" for m in schema(proj) or ()]
+    if not errors and proj.get("lang", "pt") not in TR:
+        errors.append(f"projeto.lang: idioma desconhecido {proj['lang']!r}")
+    return errors[:MAX_ERRORS]
+
+
+def validate_flow(name: str, texts, records=None) -> list:
+    """Erros de um único fluxo (projetos em pasta validam cada fluxo ao lê-lo)."""
+    errors = [f"flows.{name}{m}" for m in _TEXTS(texts) or ()]
+    if records is not None:
+        errors += [f"flow_records.{name}{m}" for m in _RECORDS(records) or ()]
+    return errors[:MAX_ERRORS]
+
+
+def records_valid(records) -> bool:
+    return not _RECORDS(records)
+
+
+def check_project(proj: dict, records: bool = True) -> dict:
+    """Migra e valida; devolve o projeto na versão atual ou levanta ProjectError."""
+    proj = migrate(proj)
+    errors = validate(proj, records)
+    if errors:
+        raise ProjectError(errors)
+    return proj